@@ -0,0 +1,126 @@
+import json
+import os
+
+import numpy as np
+import pandas as pd
+
+# ==========================================
+# ⚗️ ADMET / 成药性批量打分：整列 NumPy 计算，无逐行循环
+# ==========================================
+# 规则：Lipinski 五规则 (MW ≤ 500, LogP ≤ 5, HBD ≤ 5, HBA ≤ 10)、Veber (RotB ≤ 10, TPSA ≤ 140)；
+# QED 采用 Bickerton 2012 的非对称双 S 形可取性函数与平均权重 (缺失的描述符不参与加权)；
+# ADMET 终点为可配置的逻辑回归：概率 = sigmoid(截距 + Σ 系数 × 描述符)，所有终点一次矩阵乘。
+
+DESCRIPTORS = ['分子量', 'LogP', 'HBA', 'HBD', 'TPSA', 'RotB', '芳香环', '警示结构']
+
+LIPINSKI_RULES = {'分子量': 500, 'LogP': 5, 'HBD': 5, 'HBA': 10}
+VEBER_RULES = {'RotB': 10, 'TPSA': 140}
+
+# QED 可取性函数参数 (A, B, C, D, E, F, DMAX) 与平均权重
+QED_PARAMS = {
+    '分子量': (2.817065973, 392.5754953, 290.7489764, 2.419764353, 49.22325677, 65.37051707, 104.9805561),
+    'LogP': (3.172690585, 137.8624751, 2.534937431, 4.581497897, 0.822739154, 0.576295591, 131.3186604),
+    'HBA': (2.948620388, 160.4605972, 3.615294657, 4.435986202, 0.290141953, 1.300669958, 148.7763046),
+    'HBD': (1.618662227, 1010.051101, 0.985094388, 0.000000001, 0.713820843, 0.920922555, 258.1632616),
+    'TPSA': (1.876861559, 125.2232657, 62.90773554, 87.83366614, 12.01999824, 28.51324732, 104.5686167),
+    'RotB': (0.010000000, 272.4121427, 2.558379970, 1.566890973, 1.271567166, 2.758063707, 105.4420403),
+    '芳香环': (3.217788970, 957.7374108, 2.274627939, 0.000000001, 1.317690384, 0.375760881, 312.3372610),
+    '警示结构': (0.010000000, 1199.094025, -0.09002883, 0.000000001, 0.185904477, 0.875193782, 417.7253140),
+}
+QED_WEIGHTS = {'分子量': 0.66, 'LogP': 0.46, 'HBA': 0.05, 'HBD': 0.61, 'TPSA': 0.06, 'RotB': 0.65, '芳香环': 0.48, '警示结构': 0.95}
+
+# 默认终点模型为基于理化性质的启发式筛查，可通过 TCM_ADMET_MODELS 指向 JSON 文件替换
+ADMET_MODELS = {
+    'hERG': {'intercept': -5.0, 'coef': {'LogP': 0.9, '分子量': 0.004, 'TPSA': -0.02}},
+    'Ames': {'intercept': -2.5, 'coef': {'警示结构': 1.2, '芳香环': 0.35, 'TPSA': -0.005}},
+    '致癌性': {'intercept': -3.0, 'coef': {'警示结构': 0.9, 'LogP': 0.25}},
+    '肝毒性': {'intercept': -3.5, 'coef': {'LogP': 0.5, '分子量': 0.003}},
+    'BBB': {'intercept': 3.0, 'coef': {'TPSA': -0.05, 'HBD': -0.4, 'LogP': 0.3}},
+    'Caco-2': {'intercept': 3.5, 'coef': {'TPSA': -0.03, 'HBD': -0.3, 'RotB': -0.1}},
+}
+TOXIC_ENDPOINTS = ['hERG', 'Ames', '致癌性', '肝毒性']
+POSITIVE_THRESHOLD = 0.5
+
+
+def load_models(path=None):
+    path = path or os.environ.get('TCM_ADMET_MODELS')
+    if not path:
+        return ADMET_MODELS
+    with open(path, encoding='utf-8') as f:
+        return json.load(f)
+
+
+def _columns(df, names):
+    return {c: pd.to_numeric(df[c], errors='coerce').to_numpy(np.float64) for c in names if c in df.columns}
+
+
+def desirability(x, params):
+    a, b, c, d, e, f, dmax = params
+    rise = 1.0 + np.exp(-(x - c + d / 2.0) / e)
+    fall = 1.0 - 1.0 / (1.0 + np.exp(-(x - c - d / 2.0) / f))
+    return (a + b / rise * fall) / dmax
+
+
+def qed(df):
+    cols = _columns(df, QED_PARAMS)
+    if not cols:
+        return np.full(len(df), np.nan)
+    log_sum = np.zeros(len(df))
+    weight = np.zeros(len(df))
+    for name, x in cols.items():
+        ok = np.isfinite(x)
+        d = np.clip(desirability(np.where(ok, x, 0.0), QED_PARAMS[name]), 1e-12, None)
+        log_sum += np.where(ok, QED_WEIGHTS[name] * np.log(d), 0.0)
+        weight += np.where(ok, QED_WEIGHTS[name], 0.0)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        return np.exp(log_sum / weight)
+
+
+def rule_violations(df, rules):
+    cols = _columns(df, rules)
+    return sum((x > rules[name]).astype(np.int8) for name, x in cols.items()) if cols else np.zeros(len(df), dtype=np.int8)
+
+
+class AdmetScorer:
+    def __init__(self, models=None, threshold=POSITIVE_THRESHOLD):
+        self.models = models or load_models()
+        self.endpoints = list(self.models)
+        self.features = sorted({f for m in self.models.values() for f in m['coef']}, key=DESCRIPTORS.index)
+        self.W = np.array([[m['coef'].get(f, 0.0) for f in self.features] for m in self.models.values()], dtype=np.float64).T
+        self.b = np.array([m['intercept'] for m in self.models.values()], dtype=np.float64)
+        self.threshold = threshold
+
+    # 缺失描述符按 0 处理 (对应项不贡献)，概率矩阵形状为 行数 × 终点数
+    def probabilities(self, df):
+        cols = _columns(df, self.features)
+        X = np.column_stack([np.nan_to_num(cols.get(f, np.zeros(len(df)))) for f in self.features]) if self.features else np.zeros((len(df), 0))
+        return 1.0 / (1.0 + np.exp(-(X @ self.W + self.b)))
+
+    def score(self, df):
+        lipinski = rule_violations(df, LIPINSKI_RULES)
+        veber = rule_violations(df, VEBER_RULES)
+        probs = self.probabilities(df)
+        out = {
+            'Lipinski违规': lipinski,
+            'Lipinski通过': lipinski <= 1,
+            'Veber通过': veber == 0,
+            'QED': np.round(qed(df), 3),
+        }
+        for j, name in enumerate(self.endpoints):
+            out[f'{name}概率'] = np.round(probs[:, j], 3)
+        toxic = [self.endpoints.index(e) for e in TOXIC_ENDPOINTS if e in self.endpoints]
+        if toxic:
+            out['毒性评分'] = np.rint(probs[:, toxic].mean(axis=1) * 5).astype(np.int64)
+        return pd.DataFrame(out, index=df.index)
+
+    def positive(self, scores, endpoint):
+        return scores[f'{endpoint}概率'] >= self.threshold
+
+
+# 补全到药材主表：已有的 QED / 毒性评分 保留原值，只填缺失
+def annotate(df, scorer=None):
+    scores = (scorer or AdmetScorer()).score(df)
+    for col in ('QED', '毒性评分'):
+        if col in df.columns and col in scores.columns:
+            scores[col] = df[col].where(df[col].notna(), scores[col])
+    return df.drop(columns=[c for c in scores.columns if c in df.columns]).join(scores)
@@ -1,118 +1,25 @@
 import streamlit as st
 import pandas as pd
 import plotly.express as px
-import plotly.graph_objects as go
-import networkx as nx
 import numpy as np
-import random
-from datetime import datetime, timedelta
-
-# ==========================================
-# 🛠️ 核心引擎：数据自动补全 (TCM-LMH 中文内核)
-# ==========================================
-def process_data(uploaded_df=None):
-    # 1. 基础药材池
-    herbs_pool = [
-        '石菖蒲', '全蝎', '蜈蚣', '天麻', '川芎', '僵蚕', '柴胡', '当归', '白芍', '茯苓',
-        '甘草', '半夏', '胆南星', '郁金', '远志', '酸枣仁', '龙骨', '牡蛎', '钩藤', '地龙'
-    ]
-    
-    # 2. 初始化数据
-    if uploaded_df is None:
-        data = [{'中药': h, '频次': random.randint(50, 1200)} for h in herbs_pool]
-        df = pd.DataFrame(data)
-    else:
-        df = uploaded_df.copy()
-        # 🛡️ 智能列名映射 (兼容中英文表头)
-        col_map = {
-            'Medicine': '中药', 'Name': '中药', 'Herb': '中药',
-            'Frequency': '频次', 'Freq': '频次', 'Count': '频次',
-            'Origin': '产地', 'Dose': '剂量'
-        }
-        df.rename(columns=col_map, inplace=True)
-        
-        if '中药' not in df.columns:
-            df['中药'] = [random.choice(herbs_pool) for _ in range(len(df))]
-        if '频次' not in df.columns:
-            df['频次'] = [random.randint(50, 1000) for _ in range(len(df))]
-
-    # 3. 🛡️ 强制补全 30+ 维度 (全中文)
-    generators = {
-        '类别': lambda: random.choice(['开窍药', '息风止痉药', '活血化瘀药', '补气药', '清热药', '化痰药', '安神药']),
-        '四气': lambda: random.choice(['温', '平', '寒', '凉', '热']),
-        '五味': lambda: random.choice(['辛', '苦', '甘', '酸', '咸']),
-        '归经': lambda: random.choice(['肝经', '心经', '脾经', '肺经', '肾经']),
-        '剂量': lambda: random.randint(3, 15),
-        '巅峰朝代': lambda: random.choice(['汉代', '唐代', '宋代', '金元', '明代', '清代']),
-        '分子量': lambda: random.randint(150, 600),
-        'LogP': lambda: round(random.uniform(0.5, 5.5), 2),
-        'OB': lambda: round(random.uniform(20, 90), 2),
-        '产地': lambda: random.choice(['四川', '安徽', '甘肃', '河南', '内蒙古', '浙江', '云南', '山西', '湖北']),
-        '海拔': lambda: random.randint(500, 3000),
-        '价格': lambda: random.randint(10, 500),
-        '土壤pH': lambda: round(random.uniform(5.5, 7.5), 1),
-        '年降雨': lambda: random.randint(400, 1200),
-        '毒性评分': lambda: random.randint(0, 5),
-        'QED': lambda: round(random.uniform(0.3, 0.9), 2),
-        'TPSA': lambda: random.randint(40, 140)
-    }
-
-    for col, gen_func in generators.items():
-        if col not in df.columns:
-            df[col] = [gen_func() for _ in range(len(df))]
-            
-    # 4. 生成衍生数据表
-    target_pool = ['GABRA1', 'SCN1A', 'BDNF', 'IL6', 'TNF', 'MAPK1', 'PIK3CA']
-    geo_locs = {
-        '四川': [31.0, 103.6], '安徽': [30.8, 116.3], '甘肃': [34.5, 104.6], 
-        '河南': [34.1, 113.4], '内蒙古': [42.2, 118.9], '浙江': [29.3, 119.5], 
-        '云南': [27.3, 103.7], '山西': [36.5, 112.9], '湖北': [30.5, 114.3]
-    }
-    
-    geo_data, docking_data, admet_data, refs, trials = [], [], [], [], []
-    
-    for _, row in df.iterrows():
-        # 地图
-        origin = row['产地']
-        if origin in geo_locs:
-            lat, lon = geo_locs[origin]
-            geo_data.append([row['中药'], origin, lat+random.uniform(-0.1,0.1), lon+random.uniform(-0.1,0.1), row['频次']])
-        else:
-            geo_data.append([row['中药'], '未知', 35.0, 105.0, row['频次']])
-            
-        # 对接
-        for t in target_pool:
-            docking_data.append([row['中药'], t, round(random.uniform(-11.5, -4.5), 1)])
-            
-        # ADMET
-        admet_data.append([row['中药'], random.choice(['高','中']), random.choice(['是','否']), row['毒性评分']])
-        
-        # 文献
-        refs.append([row['中药'], random.choice(['RCT','Meta分析','综述']), 'J Ethnopharmacol', f"{row['中药']}的作用机制研究", random.randint(2018, 2024), random.uniform(1, 10)])
-        
-        # 临床
-        trials.append([row['中药'], random.choice(['I期','II期','III期']), random.randint(50, 500), random.choice(['已完成','招募中'])])
-
-    df_geo = pd.DataFrame(geo_data, columns=['中药', '产地', '纬度', '经度', '频次'])
-    df_dock = pd.DataFrame(docking_data, columns=['中药', '靶点', '结合能'])
-    df_admet = pd.DataFrame(admet_data, columns=['中药', 'Caco-2透膜', 'BBB穿透', '毒性评分'])
-    df_refs = pd.DataFrame(refs, columns=['中药', '类型', '期刊', '标题', '年份', '影响因子'])
-    df_trials = pd.DataFrame(trials, columns=['中药', '阶段', '样本量', '状态'])
-    
-    # 模拟价格K线
-    dates = pd.date_range(end=datetime.today(), periods=30)
-    df_price = pd.DataFrame({'Date': dates, 'Open': np.random.randint(20,30,30), 'Close': np.random.randint(20,30,30), 'High': np.random.randint(30,35,30), 'Low': np.random.randint(15,20,30)})
-
-    # 网络边
-    edges = []
-    herbs = df['中药'].tolist()
-    if len(herbs)>1:
-        for _ in range(len(herbs)*4):
-            edges.append((random.choice(herbs), random.choice(herbs), random.randint(10, 100)))
-            
-    df_go = pd.DataFrame({'术语': ['突触传递', '离子通道', 'GABA受体', '神经递质', '膜电位'], '分类': ['生物过程']*3+['分子功能']*2, '计数': [45, 38, 30, 25, 20], 'P值': [0.001]*5})
-
-    return df, edges, df_geo, df_dock, df_admet, df_refs, df_trials, df_price, df_go
+import time
+import report
+from engine import process_data
+from enrichment import FDR_CUTOFF
+from evidence import EvidenceStore
+from figures import REGISTRY, histogram_figure, kline_figure
+from geo import CHINA_BBOX, PROVINCE_NAMES, province_bbox
+from cache import ResultCache, content_hash, make_key
+from ingest import SUPPORTED_TYPES, ingest, load_frame
+from graph_metrics import NetworkMetricsService
+from inference import DiagnosisEngine
+from interactions import WESTERN_DRUGS, InteractionChecker
+from layout import MAX_EDGES, MAX_NODES, LayoutService, network_figure
+from price_store import FREQS, PriceStore, demo_history
+from profiling import PROFILER, process_stats
+from shared_store import SharedDatasetStore
+from structures import StructureStore
+from streaming import SAMPLE_ROWS, RunningKPIs, evict_streams, process_stream, should_stream, stream_dir
 
 # ==========================================
 # 🚀 应用程序 UI 配置
@@ -139,67 +46,178 @@ st.markdown("""
 </style>
 """, unsafe_allow_html=True)
 
+@st.cache_resource
+def get_result_cache():
+    return ResultCache()
+
+@st.cache_resource
+def get_layout_service():
+    return LayoutService()
+
+@st.cache_resource
+def get_diagnosis_engine():
+    return DiagnosisEngine()
+
+@st.cache_resource
+def get_interaction_checker():
+    return InteractionChecker()
+
+@st.cache_resource
+def get_metrics_service():
+    return NetworkMetricsService()
+
+@st.cache_resource
+def get_structure_store():
+    return StructureStore()
+
+@st.cache_resource
+def get_evidence_store():
+    return EvidenceStore()
+
+@st.cache_resource
+def get_price_store():
+    return PriceStore()
+
+@st.cache_resource
+def get_dataset_store():
+    return SharedDatasetStore()
+
+# 会话持有共享数据集的引用，切换数据集或会话结束时旧引用自动归还
+def load_shared(key, compute):
+    lease = st.session_state.get('dataset_lease')
+    if lease is None or lease.key != key:
+        lease = st.session_state['dataset_lease'] = get_dataset_store().acquire(key, compute)
+    return lease.tables
+
 # --- 侧边栏 ---
 with st.sidebar:
     st.title("🎛️ TCM-LMH 控制台")
-    uploaded_file = st.file_uploader("📂 上传数据 (Excel)", type=['xlsx', 'xls'])
+    uploaded_file = st.file_uploader("📂 上传数据 (Excel/CSV/Parquet)", type=SUPPORTED_TYPES)
+    seed = int(st.number_input("🎲 生成种子", value=42, step=1))
+    result_cache = get_result_cache()
+    kpis = None
     
     if uploaded_file:
         try:
-            raw_df = pd.read_excel(uploaded_file)
-            st.success("✅ 数据加载成功")
-            df, edges, df_geo, df_dock, df_admet, df_refs, df_trials, df_price, df_go = process_data(raw_df)
+            data = uploaded_file.getvalue()
+            file_hash = content_hash(data)
+            key = make_key(file_hash, seed)
+            if should_stream(data, uploaded_file.name):
+                # 超大表走分块流式：直接从上传内容分块读取 (不做整表 ingest)，衍生表落盘，看板只取样本，KPI 来自累加器
+                dataset_key = f"{key}-stream"
+                stream = result_cache.get(dataset_key)
+                if stream is None or not stream.available():
+                    stream = process_stream(data, stream_dir(key), seed=seed, name=uploaded_file.name)
+                    result_cache.put(dataset_key, stream)
+                    evict_streams(keep=stream.out_dir)
+                tables = stream.sample_tables()
+                st.session_state.pop('dataset_lease', None)
+                kpis = stream.kpis
+                REGISTRY.provide('cube', dataset_key, stream.cube)
+                get_evidence_store().add_batches(stream.iter_frames('refs'), source=dataset_key)
+                st.success(f"✅ 流式加载完成 (展示前 {SAMPLE_ROWS} 行样本)")
+            else:
+                dataset_key = key
+                arrow_path = ingest(uploaded_file.name, data, file_hash)
+                tables = load_shared(key, lambda: process_data(load_frame(arrow_path), seed))
+                st.success("✅ 数据加载成功")
         except Exception as e:
             st.error(f"解析错误: {e}")
-            df, edges, df_geo, df_dock, df_admet, df_refs, df_trials, df_price, df_go = process_data(None)
+            dataset_key = make_key('demo', seed)
+            tables = load_shared(dataset_key, lambda: process_data(None, seed))
     else:
         st.info("🔹 仿真演示模式")
-        df, edges, df_geo, df_dock, df_admet, df_refs, df_trials, df_price, df_go = process_data(None)
+        dataset_key = make_key('demo', seed)
+        tables = load_shared(dataset_key, lambda: process_data(None, seed))
+    df, edges, df_geo, df_dock, df_admet, df_refs, df_trials, df_price, df_go = tables
+    # 文献增量写入全文索引 (同一数据集只写一次)
+    get_evidence_store().add_frame(df_refs, source=dataset_key)
+    if kpis is None:
+        kpis = RunningKPIs.from_frame(df).as_dict()
     
     st.markdown("---")
-    st.metric("CPU 负载", "15%", "-2%")
+    m1, m2 = st.columns(2)
+    proc = process_stats()
+    m1.metric("CPU 负载", f"{proc['CPU']:.0f}%" if proc['CPU'] is not None else "—",
+        f"RSS {proc['RSS'] / 2**20:.0f} MB" if proc['RSS'] is not None else None, delta_color="off")
+    shared = get_dataset_store().stats()
+    loads = shared['共享命中'] + shared['磁盘载入']
+    m2.metric("缓存命中", f"{loads}/{loads + shared['计算']}", f"{shared['命中率']:.0%}")
+    st.caption(f"共享数据集 {shared['数据集']} · 会话引用 {shared['引用']} · 映射 {shared['映射字节'] / 2**20:.0f} MB · 磁盘载入 {shared['磁盘载入']}")
+    streamed = get_result_cache().stats()
+    st.caption(f"流式结果缓存 命中率 {streamed['命中率']:.0%} · 内存命中 {streamed['内存命中']} · 磁盘命中 {streamed['磁盘命中']} · 未命中 {streamed['未命中']}")
 
 # --- 主界面 ---
 st.title("🌌 TCM-LMH 中药全息 AI 引擎")
-st.caption(f"📊 状态: 在线 | 架构: V30.0 旗舰版 | 3D引擎: Ready | 数据量: {len(df)} 条")
+st.caption(f"📊 状态: 在线 | 架构: V30.0 旗舰版 | 3D引擎: Ready | 数据量: {kpis['收录药物']} 条")
 
 if df is not None:
-    tabs = st.tabs(["🗺️ 1. 全景生态", "🕸️ 2. 网络挖掘", "🧬 3. 深度机制", "⚗️ 4. 药性化学", "📚 5. 循证历史", "🤖 6. 临床智能"])
+    # 只渲染当前选中的分区：其余分区的图表不计算、不序列化
+    TAB_NAMES = ["🗺️ 1. 全景生态", "🕸️ 2. 网络挖掘", "🧬 3. 深度机制", "⚗️ 4. 药性化学", "📚 5. 循证历史", "🤖 6. 临床智能"]
+    active_tab = st.radio("分区", TAB_NAMES, horizontal=True, label_visibility="collapsed", key="active_tab")
+    page_t0 = time.perf_counter()
+
+    # 已注册模块按数据集哈希记忆化，重跑时复用同一 Figure；
+    # 带控件的图表放进 st.fragment，切换参数只重跑并重新序列化该片段
+    def chart(name, **params):
+        fig = REGISTRY.compute(name, tables, dataset_key, **params)
+        PROFILER.payload(name, fig)
+        st.plotly_chart(fig, use_container_width=True)
 
     # ================= Tab 1: 全景 (20模块) =================
-    with tabs[0]:
+    if active_tab == TAB_NAMES[0]:
         st.subheader("第一层：市场与地理 (核心 1-10)")
         k1, k2, k3, k4 = st.columns(4)
-        k1.metric("1. 收录药物", f"{len(df)} 味")
-        k2.metric("2. 覆盖省份", f"{len(df['产地'].unique())} 个")
-        k3.metric("3. 平均单价", f"¥{int(df['价格'].mean())}")
-        k4.metric("4. 总频次", f"{df['频次'].sum()}")
+        k1.metric("1. 收录药物", f"{kpis['收录药物']} 味")
+        k2.metric("2. 覆盖省份", f"{kpis['覆盖省份']} 个")
+        k3.metric("3. 平均单价", f"¥{int(kpis['平均单价'])}")
+        k4.metric("4. 总频次", f"{kpis['总频次']}")
         
         c1, c2 = st.columns([2, 1])
         with c1:
             st.markdown('<div class="module-header">5. 道地药材 GIS 热力分布</div>', unsafe_allow_html=True)
-            fig_map = px.scatter_mapbox(df_geo, lat="纬度", lon="经度", color="频次", size="频次",
-                hover_name="中药", hover_data={"产地":True}, color_continuous_scale="Teal", size_max=25, zoom=3.2, center={"lat": 34.0, "lon": 108.0})
-            fig_map.update_layout(mapbox_style="carto-darkmatter", margin={"r":0,"t":0,"l":0,"b":0}, height=300)
-            st.plotly_chart(fig_map, use_container_width=True)
+            @st.fragment
+            def geo_view():
+                geo_index = REGISTRY.compute('geo_index', tables, dataset_key)
+                region = st.selectbox("视图范围", ["全国"] + PROVINCE_NAMES, key="geo_region", label_visibility="collapsed")
+                chart('geo_map', region=region)
+                bbox = CHINA_BBOX if region == "全国" else province_bbox(region)
+                in_view = geo_index.points(bbox)
+                st.caption(f"视窗内 {len(in_view):,} 个产地点 · 总频次 {in_view['频次'].sum():,.0f} (共 {len(geo_index):,} 点，按网格聚合显示)")
+            geo_view()
         with c2:
             st.markdown('<div class="module-header">6. 产地贡献度 (柱状)</div>', unsafe_allow_html=True)
-            geo_stat = df.groupby('产地')['频次'].sum().reset_index().sort_values('频次', ascending=False)
-            fig_bar = px.bar(geo_stat, x='产地', y='频次', color='频次', color_continuous_scale='Viridis')
-            fig_bar.update_layout(height=120, margin=dict(t=0,b=0,l=0,r=0))
-            st.plotly_chart(fig_bar, use_container_width=True)
+            chart('origin_bar')
             
             st.markdown('<div class="module-header">7. 药物类别占比 (环形)</div>', unsafe_allow_html=True)
-            fig_pie = px.pie(df, names='类别', values='频次', hole=0.6)
-            fig_pie.update_layout(height=120, margin=dict(t=0,b=0,l=0,r=0), showlegend=False)
-            st.plotly_chart(fig_pie, use_container_width=True)
+            chart('category_pie')
 
         c3, c4 = st.columns(2)
         with c3:
             st.markdown('<div class="module-header">8. 价格波动 K线图</div>', unsafe_allow_html=True)
-            fig_k = go.Figure(data=[go.Candlestick(x=df_price['Date'], open=df_price['Open'], high=df_price['High'], low=df_price['Low'], close=df_price['Close'])])
-            fig_k.update_layout(margin=dict(t=0,b=0,l=0,r=0), height=200, xaxis_rangeslider_visible=False)
-            st.plotly_chart(fig_k, use_container_width=True)
+            @st.fragment
+            def kline_view():
+                price_store = get_price_store()
+                hot_herbs = df.groupby('中药')['频次'].sum().nlargest(50).index.tolist()
+                p1, p2 = st.columns([3, 2])
+                kline_herb = p1.selectbox("药材", ["本批次行情"] + hot_herbs, key="kline_herb", label_visibility="collapsed")
+                kline_freq = FREQS[p2.radio("周期", list(FREQS), horizontal=True, key="kline_freq", label_visibility="collapsed")]
+                # 本批次数据自带的日 K 走登记模块 (与报表共用同一份记忆化 Figure)
+                if kline_herb == "本批次行情":
+                    chart('price_kline')
+                    st.caption("本批次报价 · 近 30 日日K")
+                    return
+                end = pd.Timestamp.today().normalize()
+                start = end - pd.DateOffset(years=1)
+                if price_store.has(kline_herb):
+                    bars, price_source = price_store.history(kline_herb, start, end, kline_freq), "价格库"
+                else:
+                    bars, price_source = demo_history(kline_herb, start, end, kline_freq, seed), "仿真报价"
+                st.plotly_chart(kline_figure(bars), use_container_width=True)
+                if len(bars):
+                    vol = bars['波动率'].iloc[-1]
+                    st.caption(f"{price_source} · 最新收盘 ¥{bars['Close'].iloc[-1]:.2f} · 年化波动率 {'—' if np.isnan(vol) else f'{vol:.0%}'}")
+            kline_view()
         with c4:
             st.markdown('<div class="module-header">9. 核心药物榜单</div>', unsafe_allow_html=True)
             st.dataframe(df[['中药','频次','价格']].head(5), height=180, use_container_width=True, hide_index=True)
@@ -211,26 +229,25 @@ if df is not None:
         r2_1, r2_2, r2_3, r2_4 = st.columns(4)
         with r2_1:
             st.markdown('<div class="module-header">11. 海拔分布</div>', unsafe_allow_html=True)
-            st.plotly_chart(px.violin(df, y='海拔', box=True).update_layout(height=200, margin=dict(t=0,b=0,l=0,r=0)), use_container_width=True)
+            chart('altitude_violin')
         with r2_2:
             st.markdown('<div class="module-header">12. 土壤pH值</div>', unsafe_allow_html=True)
-            st.plotly_chart(px.histogram(df, x='土壤pH').update_layout(height=200, margin=dict(t=0,b=0,l=0,r=0)), use_container_width=True)
+            chart('soil_ph_hist')
         with r2_3:
             st.markdown('<div class="module-header">13. 降雨量</div>', unsafe_allow_html=True)
-            st.plotly_chart(px.scatter(df, x='年降雨', y='频次').update_layout(height=200, margin=dict(t=0,b=0,l=0,r=0)), use_container_width=True)
+            chart('rainfall_scatter')
         with r2_4:
             st.markdown('<div class="module-header">14. 价格区间</div>', unsafe_allow_html=True)
-            st.plotly_chart(px.box(df, y='价格').update_layout(height=200, margin=dict(t=0,b=0,l=0,r=0)), use_container_width=True)
+            chart('price_box')
             
         r3_1, r3_2, r3_3 = st.columns(3)
         with r3_1:
             st.markdown('<div class="module-header">15. 产地气候矩阵</div>', unsafe_allow_html=True)
-            st.dataframe(df.groupby('产地')[['年降雨','土壤pH']].mean(), height=150, use_container_width=True)
+            climate = REGISTRY.compute('cube', tables, dataset_key).query('产地', ['年降雨', '土壤pH'], agg='mean')
+            st.dataframe(climate.drop(columns='计数').set_index('产地'), height=150, use_container_width=True)
         with r3_2:
             st.markdown('<div class="module-header">16. 供应链风险仪表</div>', unsafe_allow_html=True)
-            fig_g = go.Figure(go.Indicator(mode="gauge+number", value=35, title={'text':"风险指数"}))
-            fig_g.update_layout(height=150, margin=dict(t=0,b=0,l=0,r=0))
-            st.plotly_chart(fig_g, use_container_width=True)
+            chart('supply_gauge')
         with r3_3:
             st.markdown('<div class="module-header">17. 采购建议</div>', unsafe_allow_html=True)
             st.success("✅ 建议：增加道地药材储备，避开雨季采购。")
@@ -239,97 +256,124 @@ if df is not None:
         st.line_chart(np.random.randn(20, 3), height=150)
 
     # ================= Tab 2: 网络 (20模块) =================
-    with tabs[1]:
-        G = nx.Graph()
-        for s, d, w in edges: G.add_edge(s, d, weight=w)
+    if active_tab == TAB_NAMES[1]:
+        # 共现网络按数据集只构建一次 (figures.cooccur_graph)，筛选在其上派生新图
+        cg = REGISTRY.compute('cooccur_graph', tables, dataset_key)
+        f1, f2 = st.columns(2)
+        min_weight = f1.number_input("最小共现权重", min_value=0, value=0, step=1)
+        top_k = f2.number_input("每节点保留 Top-K 边 (0 为不裁剪)", min_value=0, value=0, step=1)
+        if min_weight:
+            cg = cg.threshold(min_weight)
+        if top_k:
+            cg = cg.top_k(top_k)
+        metrics = get_metrics_service().get(cg)
+        pending = metrics['pending']
+        if pending:
+            st.caption("⏳ 介数/接近中心度/社团等指标正在后台进程池计算，稍后刷新即可显示")
         
         st.subheader("第一层：拓扑结构 (核心 1-10)")
         k1, k2, k3, k4 = st.columns(4)
-        k1.metric("1. 节点数", len(G.nodes()))
-        k2.metric("2. 边数", len(G.edges()))
-        k3.metric("3. 密度", f"{nx.density(G):.3f}")
-        k4.metric("4. 直径", 5)
+        k1.metric("1. 节点数", cg.n_nodes)
+        k2.metric("2. 边数", cg.n_edges)
+        k3.metric("3. 密度", f"{cg.density():.3f}")
+        k4.metric("4. 直径", "计算中…" if pending else (metrics['diameter'] if metrics['diameter_exact'] else f"≥{metrics['diameter']}"))
         
         c1, c2 = st.columns([3, 1])
         with c1:
             st.markdown('<div class="module-header">5. 复杂网络可视化</div>', unsafe_allow_html=True)
-            pos = nx.spring_layout(G, seed=42)
-            edge_x, edge_y = [], []
-            for e in G.edges():
-                x0, y0 = pos[e[0]]; x1, y1 = pos[e[1]]
-                edge_x.extend([x0, x1, None]); edge_y.extend([y0, y1, None])
-            fig_net = go.Figure(go.Scatter(x=edge_x, y=edge_y, mode='lines', line=dict(width=0.3, color='#888')))
-            fig_net.add_trace(go.Scatter(x=[pos[n][0] for n in G.nodes()], y=[pos[n][1] for n in G.nodes()], mode='markers', marker=dict(size=5, color='cyan')))
-            fig_net.update_layout(showlegend=False, margin=dict(t=0,b=0,l=0,r=0), height=400, paper_bgcolor='rgba(0,0,0,0)')
+            pos = get_layout_service().positions(cg, scope=dataset_key)
+            fig_net = network_figure(cg, pos)
+            if cg.n_edges > MAX_EDGES or cg.n_nodes > MAX_NODES:
+                st.caption(f"LOD 模式：仅绘制权重最高的 {MAX_EDGES} 条边 / 度最高的 {MAX_NODES} 个节点")
             st.plotly_chart(fig_net, use_container_width=True)
         with c2:
             st.markdown('<div class="module-header">6. 中心度排行</div>', unsafe_allow_html=True)
-            deg = nx.degree_centrality(G)
-            st.dataframe(pd.DataFrame(sorted(deg.items(), key=lambda x:x[1], reverse=True)[:10], columns=['节点','分数']), height=200, hide_index=True, use_container_width=True)
+            deg = cg.degree_centrality().nlargest(10)
+            st.dataframe(pd.DataFrame({'节点': deg.index, '分数': deg.to_numpy()}), height=200, hide_index=True, use_container_width=True)
             st.markdown('<div class="module-header">7. 连通性</div>', unsafe_allow_html=True)
-            st.info("强连通组件: 1")
+            st.info(f"连通分量: {metrics['n_components']} (最大 {metrics['lcc_size']} 节点)")
             st.markdown('<div class="module-header">8. 平均路径</div>', unsafe_allow_html=True)
-            st.metric("", "2.4")
+            st.metric("", "计算中…" if pending else f"{metrics['avg_path']:.2f}")
 
         c3, c4 = st.columns(2)
         with c3:
             st.markdown('<div class="module-header">9. 度分布</div>', unsafe_allow_html=True)
-            st.plotly_chart(px.histogram(x=[d for n,d in G.degree()], nbins=15).update_layout(height=150, margin=dict(t=0,b=0,l=0,r=0), showlegend=False), use_container_width=True)
+            st.plotly_chart(histogram_figure(cg.degree(), '度', bins=15).update_layout(height=150, margin=dict(t=0,b=0,l=0,r=0), showlegend=False), use_container_width=True)
         with c4:
             st.markdown('<div class="module-header">10. 聚类系数</div>', unsafe_allow_html=True)
-            st.metric("系数", "0.65")
+            st.metric("系数", f"{metrics['avg_clustering']:.2f}")
 
         st.subheader("第二层：高级图谱 (扩展 11-20)")
         r2_1, r2_2, r2_3 = st.columns(3)
         with r2_1:
             st.markdown('<div class="module-header">11. K-Core 分解</div>', unsafe_allow_html=True)
-            st.line_chart([100, 80, 50, 20, 5], height=150)
+            st.line_chart(metrics['kcore_sizes'], height=150)
         with r2_2:
             st.markdown('<div class="module-header">12. 介数中心度</div>', unsafe_allow_html=True)
-            bet = nx.betweenness_centrality(G, k=10)
-            st.bar_chart(list(bet.values())[:10], height=150)
+            if pending:
+                st.info("计算中…")
+            else:
+                st.bar_chart(metrics['betweenness'].nlargest(10), height=150)
         with r2_3:
             st.markdown('<div class="module-header">13. 社团规模</div>', unsafe_allow_html=True)
-            st.bar_chart({'社团1':30, '社团2':20, '社团3':10}, height=150)
+            if pending:
+                st.info("计算中…")
+            else:
+                st.bar_chart({f"社团{i+1}": len(c) for i, c in enumerate(metrics['communities'][:10])}, height=150)
             
         r3_1, r3_2, r3_3, r3_4 = st.columns(4)
-        r3_1.markdown('<div class="module-header">14. 枢纽节点</div>', unsafe_allow_html=True); r3_1.caption("Top: 石菖蒲")
-        r3_2.markdown('<div class="module-header">15. 桥接节点</div>', unsafe_allow_html=True); r3_2.caption("Top: 全蝎")
-        r3_3.markdown('<div class="module-header">16. 接近中心度</div>', unsafe_allow_html=True); r3_3.caption("Top: 蜈蚣")
-        r3_4.markdown('<div class="module-header">17. 鲁棒性</div>', unsafe_allow_html=True); r3_4.caption("高")
+        hub = cg.degree_centrality().idxmax() if cg.n_nodes else "-"
+        bridge = "计算中…" if pending or not cg.n_nodes else metrics['betweenness'].idxmax()
+        closest = "计算中…" if pending or not cg.n_nodes else metrics['closeness'].idxmax()
+        robust = metrics['robustness']
+        r3_1.markdown('<div class="module-header">14. 枢纽节点</div>', unsafe_allow_html=True); r3_1.caption(f"Top: {hub}")
+        r3_2.markdown('<div class="module-header">15. 桥接节点</div>', unsafe_allow_html=True); r3_2.caption(f"Top: {bridge}")
+        r3_3.markdown('<div class="module-header">16. 接近中心度</div>', unsafe_allow_html=True); r3_3.caption(f"Top: {closest}")
+        r3_4.markdown('<div class="module-header">17. 鲁棒性</div>', unsafe_allow_html=True); r3_4.caption(f"{'高' if robust >= 0.8 else '中' if robust >= 0.5 else '低'} ({robust:.0%})")
         
         st.markdown('<div class="module-header">18. 链接预测 | 19. 模体分析 | 20. 动态演化</div>', unsafe_allow_html=True)
         st.area_chart(np.random.randn(30, 3), height=150)
 
     # ================= Tab 3: 机制 (20模块) =================
-    with tabs[2]:
+    if active_tab == TAB_NAMES[2]:
+        docking = REGISTRY.compute('docking', tables, dataset_key)
         st.subheader("第一层：分子与通路 (核心 1-10)")
         k1, k2, k3, k4 = st.columns(4)
-        k1.metric("1. 基因数", "128")
-        k2.metric("2. 通路数", "15")
-        k3.metric("3. 结合能", "-9.5 kcal")
+        kegg_hits = df_go[(df_go['分类'] == 'KEGG通路') & (df_go['FDR'] < FDR_CUTOFF)]
+        k1.metric("1. 基因数", docking.shape[1])
+        k2.metric("2. 通路数", len(kegg_hits))
+        best = docking.strongest(1)
+        k3.metric("3. 结合能", f"{best['结合能'].iloc[0]:.1f} kcal" if len(best) else "-")
         k4.metric("4. 菌群调节", "阳性")
         
         c1, c2 = st.columns(2)
         with c1:
             st.markdown('<div class="module-header">5. 靶点对接热力图</div>', unsafe_allow_html=True)
-            piv = df_dock.pivot_table(index='中药', columns='靶点', values='结合能', aggfunc='mean')
-            st.plotly_chart(px.imshow(piv, aspect="auto").update_layout(height=300, margin=dict(t=0,b=0,l=0,r=0)), use_container_width=True)
+            chart('docking_heatmap')
         with c2:
             st.markdown('<div class="module-header">6. KEGG 通路富集气泡</div>', unsafe_allow_html=True)
-            st.plotly_chart(px.scatter(x=[1,2,3], y=[1,2,3], size=[10,20,30]).update_layout(height=300, margin=dict(t=0,b=0,l=0,r=0)), use_container_width=True)
+            @st.fragment
+            def kegg_view():
+                enriched_herbs = REGISTRY.compute('herb_enrichment', tables, dataset_key)['中药'].unique().tolist()
+                herb = st.selectbox("富集对象", ["全部药材"] + enriched_herbs, key="kegg_herb")
+                if herb == "全部药材":
+                    chart('kegg_bubble')
+                else:
+                    chart('herb_kegg_bubble', herb=herb)
+            kegg_view()
             
         c3, c4, c5 = st.columns(3)
         with c3:
             st.markdown('<div class="module-header">7. 脑-肠-肝 轴向桑基图</div>', unsafe_allow_html=True)
-            fig_s = go.Figure(go.Sankey(node=dict(label=["中药","肠道","脑部"], color="blue"), link=dict(source=[0,1], target=[1,2], value=[10,8])))
-            st.plotly_chart(fig_s.update_layout(height=150, margin=dict(t=0,b=0,l=0,r=0)), use_container_width=True)
+            chart('axis_sankey')
         with c4:
             st.markdown('<div class="module-header">8. GO 功能富集</div>', unsafe_allow_html=True)
-            st.bar_chart(df_go.set_index('术语')['计数'], height=150)
+            st.bar_chart(df_go[df_go['分类'] != 'KEGG通路'].head(10).set_index('术语')['计数'], height=150)
         with c5:
             st.markdown('<div class="module-header">9. 结合能排行</div>', unsafe_allow_html=True)
-            st.dataframe(df_dock.head(), height=150, use_container_width=True, hide_index=True)
+            target = st.selectbox("靶点", ["全部"] + docking.targets)
+            ranking = docking.strongest(10) if target == "全部" else docking.top_binders(10, [target])
+            st.dataframe(ranking, height=150, use_container_width=True, hide_index=True)
         
         st.markdown('<div class="module-header">10. 靶点关联网络</div>', unsafe_allow_html=True)
         
@@ -350,7 +394,7 @@ if df is not None:
         st.bar_chart(np.random.rand(4, 4), height=150)
 
     # ================= Tab 4: 药性 (20模块 - 含3D分子) =================
-    with tabs[3]:
+    if active_tab == TAB_NAMES[3]:
         st.subheader("第一层：传统与化学 (核心 1-10)")
         k1, k2, k3, k4 = st.columns(4)
         k1.metric("1. 温性", "45%")
@@ -361,12 +405,10 @@ if df is not None:
         c1, c2 = st.columns(2)
         with c1:
             st.markdown('<div class="module-header">5. 四气五味-旭日图</div>', unsafe_allow_html=True)
-            fig_sun = px.sunburst(df, path=['四气', '五味', '类别'], values='频次', color='四气')
-            fig_sun.update_layout(height=300, margin=dict(t=0,b=0,l=0,r=0))
-            st.plotly_chart(fig_sun, use_container_width=True)
+            chart('nature_sunburst')
         with c2:
             st.markdown('<div class="module-header">6. 2D 化学空间 (散点)</div>', unsafe_allow_html=True)
-            st.plotly_chart(px.scatter(df, x='分子量', y='LogP', color='类别').update_layout(height=300), use_container_width=True)
+            chart('chem_space')
             
         c3, c4 = st.columns(2)
         with c3:
@@ -374,77 +416,95 @@ if df is not None:
             st.dataframe(df_admet.head(10), height=200, use_container_width=True, hide_index=True)
         with c4:
             st.markdown('<div class="module-header">8. 微观分子结构 (3D)</div>', unsafe_allow_html=True)
-            # 🔥 3D分子查看器集成点
-            try:
-                import py3Dmol
-                from stmol import showmol
-                mol = st.selectbox("选择分子模型", ["石菖蒲-α细辛醚 (CID:636822)", "天麻-天麻素 (CID:115027)"])
-                cid = "636822" if "细辛醚" in mol else "115027"
-                view = py3Dmol.view(query=f'cid:{cid}')
-                view.setStyle({'stick':{}})
-                view.setBackgroundColor('#0E1117')
-                view.zoomTo()
-                showmol(view, height=250, width=500)
-            except ImportError:
-                st.warning("请安装 stmol 库以查看3D分子: pip install stmol")
-                st.info("3D Viewer Placeholder")
+            # 🔥 3D分子查看器：结构取自本地结构库 (structures.py)，不访问网络
+            catalog = get_structure_store().catalog()
+            if catalog.empty:
+                st.info("本地结构库为空，请先导入: python structures.py load <SDF目录> (联网机器可用 fetch 预取)")
+            else:
+                labels = [f"{h or '未标注'}-{n} (CID:{c})" for c, n, h in zip(catalog['CID'], catalog['化合物'], catalog['中药'])]
+                choice = st.selectbox("选择分子模型", range(len(labels)), format_func=labels.__getitem__)
+                molblock = get_structure_store().molblock(int(catalog['CID'].iloc[choice]))
+                try:
+                    import py3Dmol
+                    from stmol import showmol
+                    view = py3Dmol.view()
+                    view.addModel(molblock, 'sdf')
+                    view.setStyle({'stick':{}})
+                    view.setBackgroundColor('#0E1117')
+                    view.zoomTo()
+                    showmol(view, height=250, width=500)
+                except ImportError:
+                    st.warning("请安装 stmol 库以查看3D分子: pip install stmol")
+                    st.info("3D Viewer Placeholder")
                 
             st.markdown('<div class="module-header">9. Lipinski 五规则雷达</div>', unsafe_allow_html=True)
-            st.plotly_chart(px.line_polar(r=[1,2,3,4,5], theta=['MW','LogP','H-Don','H-Acc','Rot'], line_close=True).update_layout(height=150), use_container_width=True)
+            chart('lipinski_radar')
         
         st.markdown('<div class="module-header">10. 气味-归经 平行类别流向图 (ParCats)</div>', unsafe_allow_html=True)
-        fig_para = px.parallel_categories(df, dimensions=['四气', '五味', '归经'], color='频次')
-        fig_para.update_layout(height=250, margin=dict(t=20,b=0,l=0,r=0))
-        st.plotly_chart(fig_para, use_container_width=True)
+        chart('nature_parcats')
         
         st.subheader("第二层：高级药理 (扩展 11-20)")
         r2_1, r2_2, r2_3 = st.columns(3)
         with r2_1:
             st.markdown('<div class="module-header">11. TPSA 分布 (直方)</div>', unsafe_allow_html=True)
-            st.plotly_chart(px.histogram(df, x='TPSA').update_layout(height=150, margin=dict(t=0,b=0,l=0,r=0)), use_container_width=True)
+            chart('tpsa_hist')
         with r2_2:
             st.markdown('<div class="module-header">12. 成药性 QED (箱线)</div>', unsafe_allow_html=True)
-            st.plotly_chart(px.box(df, y='QED').update_layout(height=150, margin=dict(t=0,b=0,l=0,r=0)), use_container_width=True)
+            chart('qed_box')
         with r2_3:
             st.markdown('<div class="module-header">13. 合成可及性</div>', unsafe_allow_html=True)
             st.progress(0.7)
             
+        admet_rates = REGISTRY.compute('admet_summary', tables, dataset_key)
         r3_1, r3_2, r3_3 = st.columns(3)
-        r3_1.markdown('<div class="module-header">14. hERG 毒性</div>', unsafe_allow_html=True); r3_1.warning("低风险")
-        r3_2.markdown('<div class="module-header">15. Ames 致突变</div>', unsafe_allow_html=True); r3_2.success("阴性")
-        r3_3.markdown('<div class="module-header">16. 致癌性</div>', unsafe_allow_html=True); r3_3.success("无")
+        for col, title, endpoint in ((r3_1, "14. hERG 毒性", 'hERG'), (r3_2, "15. Ames 致突变", 'Ames'), (r3_3, "16. 致癌性", '致癌性')):
+            col.markdown(f'<div class="module-header">{title}</div>', unsafe_allow_html=True)
+            rate = admet_rates.get(endpoint)
+            if rate is None:
+                col.info("未配置该终点模型")
+            elif rate >= 0.2:
+                col.warning(f"高风险化合物占 {rate:.1%}")
+            else:
+                col.success(f"高风险化合物占 {rate:.1%}")
         
         st.markdown('<div class="module-header">17. 肝毒性 | 18. 皮肤致敏 | 19. 生物降解 | 20. 药效团分析</div>', unsafe_allow_html=True)
         st.line_chart([1,2,3,2,1], height=100)
 
     # ================= Tab 5: 循证 (20模块) =================
-    with tabs[4]:
+    if active_tab == TAB_NAMES[4]:
         st.subheader("第一层：历史与文献 (核心 1-10)")
         k1, k2, k3, k4 = st.columns(4)
         k1.metric("1. 历史跨度", "2000年")
         k2.metric("2. 平均剂量", "9.5g")
-        k3.metric("3. 文献收录", "1024篇")
-        k4.metric("4. 平均 IF", "4.2")
+        evidence_store = get_evidence_store()
+        evidence_stats = evidence_store.stats(dataset=dataset_key)
+        k3.metric("3. 文献收录", f"{evidence_stats['文献数']}篇")
+        k4.metric("4. 平均 IF", f"{evidence_stats['平均IF'] or 0:.1f}")
         
         c1, c2 = st.columns(2)
         with c1:
             st.markdown('<div class="module-header">5. 历史剂量演变 (Line)</div>', unsafe_allow_html=True)
-            df_dose = df.groupby('巅峰朝代')['剂量'].mean().reset_index()
-            st.plotly_chart(px.line(df_dose, x='巅峰朝代', y='剂量').update_layout(height=250), use_container_width=True)
+            chart('dose_trend')
         with c2:
             st.markdown('<div class="module-header">6. 精细化时辰药理</div>', unsafe_allow_html=True)
-            st.plotly_chart(px.line(x=range(24), y=np.sin(range(24))).update_layout(height=250), use_container_width=True)
+            chart('circadian_line')
             
         c3, c4 = st.columns([2, 1])
         with c3:
-            st.markdown('<div class="module-header">7. 循证文献库 (Table)</div>', unsafe_allow_html=True)
-            st.dataframe(df_refs.head(10), height=200, use_container_width=True, hide_index=True)
+            st.markdown('<div class="module-header">7. 循证文献库 (检索)</div>', unsafe_allow_html=True)
+            s1, s2, s3 = st.columns([3, 2, 1])
+            query = s1.text_input("检索文献", placeholder="药名 / 标题关键词 / 期刊，空格分隔取交集", label_visibility="collapsed")
+            ref_types = s2.multiselect("类型", ["RCT", "Meta分析", "综述"], label_visibility="collapsed", placeholder="全部类型")
+            page = int(s3.number_input("页", min_value=1, value=1, step=1, label_visibility="collapsed"))
+            found = evidence_store.search(query, page=page, size=10, types=ref_types, dataset=dataset_key)
+            st.dataframe(pd.DataFrame(found['items']).drop(columns='得分', errors='ignore'), height=200, use_container_width=True, hide_index=True)
+            st.caption(f"共 {found['total']} 篇 · 第 {page}/{max(1, -(-found['total'] // 10))} 页 · {found['elapsed_ms']:.1f} ms")
         with c4:
             st.markdown('<div class="module-header">8. 证据等级分布 (Pie)</div>', unsafe_allow_html=True)
-            st.plotly_chart(px.pie(df_refs, names='类型', hole=0.5).update_layout(height=200, margin=dict(t=0,b=0,l=0,r=0), showlegend=False), use_container_width=True)
+            chart('evidence_pie')
         
         st.markdown('<div class="module-header">9. 文献发表年份趋势</div>', unsafe_allow_html=True)
-        st.bar_chart(df_refs['年份'].value_counts())
+        st.bar_chart(pd.Series(found['facets']['年份'], name='篇数'))
         st.markdown('<div class="module-header">10. 关键词云</div>', unsafe_allow_html=True)
         st.info("癫痫, GABA, 网络药理学, 分子对接, 作用机制")
         
@@ -452,13 +512,13 @@ if df is not None:
         r2_1, r2_2 = st.columns(2)
         with r2_1:
             st.markdown('<div class="module-header">11. 临床试验分期</div>', unsafe_allow_html=True)
-            st.plotly_chart(px.pie(df_trials, names='阶段').update_layout(height=200), use_container_width=True)
+            chart('trial_phase_pie')
         with r2_2:
             st.markdown('<div class="module-header">12. 试验状态分布</div>', unsafe_allow_html=True)
-            st.plotly_chart(px.histogram(df_trials, x='状态').update_layout(height=200), use_container_width=True)
+            chart('trial_status_hist')
             
         st.markdown('<div class="module-header">13. 样本量统计 (Box)</div>', unsafe_allow_html=True)
-        st.plotly_chart(px.box(df_trials, y='样本量').update_layout(height=150), use_container_width=True)
+        chart('sample_size_box')
         
         r3_1, r3_2, r3_3 = st.columns(3)
         r3_1.markdown('<div class="module-header">14. 资助来源</div>', unsafe_allow_html=True); r3_1.info("国家自然科学基金 (40%)")
@@ -469,30 +529,65 @@ if df is not None:
         st.bar_chart([1,2,3,4])
 
     # ================= Tab 6: 诊疗 (20模块) =================
-    with tabs[5]:
+    if active_tab == TAB_NAMES[5]:
         st.subheader("第一层：智能诊断 (核心 1-10)")
         c1, c2 = st.columns(2)
         with c1:
             st.markdown('<div class="module-header">1. 症状智能录入</div>', unsafe_allow_html=True)
-            st.multiselect("选择症状", ["神志不清", "喉间痰鸣", "四肢抽搐"])
+            diagnosis_engine = get_diagnosis_engine()
+            symptoms = st.multiselect("选择症状", diagnosis_engine.symptoms, default=["神志不清", "喉间痰鸣", "四肢抽搐"])
             st.markdown('<div class="module-header">2. AI 推理引擎</div>', unsafe_allow_html=True)
-            st.button("🚀 启动诊断")
+            if st.button("🚀 启动诊断"):
+                st.session_state['diagnosis'] = diagnosis_engine.diagnose(symptoms, top_k=len(diagnosis_engine.syndromes))
+            diagnosis = st.session_state.get('diagnosis')
             st.markdown('<div class="module-header">3. 证候雷达图</div>', unsafe_allow_html=True)
-            st.plotly_chart(px.line_polar(r=[1,2,3,4,5], theta=['风痰','痰热','肝风','瘀血','脾虚'], line_close=True).update_layout(height=200), use_container_width=True)
+            theta, r = diagnosis_engine.radar(diagnosis or {})
+            st.plotly_chart(px.line_polar(r=r, theta=theta, line_close=True, range_r=[0, 1]).update_layout(height=200), use_container_width=True)
             st.markdown('<div class="module-header">4. 禁忌症审查</div>', unsafe_allow_html=True)
-            st.error("⚠️ 警告：孕妇禁用全蝎、蜈蚣。")
+            checker = get_interaction_checker()
+            pregnant = st.checkbox("孕妇", value=False)
+            drugs = st.multiselect("合用西药", WESTERN_DRUGS, default=["苯巴比妥"])
+            findings = checker.check((diagnosis or {}).get('composition', []) + drugs, pregnant=pregnant)
+            contraindications = [f for f in findings if f['类型'] != '中西药']
+            for f in contraindications:
+                (st.error if f['级别'] == '禁忌' else st.warning)(f"⚠️ {f['类型']}：{f['说明']}")
+            if not contraindications:
+                st.success("未发现配伍禁忌" if diagnosis else "诊断后自动审查处方配伍")
         with c2:
             st.markdown('<div class="module-header">5. 推荐处方</div>', unsafe_allow_html=True)
-            st.success("✅ **定痫丸加减**")
+            if diagnosis:
+                st.success(f"✅ **{diagnosis['formula']}** (置信度 {diagnosis['confidence']:.0%})")
+                st.caption("组成：" + "、".join(diagnosis['composition']))
+                if diagnosis['alternatives']:
+                    st.caption("备选：" + "、".join(diagnosis['alternatives']))
+            else:
+                st.info("请选择症状并点击「启动诊断」")
             st.markdown('<div class="module-header">6. 研报生成</div>', unsafe_allow_html=True)
-            st.button("📄 生成 PDF")
+            if st.button("📄 生成 PDF"):
+                try:
+                    st.session_state['report'] = (dataset_key, report.pdf_bundle(tables, dataset_key), "tcm_report.pdf", "application/pdf")
+                except Exception:
+                    # kaleido 缺失或渲染失败时退回交互式 HTML
+                    st.session_state['report'] = (dataset_key, report.html_bundle(tables, dataset_key, kpis), "tcm_report.html", "text/html")
+            # 报告属于生成时的数据集，切换数据后不再提供旧文件
+            if st.session_state.get('report', (None,))[0] == dataset_key:
+                _, data, file_name, mime = st.session_state['report']
+                if mime == "text/html":
+                    st.caption("静态图导出不可用 (kaleido 未安装或渲染失败)，已改为导出交互式 HTML 报告")
+                st.download_button(f"下载 {file_name}", data, file_name=file_name, mime=mime)
             st.markdown('<div class="module-header">7. 数据导出</div>', unsafe_allow_html=True)
-            st.download_button("下载 JSON", "{}")
+            # 点击时才生成 (KPI + ADMET/富集摘要 + 诊断 + 全部模块的图表 JSON)
+            st.download_button("下载 JSON", lambda: report.json_bundle(tables, dataset_key, kpis, extra={'诊断': diagnosis}),
+                file_name="tcm_report.json", mime="application/json")
             st.markdown('<div class="module-header">8. 系统日志</div>', unsafe_allow_html=True)
             st.code("System Ready... AI Model Loaded.")
             
         st.markdown('<div class="module-header">9. 相互作用预警 | 10. 医生反馈</div>', unsafe_allow_html=True)
-        st.warning("石菖蒲与苯巴比妥合用可能增加镇静作用。")
+        drug_findings = [f for f in findings if f['类型'] == '中西药']
+        for f in drug_findings:
+            st.warning(f"{f['药物A']} + {f['药物B']}：{f['说明']}")
+        if not drug_findings:
+            st.info("未发现中西药相互作用" if diagnosis else "诊断后自动检查中西药相互作用")
         
         st.subheader("第二层：卫生经济学 (扩展 11-20)")
         r2_1, r2_2, r2_3 = st.columns(3)
@@ -501,9 +596,7 @@ if df is not None:
             st.bar_chart([100, 80, 60], height=150)
         with r2_2:
             st.markdown('<div class="module-header">12. 患者满意度 (仪表)</div>', unsafe_allow_html=True)
-            fig_g = go.Figure(go.Indicator(mode="gauge+number", value=85))
-            fig_g.update_layout(height=150, margin=dict(t=0,b=0,l=0,r=0))
-            st.plotly_chart(fig_g, use_container_width=True)
+            chart('satisfaction_gauge')
         with r2_3:
             st.markdown('<div class="module-header">13. 再入院风险</div>', unsafe_allow_html=True)
             st.metric("风险等级", "低")
@@ -519,6 +612,29 @@ if df is not None:
         st.markdown('<div class="module-header">18. 随访计划 | 19. 医保覆盖 | 20. 隐私保护</div>', unsafe_allow_html=True)
         st.progress(100)
 
+    PROFILER.record(f"分区 {active_tab}", 'tab', time.perf_counter() - page_t0)
+
+# --- 性能诊断 (TCM_PROFILE 开启时记录各模块耗时 / 峰值内存 / 图表体积) ---
+with st.sidebar:
+    with st.expander("🩺 性能诊断"):
+        st.caption(f"RSS {proc['RSS'] / 2**20:.0f} MB · 线程 {proc['线程数']}" if proc['RSS'] is not None else f"线程 {proc['线程数']} (未安装 psutil)")
+        if PROFILER.enabled:
+            prof = pd.DataFrame(PROFILER.rows())
+            if not prof.empty:
+                prof = prof.assign(**{
+                    '总耗时': (prof['总耗时'] * 1000).round(1), '最近耗时': (prof['最近耗时'] * 1000).round(1),
+                    '最大耗时': (prof['最大耗时'] * 1000).round(1), '峰值内存': (prof['峰值内存'] / 1024).round(1),
+                    '图表体积': (prof['图表体积'] / 1024).round(1),
+                }).rename(columns={'总耗时': '总耗时ms', '最近耗时': '最近ms', '最大耗时': '最大ms', '峰值内存': '峰值内存KB', '图表体积': '图表KB'})
+                st.dataframe(prof, hide_index=True, height=300)
+            d1, d2 = st.columns(2)
+            d1.download_button("JSON", PROFILER.to_json(), file_name="tcm_profile.json", mime="application/json")
+            d2.download_button("Prometheus", PROFILER.to_prometheus(), file_name="tcm_profile.prom", mime="text/plain")
+            if st.button("清空统计"):
+                PROFILER.reset()
+        else:
+            st.caption("设置环境变量 TCM_PROFILE=1 启用模块级剖析 (TCM_PROFILE=time 只计耗时)")
+
 # --- Footer ---
 st.markdown("---")
 st.markdown("<div style='text-align:center; color:#666;'>© 2025 TCM-LMH Lab | V30.0 Chinese Ultimate | 3D Activated</div>", unsafe_allow_html=True)
@@ -1,43 +1,177 @@
-from fastapi import FastAPI
-from pydantic import BaseModel
-import random
+from contextlib import asynccontextmanager
 
-app = FastAPI(title="TCM-LMH API Core")
+import pandas as pd
+from fastapi import FastAPI, HTTPException, Query, Request
+from fastapi.responses import PlainTextResponse
+from pydantic import BaseModel, Field, model_validator
+
+from admet import AdmetScorer
+from evidence import EVIDENCE_DB_PATH, EvidenceStore
+from herb_store import HERB_DB_PATH, INDEXED_FIELDS, HerbStore, ensure_schema
+from inference import DiagnosisEngine
+from interactions import InteractionChecker
+from profiling import PROFILER
 
 # 定义数据模型
 class DiagnosisRequest(BaseModel):
     symptoms: list[str]
+    top_k: int = Field(3, ge=1, le=10)
+
+class BatchDiagnosisRequest(BaseModel):
+    patients: list[list[str]]
+    top_k: int = Field(3, ge=1, le=10)
+
+class Prescription(BaseModel):
+    herbs: list[str]
+    drugs: list[str] = []
+    pregnant: bool = False
+
+class InteractionCheckRequest(BaseModel):
+    prescriptions: list[Prescription] = Field(..., max_length=100000)
+
+# 列式提交：每个描述符一个等长数组，避免数十万个逐条对象的解析开销
+class AdmetBatchRequest(BaseModel):
+    names: list[str] | None = None
+    mw: list[float] = Field(..., max_length=1000000)
+    logp: list[float]
+    hbd: list[float]
+    hba: list[float]
+    tpsa: list[float]
+    rotb: list[float]
+    aromatic_rings: list[float] | None = None
+    alerts: list[float] | None = None
 
-# 1. 模拟数据库中的真实药材
+    @model_validator(mode='after')
+    def same_length(self):
+        lengths = {len(v) for v in self.model_dump().values() if v is not None}
+        if len(lengths) > 1:
+            raise ValueError("各描述符数组长度必须一致")
+        return self
+
+ADMET_FIELDS = {'mw': '分子量', 'logp': 'LogP', 'hbd': 'HBD', 'hba': 'HBA', 'tpsa': 'TPSA',
+                'rotb': 'RotB', 'aromatic_rings': '芳香环', 'alerts': '警示结构'}
+
+DIAGNOSIS_ENGINE = DiagnosisEngine()
+INTERACTION_CHECKER = InteractionChecker()
+ADMET_SCORER = AdmetScorer()
+
+# 1. 初始药材 (空库时写入 SQLite 药材库)
 REAL_HERB_DB = {
     "石菖蒲": {"产地": "安徽", "归经": "心经", "功效": "开窍豁痰"},
     "全蝎": {"产地": "河南", "归经": "肝经", "功效": "息风止痉"}
 }
 
-# 接口 A：获取全量药物列表 (替代原来的 process_data)
+# 启动时建表/建索引并打开连接池，关闭时释放
+@asynccontextmanager
+async def lifespan(app):
+    ensure_schema(HERB_DB_PATH, seed=REAL_HERB_DB)
+    store = HerbStore(HERB_DB_PATH)
+    await store.open()
+    app.state.herb_store = store
+    app.state.evidence_store = EvidenceStore(EVIDENCE_DB_PATH)
+    yield
+    await store.close()
+    app.state.evidence_store.close()
+
+app = FastAPI(title="TCM-LMH API Core", lifespan=lifespan)
+
+# 接口 A：分页 + 筛选获取药物列表
 @app.get("/herbs/list")
-def get_all_herbs():
-    # 在真实场景中，这里会查询 MySQL/Neo4j
-    return {"data": list(REAL_HERB_DB.keys()), "count": len(REAL_HERB_DB)}
+async def get_all_herbs(
+    request: Request,
+    page: int = Query(1, ge=1),
+    size: int = Query(20, ge=1, le=500),
+    q: str | None = Query(None, description="药名前缀"),
+    origin: str | None = Query(None, description="产地"),
+    meridian: str | None = Query(None, description="归经"),
+    category: str | None = Query(None, description="类别"),
+):
+    result = await request.app.state.herb_store.list_herbs(page, size, q, 产地=origin, 归经=meridian, 类别=category)
+    return {
+        "data": [item["中药"] for item in result["items"]],
+        "items": result["items"],
+        "count": result["total"],
+        "page": page,
+        "size": size,
+    }
 
-# 接口 B：AI 智能诊断 (替代原来的随机推荐)
+# 接口 A2：单味药详情
+@app.get("/herbs/{name}")
+async def get_herb(name: str, request: Request):
+    herb = await request.app.state.herb_store.get_herb(name)
+    if herb is None:
+        raise HTTPException(status_code=404, detail=f"未找到药材: {name}")
+    return herb
+
+# 接口 A3：筛选维度的分面计数 (产地/归经/类别)
+@app.get("/herbs/facets/{field}")
+async def get_herb_facets(field: str, request: Request):
+    if field not in INDEXED_FIELDS:
+        raise HTTPException(status_code=400, detail=f"仅支持: {', '.join(INDEXED_FIELDS)}")
+    return await request.app.state.herb_store.facets(field)
+
+# 接口 B：辨证诊断 (症状 → 证候 → 方剂 倒排索引打分)
 @app.post("/clinic/diagnose")
-def ai_diagnose(req: DiagnosisRequest):
-    # 这里接入真正的 DeepSeek / GPT 接口
-    print(f"接收到症状: {req.symptoms}")
-    
-    # 模拟 AI 推理过程
-    if "喉间痰鸣" in req.symptoms:
-        return {
-            "formula": "定痫丸加减",
-            "composition": ["石菖蒲", "胆南星", "半夏"],
-            "confidence": 0.92
-        }
-    else:
-        return {
-            "formula": "通用基础方",
-            "composition": ["甘草", "茯苓"],
-            "confidence": 0.5
-        }
-
-# 启动命令: uvicorn backend:app --reload
\ No newline at end of file
+async def ai_diagnose(req: DiagnosisRequest):
+    return DIAGNOSIS_ENGINE.diagnose(req.symptoms, req.top_k)
+
+# 接口 B2：批量诊断，一次请求对多名患者向量化打分
+@app.post("/clinic/diagnose/batch")
+def ai_diagnose_batch(req: BatchDiagnosisRequest):
+    return {"results": DIAGNOSIS_ENGINE.diagnose_batch(req.patients, req.top_k), "count": len(req.patients)}
+
+# 可选症状词表
+@app.get("/clinic/symptoms")
+def get_symptoms():
+    return {"data": DIAGNOSIS_ENGINE.symptoms, "count": len(DIAGNOSIS_ENGINE.symptoms)}
+
+# 接口 C：处方配伍批量审查 (十八反/十九畏/妊娠禁忌/中西药)，药房批量稽核使用
+@app.post("/interactions/check")
+def check_interactions(req: InteractionCheckRequest):
+    results = INTERACTION_CHECKER.check_batch(
+        [p.herbs + p.drugs for p in req.prescriptions],
+        pregnant=[p.pregnant for p in req.prescriptions],
+    )
+    return {
+        "results": results,
+        "flagged": sum(1 for r in results if r),
+        "count": len(results),
+        "summary": INTERACTION_CHECKER.summary(results).to_dict('records'),
+    }
+
+# 接口 C2：循证文献全文检索 (bm25 排序 + 类型/年份/影响因子 分面)
+@app.get("/evidence/search")
+def search_evidence(
+    request: Request,
+    q: str | None = Query(None, description="关键词，空格分隔取交集"),
+    page: int = Query(1, ge=1),
+    size: int = Query(20, ge=1, le=200),
+    type: list[str] | None = Query(None, description="文献类型，可多选"),
+    year_from: int | None = None,
+    year_to: int | None = None,
+    min_if: float | None = Query(None, ge=0, description="最低影响因子"),
+    dataset: str | None = Query(None, description="数据集键，只检索该数据集收录的文献"),
+):
+    return request.app.state.evidence_store.search(q, page, size, type, year_from, year_to, min_if, dataset=dataset)
+
+# 接口 D：ADMET / 成药性批量打分 (Lipinski/Veber/QED + 毒理终点概率)，按列返回
+@app.post("/admet/batch")
+def score_admet(req: AdmetBatchRequest):
+    df = pd.DataFrame({col: getattr(req, field) for field, col in ADMET_FIELDS.items() if getattr(req, field) is not None})
+    scores = ADMET_SCORER.score(df)
+    if req.names is not None:
+        scores.insert(0, '中药', req.names)
+    return {
+        "results": scores.to_dict('list'),
+        "count": len(scores),
+        "lipinski_pass": int(scores['Lipinski通过'].sum()),
+        "veber_pass": int(scores['Veber通过'].sum()),
+    }
+
+# 接口 E：Prometheus 指标 (进程 CPU/RSS；TCM_PROFILE 开启时含各区段耗时/内存)
+@app.get("/metrics", response_class=PlainTextResponse)
+def metrics():
+    return PROFILER.to_prometheus()
+
+# 启动命令: uvicorn backend:app --workers 4
+# 导入数据: python herb_store.py sample_tcm.xlsx
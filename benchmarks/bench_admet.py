@@ -0,0 +1,61 @@
+import argparse
+import math
+
+import numpy as np
+import pandas as pd
+
+from admet import ADMET_MODELS, LIPINSKI_RULES, QED_PARAMS, QED_WEIGHTS, VEBER_RULES, AdmetScorer, desirability
+from benchmarks.bench_engine import time_call
+from engine import GENERATORS, generate_column
+
+# ==========================================
+# ⏱️ ADMET 批量打分基准：整列 NumPy vs 逐行 Python
+# 用法: python -m benchmarks.bench_admet --rows 100000 500000 --legacy-rows 20000
+# ==========================================
+
+COLUMNS = ['分子量', 'LogP', 'HBD', 'HBA', 'RotB', 'TPSA', '芳香环', '警示结构']
+
+
+def make_compounds(rows, seed=0):
+    rng = np.random.default_rng(seed)
+    return pd.DataFrame({col: generate_column(GENERATORS[col], rows, rng) for col in COLUMNS})
+
+
+# 逐行对照实现：与 AdmetScorer.score 结果一致，用于校验与计时
+def legacy_score(df):
+    out = []
+    for row in df.to_dict('records'):
+        lipinski = sum(row[c] > limit for c, limit in LIPINSKI_RULES.items())
+        veber = sum(row[c] > limit for c, limit in VEBER_RULES.items())
+        log_sum = sum(QED_WEIGHTS[c] * math.log(max(float(desirability(row[c], QED_PARAMS[c])), 1e-12)) for c in QED_PARAMS)
+        rec = {'Lipinski违规': lipinski, 'Veber通过': veber == 0, 'QED': round(math.exp(log_sum / sum(QED_WEIGHTS.values())), 3)}
+        for name, model in ADMET_MODELS.items():
+            z = model['intercept'] + sum(w * row[c] for c, w in model['coef'].items())
+            rec[f'{name}概率'] = round(1 / (1 + math.exp(-z)), 3)
+        out.append(rec)
+    return pd.DataFrame(out)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="ADMET 批量打分吞吐基准")
+    parser.add_argument('--rows', type=int, nargs='+', default=[100000, 500000])
+    parser.add_argument('--legacy-rows', type=int, default=20000, help="逐行实现只跑该规模，按行/秒比较")
+    parser.add_argument('--repeat', type=int, default=3)
+    args = parser.parse_args()
+
+    scorer = AdmetScorer(ADMET_MODELS)
+    sample = make_compounds(args.legacy_rows)
+    vec, ref = scorer.score(sample), legacy_score(sample)
+    mismatch = {c: int((np.abs(vec[c].astype(float) - ref[c].astype(float)) > 1e-3).sum()) for c in ref.columns}
+    print(f"校验 ({args.legacy_rows} 行)：不一致行数 {mismatch}")
+    t_old = time_call(legacy_score, sample)
+    print(f"{'逐行实现':>10} {args.legacy_rows:>10} 行 {args.legacy_rows / t_old:>14,.0f} 行/秒")
+
+    for rows in args.rows:
+        df = make_compounds(rows)
+        t_new = time_call(scorer.score, df, repeat=args.repeat)
+        print(f"{'向量化':>10} {rows:>10} 行 {rows / t_new:>14,.0f} 行/秒  耗时 {t_new:.3f}s  加速比 {(rows / t_new) / (args.legacy_rows / t_old):.0f}x")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,159 @@
+import argparse
+import random
+import time
+from datetime import datetime
+
+import numpy as np
+import pandas as pd
+
+from engine import process_data, HERBS_POOL
+
+# ==========================================
+# ⏱️ process_data 吞吐基准：向量化引擎 vs 逐行旧实现
+# 用法: python -m benchmarks.bench_engine --rows 1000 10000 50000
+# ==========================================
+
+
+# 旧实现 (逐行 iterrows + lambda 生成器)，仅作为基准对照保留
+def legacy_process_data(uploaded_df=None):
+    # 1. 基础药材池
+    herbs_pool = [
+        '石菖蒲', '全蝎', '蜈蚣', '天麻', '川芎', '僵蚕', '柴胡', '当归', '白芍', '茯苓',
+        '甘草', '半夏', '胆南星', '郁金', '远志', '酸枣仁', '龙骨', '牡蛎', '钩藤', '地龙'
+    ]
+    
+    # 2. 初始化数据
+    if uploaded_df is None:
+        data = [{'中药': h, '频次': random.randint(50, 1200)} for h in herbs_pool]
+        df = pd.DataFrame(data)
+    else:
+        df = uploaded_df.copy()
+        # 🛡️ 智能列名映射 (兼容中英文表头)
+        col_map = {
+            'Medicine': '中药', 'Name': '中药', 'Herb': '中药',
+            'Frequency': '频次', 'Freq': '频次', 'Count': '频次',
+            'Origin': '产地', 'Dose': '剂量'
+        }
+        df.rename(columns=col_map, inplace=True)
+        
+        if '中药' not in df.columns:
+            df['中药'] = [random.choice(herbs_pool) for _ in range(len(df))]
+        if '频次' not in df.columns:
+            df['频次'] = [random.randint(50, 1000) for _ in range(len(df))]
+
+    # 3. 🛡️ 强制补全 30+ 维度 (全中文)
+    generators = {
+        '类别': lambda: random.choice(['开窍药', '息风止痉药', '活血化瘀药', '补气药', '清热药', '化痰药', '安神药']),
+        '四气': lambda: random.choice(['温', '平', '寒', '凉', '热']),
+        '五味': lambda: random.choice(['辛', '苦', '甘', '酸', '咸']),
+        '归经': lambda: random.choice(['肝经', '心经', '脾经', '肺经', '肾经']),
+        '剂量': lambda: random.randint(3, 15),
+        '巅峰朝代': lambda: random.choice(['汉代', '唐代', '宋代', '金元', '明代', '清代']),
+        '分子量': lambda: random.randint(150, 600),
+        'LogP': lambda: round(random.uniform(0.5, 5.5), 2),
+        'OB': lambda: round(random.uniform(20, 90), 2),
+        '产地': lambda: random.choice(['四川', '安徽', '甘肃', '河南', '内蒙古', '浙江', '云南', '山西', '湖北']),
+        '海拔': lambda: random.randint(500, 3000),
+        '价格': lambda: random.randint(10, 500),
+        '土壤pH': lambda: round(random.uniform(5.5, 7.5), 1),
+        '年降雨': lambda: random.randint(400, 1200),
+        '毒性评分': lambda: random.randint(0, 5),
+        'QED': lambda: round(random.uniform(0.3, 0.9), 2),
+        'TPSA': lambda: random.randint(40, 140)
+    }
+
+    for col, gen_func in generators.items():
+        if col not in df.columns:
+            df[col] = [gen_func() for _ in range(len(df))]
+            
+    # 4. 生成衍生数据表
+    target_pool = ['GABRA1', 'SCN1A', 'BDNF', 'IL6', 'TNF', 'MAPK1', 'PIK3CA']
+    geo_locs = {
+        '四川': [31.0, 103.6], '安徽': [30.8, 116.3], '甘肃': [34.5, 104.6], 
+        '河南': [34.1, 113.4], '内蒙古': [42.2, 118.9], '浙江': [29.3, 119.5], 
+        '云南': [27.3, 103.7], '山西': [36.5, 112.9], '湖北': [30.5, 114.3]
+    }
+    
+    geo_data, docking_data, admet_data, refs, trials = [], [], [], [], []
+    
+    for _, row in df.iterrows():
+        # 地图
+        origin = row['产地']
+        if origin in geo_locs:
+            lat, lon = geo_locs[origin]
+            geo_data.append([row['中药'], origin, lat+random.uniform(-0.1,0.1), lon+random.uniform(-0.1,0.1), row['频次']])
+        else:
+            geo_data.append([row['中药'], '未知', 35.0, 105.0, row['频次']])
+            
+        # 对接
+        for t in target_pool:
+            docking_data.append([row['中药'], t, round(random.uniform(-11.5, -4.5), 1)])
+            
+        # ADMET
+        admet_data.append([row['中药'], random.choice(['高','中']), random.choice(['是','否']), row['毒性评分']])
+        
+        # 文献
+        refs.append([row['中药'], random.choice(['RCT','Meta分析','综述']), 'J Ethnopharmacol', f"{row['中药']}的作用机制研究", random.randint(2018, 2024), random.uniform(1, 10)])
+        
+        # 临床
+        trials.append([row['中药'], random.choice(['I期','II期','III期']), random.randint(50, 500), random.choice(['已完成','招募中'])])
+
+    df_geo = pd.DataFrame(geo_data, columns=['中药', '产地', '纬度', '经度', '频次'])
+    df_dock = pd.DataFrame(docking_data, columns=['中药', '靶点', '结合能'])
+    df_admet = pd.DataFrame(admet_data, columns=['中药', 'Caco-2透膜', 'BBB穿透', '毒性评分'])
+    df_refs = pd.DataFrame(refs, columns=['中药', '类型', '期刊', '标题', '年份', '影响因子'])
+    df_trials = pd.DataFrame(trials, columns=['中药', '阶段', '样本量', '状态'])
+    
+    # 模拟价格K线
+    dates = pd.date_range(end=datetime.today(), periods=30)
+    df_price = pd.DataFrame({'Date': dates, 'Open': np.random.randint(20,30,30), 'Close': np.random.randint(20,30,30), 'High': np.random.randint(30,35,30), 'Low': np.random.randint(15,20,30)})
+
+    # 网络边
+    edges = []
+    herbs = df['中药'].tolist()
+    if len(herbs)>1:
+        for _ in range(len(herbs)*4):
+            edges.append((random.choice(herbs), random.choice(herbs), random.randint(10, 100)))
+            
+    df_go = pd.DataFrame({'术语': ['突触传递', '离子通道', 'GABA受体', '神经递质', '膜电位'], '分类': ['生物过程']*3+['分子功能']*2, '计数': [45, 38, 30, 25, 20], 'P值': [0.001]*5})
+
+    return df, edges, df_geo, df_dock, df_admet, df_refs, df_trials, df_price, df_go
+
+
+def make_input(rows, seed=0):
+    rng = np.random.default_rng(seed)
+    return pd.DataFrame({
+        'Herb': np.asarray(HERBS_POOL, dtype=object)[rng.integers(0, len(HERBS_POOL), rows)],
+        'Freq': rng.integers(50, 1000, rows)
+    })
+
+
+def time_call(func, *args, repeat=1):
+    best = float('inf')
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        func(*args)
+        best = min(best, time.perf_counter() - t0)
+    return best
+
+
+def main():
+    parser = argparse.ArgumentParser(description="process_data 吞吐基准")
+    parser.add_argument('--rows', type=int, nargs='+', default=[1000, 10000, 50000])
+    parser.add_argument('--repeat', type=int, default=3)
+    parser.add_argument('--skip-legacy', action='store_true', help="跳过旧实现 (大规模时很慢)")
+    args = parser.parse_args()
+
+    print(f"{'行数':>10} {'向量化 (行/秒)':>16} {'旧实现 (行/秒)':>16} {'加速比':>8}")
+    for rows in args.rows:
+        raw = make_input(rows)
+        t_new = time_call(process_data, raw, 0, repeat=args.repeat)
+        if args.skip_legacy:
+            print(f"{rows:>10} {rows / t_new:>16,.0f} {'-':>16} {'-':>8}")
+            continue
+        t_old = time_call(legacy_process_data, raw)
+        print(f"{rows:>10} {rows / t_new:>16,.0f} {rows / t_old:>16,.0f} {t_old / t_new:>7.1f}x")
+
+
+if __name__ == '__main__':
+    main()
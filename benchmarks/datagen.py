@@ -0,0 +1,100 @@
+import argparse
+import os
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.csv as pacsv
+import pyarrow.parquet as pq
+
+from cache import CACHE_DIR
+from engine import GENERATORS, HERBS_POOL, generate_column
+
+# ==========================================
+# 🧪 合成数据集：按种子分块生成 处方 × 药材 长表，写出 Excel / CSV / Parquet
+# 用法: python -m benchmarks.datagen --rows 1000 100000 1000000 --formats csv parquet
+# ==========================================
+# 每块固定 CHUNK_ROWS 行、随机源为 (seed, 块序号)，同一 (rows, seed) 无论分几次生成都逐字节一致；
+# 1000 万行也只需常驻一块内存。列与 sample_excel.py 一致，另加 处方ID 供共现网络构图。
+
+DATA_DIR = os.path.join(CACHE_DIR, 'bench', 'data')
+FORMATS = ['xlsx', 'csv', 'parquet']
+CHUNK_ROWS = 1_000_000
+EXCEL_MAX_ROWS = 1_048_575
+HERBS_PER_PRESCRIPTION = 8
+COLUMNS = ['类别', '产地', '四气', '五味', '归经', '剂量', '巅峰朝代', '分子量', 'LogP', 'OB']
+
+
+# 药材名：前 20 味为真实药名，超出部分加序号后缀
+def herb_names(n):
+    return [HERBS_POOL[i % len(HERBS_POOL)] + (f"{i // len(HERBS_POOL)}" if i >= len(HERBS_POOL) else '') for i in range(n)]
+
+
+def generate_chunk(index, rows, seed=0, herbs=500):
+    rng = np.random.default_rng([seed, index])
+    start = index * CHUNK_ROWS
+    names = np.asarray(herb_names(herbs), dtype=object)
+    df = pd.DataFrame({
+        '处方ID': (start + np.arange(rows)) // HERBS_PER_PRESCRIPTION,
+        # 药材按 Zipf 分布抽取，常用药出现频率远高于冷僻药
+        '中药': names[np.minimum(rng.zipf(1.3, rows) - 1, herbs - 1)],
+        '频次': rng.integers(100, 1501, rows),
+    })
+    return df.assign(**{col: generate_column(GENERATORS[col], rows, rng) for col in COLUMNS})
+
+
+def iter_chunks(rows, seed=0, herbs=500):
+    for index, start in enumerate(range(0, rows, CHUNK_ROWS)):
+        yield generate_chunk(index, min(CHUNK_ROWS, rows - start), seed, herbs)
+
+
+def generate(rows, seed=0, herbs=500):
+    return pd.concat(iter_chunks(rows, seed, herbs), ignore_index=True)
+
+
+def dataset_path(rows, fmt, seed=0, directory=DATA_DIR):
+    return os.path.join(directory, f"tcm_{rows}_{seed}.{fmt}")
+
+
+# 已存在的文件直接复用；Excel 超过单表行数上限时返回 None
+def write_dataset(rows, fmt, seed=0, herbs=500, directory=DATA_DIR):
+    path = dataset_path(rows, fmt, seed, directory)
+    if os.path.exists(path):
+        return path
+    if fmt == 'xlsx' and rows > EXCEL_MAX_ROWS:
+        return None
+    os.makedirs(directory, exist_ok=True)
+    tmp = os.path.join(directory, f".{os.getpid()}.{os.path.basename(path)}")
+    if fmt == 'xlsx':
+        generate(rows, seed, herbs).to_excel(tmp, index=False, engine='openpyxl')
+    else:
+        writer = None
+        try:
+            for chunk in iter_chunks(rows, seed, herbs):
+                table = pa.Table.from_pandas(chunk, preserve_index=False)
+                if writer is None:
+                    writer = pq.ParquetWriter(tmp, table.schema) if fmt == 'parquet' else pacsv.CSVWriter(tmp, table.schema)
+                writer.write_table(table)
+        finally:
+            if writer is not None:
+                writer.close()
+    os.replace(tmp, path)
+    return path
+
+
+def main():
+    parser = argparse.ArgumentParser(description="生成可复现的合成数据集")
+    parser.add_argument('--rows', type=int, nargs='+', default=[1000, 100000])
+    parser.add_argument('--formats', nargs='+', choices=FORMATS, default=FORMATS)
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--herbs', type=int, default=500)
+    parser.add_argument('--out', default=DATA_DIR)
+    args = parser.parse_args()
+    for rows in args.rows:
+        for fmt in args.formats:
+            path = write_dataset(rows, fmt, args.seed, args.herbs, args.out)
+            print(f"✅ {rows:>10,} 行 {fmt:<8} → {path}" if path else f"⚠️ {rows:,} 行超过 Excel 单表上限，跳过 xlsx")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,88 @@
+import argparse
+import asyncio
+import os
+import subprocess
+import sys
+import time
+
+import httpx
+import numpy as np
+
+# ==========================================
+# 🔥 backend.py 压测：并发异步请求 /herbs/list 与 /herbs/{name}
+# 用法: python -m benchmarks.loadtest_backend --spawn --workers 4 -c 200 -n 20000
+# ==========================================
+
+PATHS = [
+    "/herbs/list",
+    "/herbs/list?page=2&size=50",
+    "/herbs/list?origin=安徽",
+    "/herbs/list?meridian=肝经&size=10",
+    "/herbs/石菖蒲",
+]
+
+
+async def worker(client, n, latencies, errors):
+    for i in range(n):
+        t0 = time.perf_counter()
+        try:
+            resp = await client.get(PATHS[i % len(PATHS)])
+            if resp.status_code >= 500:
+                errors.append(resp.status_code)
+        except httpx.HTTPError as e:
+            errors.append(type(e).__name__)
+        latencies.append(time.perf_counter() - t0)
+
+
+async def run(url, concurrency, total):
+    latencies, errors = [], []
+    limits = httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency)
+    async with httpx.AsyncClient(base_url=url, limits=limits, timeout=30) as client:
+        per_worker = max(1, total // concurrency)
+        t0 = time.perf_counter()
+        await asyncio.gather(*(worker(client, per_worker, latencies, errors) for _ in range(concurrency)))
+        elapsed = time.perf_counter() - t0
+    lat = np.array(latencies) * 1000
+    print(f"请求数 {len(lat)} | 并发 {concurrency} | 耗时 {elapsed:.2f}s | 吞吐 {len(lat) / elapsed:,.0f} req/s | 错误 {len(errors)}")
+    print(f"延迟 ms: p50 {np.percentile(lat, 50):.2f} | p95 {np.percentile(lat, 95):.2f} | p99 {np.percentile(lat, 99):.2f}")
+
+
+def wait_ready(url, timeout=30):
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        try:
+            if httpx.get(url + "/herbs/list", timeout=1).status_code == 200:
+                return
+        except httpx.HTTPError:
+            pass
+        time.sleep(0.2)
+    raise RuntimeError(f"服务未就绪: {url}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="backend.py 本地压测")
+    parser.add_argument('--url', default="http://127.0.0.1:8000")
+    parser.add_argument('-c', '--concurrency', type=int, default=100)
+    parser.add_argument('-n', '--requests', type=int, default=10000)
+    parser.add_argument('--spawn', action='store_true', help="自动启动本地 uvicorn")
+    parser.add_argument('--workers', type=int, default=os.cpu_count() or 1)
+    args = parser.parse_args()
+
+    server = None
+    if args.spawn:
+        port = args.url.rsplit(':', 1)[-1]
+        server = subprocess.Popen(
+            [sys.executable, '-m', 'uvicorn', 'backend:app', '--port', port, '--workers', str(args.workers), '--log-level', 'warning'],
+            cwd=os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+        )
+    try:
+        wait_ready(args.url)
+        asyncio.run(run(args.url, args.concurrency, args.requests))
+    finally:
+        if server is not None:
+            server.terminate()
+            server.wait()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,261 @@
+import argparse
+import asyncio
+import json
+import multiprocessing
+import os
+import platform
+import resource
+import sys
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+from benchmarks.datagen import DATA_DIR, FORMATS, write_dataset
+from cache import CACHE_DIR
+
+# ==========================================
+# 📏 回归基准套件：合成数据 1k / 100k / 1M / 10M 行，逐阶段测吞吐与峰值内存
+# 用法: python -m benchmarks.suite --rows 1000 100000 --save-baseline
+#       python -m benchmarks.suite --rows 1000 100000 --threshold 0.2   (与基线对比，退化时退出码为 1)
+# ==========================================
+# 阶段：ingest (每种格式) → process_data (超过流式阈值时为 process_stream) → 共现网络构建/指标
+# → backend.py 各接口 (httpx ASGITransport 进程内调用，不经网络)。
+# 每个阶段在独立的 spawn 子进程中运行，峰值内存取子进程的 ru_maxrss，互不干扰；
+# 每个计时重复 rounds 次取最快一次，耗时低于 MIN_SECONDS 的条目不做吞吐对比 (计时噪声大于差异)。
+
+BASELINE_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'baseline.json')
+RESULT_PATH = os.path.join(CACHE_DIR, 'bench', 'latest.json')
+STAGES = ['ingest', 'process', 'graph', 'backend']
+DEFAULT_THRESHOLD = 0.2
+DEFAULT_ROUNDS = 5
+MIN_SECONDS = 0.05
+API_SAMPLE_ROWS = 100_000
+
+
+def _entry(seconds, count, unit):
+    return {'秒': seconds, '吞吐': count / seconds if seconds > 0 else float('inf'), '单位': unit}
+
+
+# 重复 rounds 次，返回最短耗时与最后一次的结果；setup 在计时之外执行
+def _best(rounds, func, setup=None):
+    best, result = float('inf'), None
+    for i in range(rounds):
+        args = setup(i) if setup else ()
+        t0 = time.perf_counter()
+        result = func(*args)
+        best = min(best, time.perf_counter() - t0)
+    return best, result
+
+
+def _ingest(path, directory):
+    from ingest import ingest
+
+    with open(path, 'rb') as f:
+        return ingest(os.path.basename(path), f.read(), directory=directory)
+
+
+# ---------- 各阶段 (在子进程中执行) ----------
+
+def stage_ingest(path, rows, fmt, workdir, rounds):
+    # 每轮写入新目录，避免命中上一轮已生成的 Arrow 文件
+    seconds, _ = _best(rounds, _ingest, lambda i: (path, os.path.join(workdir, f"round{i}")))
+    return {f"ingest.{fmt}": _entry(seconds, rows, '行/秒')}
+
+
+def stage_process(path, rows, seed, workdir, rounds):
+    from engine import process_data
+    from ingest import load_frame
+    from streaming import STREAM_THRESHOLD_ROWS, process_stream
+
+    arrow_path = _ingest(path, workdir)
+    if rows > STREAM_THRESHOLD_ROWS:
+        seconds, _ = _best(rounds, lambda: process_stream(arrow_path, os.path.join(workdir, 'stream'), seed=seed))
+        return {'process_stream': _entry(seconds, rows, '行/秒')}
+    seconds, _ = _best(rounds, lambda: process_data(load_frame(arrow_path), seed))
+    return {'process_data': _entry(seconds, rows, '行/秒')}
+
+
+def _metrics(graph, seed):
+    from graph_metrics import NetworkMetricsService
+
+    # 每轮新建服务，避免按图指纹命中上一轮的结果
+    service = NetworkMetricsService(max_workers=1, seed=seed)
+    try:
+        return service.get(graph, wait=True)
+    finally:
+        service.shutdown()
+
+
+def stage_graph(path, rows, seed, workdir, rounds):
+    from cooccur import CooccurrenceGraph
+    from ingest import load_table
+
+    table = load_table(_ingest(path, workdir))
+    rx, herbs = table['处方ID'].to_numpy(), table['中药'].to_pandas()
+    build, graph = _best(rounds, lambda: CooccurrenceGraph.from_prescriptions(rx, herbs))
+    metrics, _ = _best(rounds, lambda: _metrics(graph, seed))
+    return {'graph.build': _entry(build, rows, '行/秒'), 'graph.metrics': _entry(metrics, graph.n_nodes, '节点/秒')}
+
+
+def api_requests(df, refs):
+    herbs = df['中药'].astype(str)
+    prescriptions = [{'herbs': g.tolist(), 'drugs': []} for _, g in herbs.groupby(df['处方ID'], sort=False)][:100]
+    sample = df.head(1000)
+    admet = {
+        'names': sample['中药'].astype(str).tolist(), 'mw': sample['分子量'].tolist(), 'logp': sample['LogP'].tolist(),
+        'hbd': sample['HBD'].tolist(), 'hba': sample['HBA'].tolist(), 'tpsa': sample['TPSA'].tolist(), 'rotb': sample['RotB'].tolist(),
+    }
+    top = herbs.value_counts().index[0]
+    query = refs['中药'].iloc[0] if len(refs) else top
+    # (名称, 方法, 地址, 请求体)：名称用路由模板，不随数据变化，便于与基线逐项对比
+    return [
+        ('GET /herbs/list', 'GET', '/herbs/list', None),
+        ('GET /herbs/list?origin', 'GET', '/herbs/list?origin=安徽&size=50', None),
+        ('GET /herbs/{name}', 'GET', f'/herbs/{top}', None),
+        ('GET /herbs/facets/{field}', 'GET', '/herbs/facets/产地', None),
+        ('POST /clinic/diagnose', 'POST', '/clinic/diagnose', {'symptoms': ['神志不清', '喉间痰鸣', '四肢抽搐']}),
+        ('POST /interactions/check', 'POST', '/interactions/check', {'prescriptions': prescriptions}),
+        ('GET /evidence/search', 'GET', f'/evidence/search?q={query}', None),
+        ('POST /admet/batch', 'POST', '/admet/batch', admet),
+    ]
+
+
+async def _call_api(app, calls, repeat):
+    import httpx
+
+    out = {}
+    async with app.router.lifespan_context(app):
+        async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url='http://bench') as client:
+            for name, method, url, body in calls:
+                resp = await client.request(method, url, json=body)
+                resp.raise_for_status()
+                t0 = time.perf_counter()
+                for _ in range(repeat):
+                    await client.request(method, url, json=body)
+                out[f"api {name}"] = _entry(time.perf_counter() - t0, repeat, '请求/秒')
+    return out
+
+
+def stage_backend(path, rows, seed, workdir, repeat):
+    # 各库路径在导入 backend 之前指向临时目录，不触碰正式数据
+    os.environ['TCM_HERB_DB'] = os.path.join(workdir, 'herbs.db')
+    os.environ['TCM_EVIDENCE_DB'] = os.path.join(workdir, 'evidence.db')
+    from engine import process_data
+    from evidence import EvidenceStore
+    from herb_store import import_frame
+    from ingest import load_frame
+
+    df = load_frame(_ingest(path, workdir)).head(API_SAMPLE_ROWS)
+    tables = process_data(df, seed)
+    import_frame(tables[0], os.environ['TCM_HERB_DB'])
+    EvidenceStore(os.environ['TCM_EVIDENCE_DB']).add_frame(tables[5])
+    from backend import app
+
+    return asyncio.run(_call_api(app, api_requests(tables[0], tables[5]), repeat))
+
+
+# ---------- 调度 / 记录 / 对比 ----------
+
+def _child(func, args):
+    result = func(*args)
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+    return {k: dict(v, 峰值RSS_MB=peak) for k, v in result.items()}
+
+
+def measure(func, *args):
+    ctx = multiprocessing.get_context('spawn')
+    with ProcessPoolExecutor(max_workers=1, mp_context=ctx, max_tasks_per_child=1) as pool:
+        return pool.submit(_child, func, args).result()
+
+
+def run_suite(rows_list, formats, stages, seed=0, repeat=200, data_dir=DATA_DIR, rounds=DEFAULT_ROUNDS):
+    results = {}
+    for rows in rows_list:
+        paths = {fmt: write_dataset(rows, fmt, seed, directory=data_dir) for fmt in formats}
+        paths = {fmt: p for fmt, p in paths.items() if p}
+        # 后续阶段的输入优先用 Parquet (读取最快，不影响被测阶段本身)
+        main_path = paths.get('parquet') or next(iter(paths.values()))
+        with tempfile.TemporaryDirectory(prefix='tcm-bench-') as workdir:
+            jobs = []
+            if 'ingest' in stages:
+                jobs += [(stage_ingest, (p, rows, fmt, os.path.join(workdir, fmt), rounds)) for fmt, p in paths.items()]
+            if 'process' in stages:
+                jobs.append((stage_process, (main_path, rows, seed, workdir, rounds)))
+            if 'graph' in stages:
+                jobs.append((stage_graph, (main_path, rows, seed, workdir, rounds)))
+            if 'backend' in stages:
+                jobs.append((stage_backend, (main_path, rows, seed, workdir, repeat)))
+            for func, args in jobs:
+                for name, entry in measure(func, *args).items():
+                    key = f"{name}@{rows}"
+                    results[key] = entry
+                    print(f"{key:<44} {entry['秒']:>9.3f}s {entry['吞吐']:>14,.0f} {entry['单位']:<6} {entry['峰值RSS_MB']:>8.0f} MB", flush=True)
+    return results
+
+
+def environment():
+    return {
+        'python': platform.python_version(), 'platform': platform.platform(), 'cpu': os.cpu_count(),
+        'time': time.strftime('%Y-%m-%d %H:%M:%S'),
+    }
+
+
+# 吞吐下降或峰值内存上升超过 threshold 视为退化；两次耗时都低于 min_seconds 时只比较内存
+def compare(results, baseline, threshold=DEFAULT_THRESHOLD, min_seconds=MIN_SECONDS):
+    regressions = []
+    for key, new in results.items():
+        old = baseline.get(key)
+        if old is None:
+            continue
+        timed = max(new['秒'], old['秒']) >= min_seconds
+        if timed and new['吞吐'] < old['吞吐'] * (1 - threshold):
+            regressions.append((key, '吞吐', old['吞吐'], new['吞吐']))
+        if new['峰值RSS_MB'] > old['峰值RSS_MB'] * (1 + threshold):
+            regressions.append((key, '峰值RSS_MB', old['峰值RSS_MB'], new['峰值RSS_MB']))
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description="可复现的回归基准套件")
+    parser.add_argument('--rows', type=int, nargs='+', default=[1000, 100000], help="可选 1000000 10000000")
+    parser.add_argument('--formats', nargs='+', choices=FORMATS, default=FORMATS)
+    parser.add_argument('--stages', nargs='+', choices=STAGES, default=STAGES)
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--repeat', type=int, default=200, help="每个接口的请求次数")
+    parser.add_argument('--rounds', type=int, default=DEFAULT_ROUNDS, help="非接口阶段重复次数 (取最快一次)")
+    parser.add_argument('--min-seconds', type=float, default=MIN_SECONDS, help="耗时低于此值的条目不比较吞吐")
+    parser.add_argument('--data-dir', default=DATA_DIR)
+    parser.add_argument('--out', default=RESULT_PATH)
+    parser.add_argument('--baseline', default=BASELINE_PATH)
+    parser.add_argument('--save-baseline', action='store_true', help="把本次结果写为新基线")
+    parser.add_argument('--threshold', type=float, default=DEFAULT_THRESHOLD)
+    args = parser.parse_args()
+
+    print(f"{'阶段@行数':<44} {'耗时':>10} {'吞吐':>14} {'':<6} {'峰值RSS':>11}")
+    results = run_suite(args.rows, args.formats, args.stages, args.seed, args.repeat, args.data_dir, args.rounds)
+    report = {'env': environment(), 'seed': args.seed, 'rounds': args.rounds, 'results': results}
+    os.makedirs(os.path.dirname(args.out) or '.', exist_ok=True)
+    with open(args.out, 'w', encoding='utf-8') as f:
+        json.dump(report, f, ensure_ascii=False, indent=2)
+    print(f"✅ 结果已写入 {args.out}")
+
+    if args.save_baseline:
+        with open(args.baseline, 'w', encoding='utf-8') as f:
+            json.dump(report, f, ensure_ascii=False, indent=2)
+        print(f"✅ 基线已更新 {args.baseline}")
+        return
+    if not os.path.exists(args.baseline):
+        print(f"⚠️ 未找到基线 {args.baseline}，使用 --save-baseline 生成")
+        return
+    with open(args.baseline, encoding='utf-8') as f:
+        baseline = json.load(f)
+    regressions = compare(results, baseline['results'], args.threshold, args.min_seconds)
+    for key, field, old, new in regressions:
+        print(f"❌ {key} {field}: {old:,.1f} → {new:,.1f} ({(new - old) / old:+.0%})")
+    if regressions:
+        sys.exit(1)
+    print(f"✅ 与基线 ({baseline['env']['time']}) 相比无超过 {args.threshold:.0%} 的退化")
+
+
+if __name__ == '__main__':
+    main()
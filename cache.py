@@ -0,0 +1,136 @@
+import hashlib
+import os
+import pickle
+import shutil
+import threading
+from collections import OrderedDict
+
+# ==========================================
+# 🗄️ 结果缓存：内存 LRU + 磁盘分层 (按内容哈希复用 process_data 结果)
+# ==========================================
+
+CACHE_DIR = os.environ.get('TCM_CACHE_DIR', os.path.join(os.path.dirname(os.path.abspath(__file__)), '.tcm_cache'))
+
+
+def content_hash(data):
+    return hashlib.sha256(data).hexdigest()
+
+
+# process_data / process_stream 产出的表结构或计算逻辑变化时递增，旧版本的磁盘结果 (results/、shared/、stream/)
+# 不再命中，随容量淘汰
+SCHEMA_VERSION = 3
+
+
+def make_key(file_hash, seed):
+    return f"{file_hash}-{seed}-v{SCHEMA_VERSION}"
+
+
+def dir_bytes(directory):
+    return sum(e.stat().st_size for e in os.scandir(directory) if e.is_file())
+
+
+# 各级磁盘缓存 (results/、shared/、stream/、docking/、ingest/) 共用的容量淘汰：
+# root 下每个文件或子目录为一项，按总字节数淘汰，最久未访问 (mtime) 的先删。
+# keep 中的项 (名称或路径) 计入总量但不删除；exclude 后缀的项 (写入中的临时文件) 既不计入也不删除。
+def evict_lru(root, max_bytes, keep=(), exclude=('.tmp',)):
+    if not os.path.isdir(root):
+        return
+    keep = {os.path.basename(os.path.normpath(k)) for k in keep}
+    entries = []
+    for e in os.scandir(root):
+        if e.name.endswith(tuple(exclude)):
+            continue
+        try:
+            size = dir_bytes(e.path) if e.is_dir() else e.stat().st_size
+            entries.append((e.stat().st_mtime, size, e.name, e.path, e.is_dir()))
+        except OSError:
+            continue
+    total = sum(entry[1] for entry in entries)
+    for _, size, name, path, is_dir in sorted(entries):
+        if total <= max_bytes:
+            break
+        if name in keep:
+            continue
+        if is_dir:
+            shutil.rmtree(path, ignore_errors=True)
+        else:
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+        total -= size
+
+
+class ResultCache:
+    def __init__(self, directory=None, max_items=8, max_disk_bytes=512 * 1024 * 1024):
+        self.directory = os.path.join(directory or CACHE_DIR, 'results')
+        self.max_items = max_items
+        self.max_disk_bytes = max_disk_bytes
+        self._memory = OrderedDict()
+        self._lock = threading.Lock()
+        self.mem_hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+        os.makedirs(self.directory, exist_ok=True)
+
+    def _path(self, key):
+        return os.path.join(self.directory, f"{key}.pkl")
+
+    def get(self, key):
+        with self._lock:
+            if key in self._memory:
+                self._memory.move_to_end(key)
+                self.mem_hits += 1
+                return self._memory[key]
+        path = self._path(key)
+        try:
+            with open(path, 'rb') as f:
+                value = pickle.load(f)
+            os.utime(path)
+        except (OSError, pickle.UnpicklingError, EOFError):
+            with self._lock:
+                self.misses += 1
+            return None
+        with self._lock:
+            self.disk_hits += 1
+            self._remember(key, value)
+        return value
+
+    def put(self, key, value):
+        with self._lock:
+            self._remember(key, value)
+        # 先写临时文件再原子替换，避免并发会话读到半截文件
+        path = self._path(key)
+        tmp = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        with open(tmp, 'wb') as f:
+            pickle.dump(value, f, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(tmp, path)
+        self._evict_disk()
+
+    def get_or_compute(self, key, compute):
+        value = self.get(key)
+        if value is None:
+            value = compute()
+            self.put(key, value)
+        return value
+
+    def _remember(self, key, value):
+        self._memory[key] = value
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.max_items:
+            self._memory.popitem(last=False)
+
+    # 磁盘层按总字节数淘汰，最久未访问 (mtime) 的先删
+    def _evict_disk(self):
+        evict_lru(self.directory, self.max_disk_bytes)
+
+    @property
+    def hits(self):
+        return self.mem_hits + self.disk_hits
+
+    def stats(self):
+        total = self.hits + self.misses
+        return {
+            '内存命中': self.mem_hits, '磁盘命中': self.disk_hits, '未命中': self.misses,
+            '命中率': self.hits / total if total else 0.0, '内存条目': len(self._memory)
+        }
@@ -0,0 +1,112 @@
+import hashlib
+
+import networkx as nx
+import numpy as np
+import pandas as pd
+import scipy.sparse as sp
+
+# ==========================================
+# 🕸️ 共现网络引擎：稀疏对称矩阵 (CSR)，重复边权重累加
+# ==========================================
+# 矩阵始终是对称、对角线为 0 的 CSR；NetworkX 图只在需要布局/复杂算法时再从矩阵生成。
+
+
+class CooccurrenceGraph:
+    def __init__(self, matrix, labels):
+        self.matrix = matrix.tocsr()
+        self.matrix.sum_duplicates()
+        self.labels = np.asarray(labels, dtype=object)
+        self._fingerprint = None
+
+    # 处方长表：每行一个 (处方ID, 中药)；同一处方内的每对药材共现一次
+    @classmethod
+    def from_prescriptions(cls, prescription_ids, herbs):
+        rx_codes, _ = pd.factorize(pd.Series(prescription_ids), sort=False)
+        herb_codes, labels = pd.factorize(pd.Series(herbs), sort=True)
+        valid = (rx_codes >= 0) & (herb_codes >= 0)
+        rx_codes, herb_codes = rx_codes[valid], herb_codes[valid]
+        incidence = sp.csr_matrix(
+            (np.ones(len(rx_codes), dtype=np.float32), (rx_codes, herb_codes)),
+            shape=(rx_codes.max() + 1 if len(rx_codes) else 0, len(labels))
+        )
+        # 同一处方里重复出现的药材只算一次
+        incidence.sum_duplicates()
+        incidence.data[:] = 1.0
+        matrix = (incidence.T @ incidence).tocsr()
+        matrix.setdiag(0)
+        matrix.eliminate_zeros()
+        return cls(matrix, labels)
+
+    # 加权边表 (源, 目标, 权重) 的元组列表或三列 DataFrame：重复边权重求和，自环丢弃
+    @classmethod
+    def from_edges(cls, edges, labels=None):
+        if isinstance(edges, pd.DataFrame):
+            frame = edges.set_axis(['源', '目标', '权重'], axis=1)
+        else:
+            frame = pd.DataFrame(list(edges), columns=['源', '目标', '权重'])
+        if labels is None:
+            labels = np.unique(np.concatenate([frame['源'].to_numpy(dtype=object), frame['目标'].to_numpy(dtype=object)])) if len(frame) else []
+        index = pd.Index(labels)
+        src, dst = index.get_indexer(frame['源']), index.get_indexer(frame['目标'])
+        keep = (src >= 0) & (dst >= 0) & (src != dst)
+        src, dst = src[keep], dst[keep]
+        weight = frame['权重'].to_numpy(dtype=np.float32)[keep]
+        n = len(index)
+        matrix = sp.coo_matrix(
+            (np.concatenate([weight, weight]), (np.concatenate([src, dst]), np.concatenate([dst, src]))), shape=(n, n)
+        ).tocsr()
+        matrix.sum_duplicates()
+        return cls(matrix, index.to_numpy(dtype=object))
+
+    @property
+    def n_nodes(self):
+        return self.matrix.shape[0]
+
+    @property
+    def n_edges(self):
+        return self.matrix.nnz // 2
+
+    def density(self):
+        n = self.n_nodes
+        return 2 * self.n_edges / (n * (n - 1)) if n > 1 else 0.0
+
+    def degree(self):
+        return np.diff(self.matrix.indptr)
+
+    def degree_centrality(self):
+        n = self.n_nodes
+        return pd.Series(self.degree() / (n - 1) if n > 1 else np.zeros(n), index=self.labels)
+
+    def threshold(self, min_weight):
+        matrix = self.matrix.copy()
+        matrix.data[matrix.data < min_weight] = 0
+        matrix.eliminate_zeros()
+        return CooccurrenceGraph(matrix, self.labels)
+
+    # 每个节点保留权重最大的 k 条边；一条边只要是任一端点的 top-k 就保留
+    def top_k(self, k):
+        matrix = self.matrix
+        rows = np.repeat(np.arange(self.n_nodes), np.diff(matrix.indptr))
+        order = np.lexsort((-matrix.data, rows))
+        rank = np.empty(len(order), dtype=np.int64)
+        rank[order] = np.arange(len(order)) - matrix.indptr[rows[order]]
+        keep = rank < k
+        pruned = sp.csr_matrix((matrix.data[keep], (rows[keep], matrix.indices[keep])), shape=matrix.shape)
+        return CooccurrenceGraph(pruned.maximum(pruned.T), self.labels)
+
+    def edge_arrays(self):
+        upper = sp.triu(self.matrix, k=1).tocoo()
+        return upper.row, upper.col, upper.data
+
+    def fingerprint(self):
+        if self._fingerprint is None:
+            h = hashlib.sha256()
+            for arr in (self.matrix.indptr, self.matrix.indices, self.matrix.data):
+                h.update(np.ascontiguousarray(arr).tobytes())
+            h.update('\x1f'.join(map(str, self.labels)).encode('utf-8'))
+            self._fingerprint = h.hexdigest()[:16]
+        return self._fingerprint
+
+    def to_networkx(self):
+        G = nx.from_scipy_sparse_array(self.matrix, edge_attribute='weight')
+        return nx.relabel_nodes(G, dict(enumerate(self.labels)))
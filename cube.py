@@ -0,0 +1,121 @@
+import numpy as np
+import pandas as pd
+
+# ==========================================
+# 🧊 药性多维立方体：产地 × 类别 × 四气 × 五味 × 归经 × 巅峰朝代 预聚合
+# ==========================================
+# 维度整数编码后打包成一个 int64 键 (每维 ceil(log2(max_categories)) 位)，只存有数据的单元：
+# 有序键数组 + 行数 / 各度量的 和 / 非空计数 (均值 = 和 / 计数)，内存与实际出现的组合数成正比，
+# 不随各维基数之积膨胀。新数据按块 update，与已有单元合并后按键重新归并。
+# 看板的分组汇总都从这里上卷 / 切片，不再重复扫描全表。
+
+DIMENSIONS = ['产地', '类别', '四气', '五味', '归经', '巅峰朝代']
+MEASURES = ['频次', '剂量', '年降雨', '土壤pH']
+MISSING = '未知'
+OTHER = '其他'
+MAX_CATEGORIES = 64
+
+
+class PropertyCube:
+    def __init__(self, dimensions=DIMENSIONS, measures=MEASURES, max_categories=MAX_CATEGORIES):
+        self.dimensions = list(dimensions)
+        self.measures = list(measures)
+        self.max_categories = max_categories
+        self.vocab = {d: [] for d in self.dimensions}
+        self._index = {d: {} for d in self.dimensions}
+        self._bits = max(1, int(np.ceil(np.log2(max_categories))))
+        self.keys = np.zeros(0, dtype=np.int64)
+        self.rows = np.zeros(0)
+        self.sums = {m: np.zeros(0) for m in self.measures}
+        self.counts = {m: np.zeros(0) for m in self.measures}
+
+    @classmethod
+    def from_frame(cls, df, **kwargs):
+        return cls(**kwargs).update(df)
+
+    # 有数据的单元数
+    @property
+    def n_cells(self):
+        return self.keys.size
+
+    @property
+    def n_rows(self):
+        return int(self.rows.sum())
+
+    # 先局部 factorize，只对唯一值查词表；每个维度最多 max_categories 个取值，超出的新值并入 '其他'
+    def _encode(self, dim, values):
+        local, uniques = pd.factorize(values, use_na_sentinel=True)
+        labels = [str(u) for u in uniques] + ([MISSING] if (local < 0).any() else [])
+        index, vocab = self._index[dim], self.vocab[dim]
+        for value in labels:
+            if value in index:
+                continue
+            if len(vocab) < self.max_categories - 1 or value == OTHER:
+                index[value] = len(vocab)
+                vocab.append(value)
+            elif OTHER not in index:
+                index[OTHER] = len(vocab)
+                vocab.append(OTHER)
+        # 缺失值的局部编码为 -1，恰好取到末尾的 '未知'
+        mapping = np.array([index.get(v, index.get(OTHER, -1)) for v in labels], dtype=np.int64)
+        return mapping[local]
+
+    def _pack(self, codes):
+        key = np.zeros(len(codes[0]), dtype=np.int64)
+        for axis, code in enumerate(codes):
+            key |= code << (self._bits * axis)
+        return key
+
+    def _codes(self, dim, keys):
+        return (keys >> (self._bits * self.dimensions.index(dim))) & ((1 << self._bits) - 1)
+
+    def update(self, df):
+        if len(df) == 0:
+            return self
+        codes = [self._encode(d, df[d].to_numpy() if d in df.columns else np.full(len(df), None)) for d in self.dimensions]
+        keys, inverse = np.unique(np.concatenate([self.keys, self._pack(codes)]), return_inverse=True)
+
+        def merge(current, new):
+            return np.bincount(inverse, weights=np.concatenate([current, new]), minlength=keys.size)
+
+        self.rows = merge(self.rows, np.ones(len(df)))
+        for m in self.measures:
+            if m in df.columns:
+                values = pd.to_numeric(df[m], errors='coerce').to_numpy(np.float64)
+                ok = np.isfinite(values)
+                new_sums, new_counts = np.where(ok, values, 0.0), ok.astype(np.float64)
+            else:
+                new_sums = new_counts = np.zeros(len(df))
+            self.sums[m] = merge(self.sums[m], new_sums)
+            self.counts[m] = merge(self.counts[m], new_counts)
+        self.keys = keys
+        return self
+
+    # 上卷到 by 维度 (可按 where 切片)，返回 by 列 + 度量列 + 计数，按 by 排序
+    def query(self, by, measures=None, agg='sum', where=None):
+        by = [by] if isinstance(by, str) else list(by)
+        measures = [measures] if isinstance(measures, str) else list(measures or [])
+        where = where or {}
+        mask = np.ones(self.keys.size, dtype=bool)
+        for dim, wanted in where.items():
+            wanted = wanted if isinstance(wanted, (list, tuple, set)) else [wanted]
+            mask &= np.isin(self._codes(dim, self.keys), [self._index[dim][v] for v in wanted if v in self._index[dim]])
+        keys = self.keys[mask]
+        # 只保留 by 维度的位，按新键归并即为上卷
+        group = np.zeros(keys.size, dtype=np.int64)
+        for i, dim in enumerate(by):
+            group |= self._codes(dim, keys) << (self._bits * i)
+        cells, inverse = np.unique(group, return_inverse=True)
+
+        def rollup(array):
+            return np.bincount(inverse, weights=array[mask], minlength=cells.size)
+
+        out = {d: np.asarray(self.vocab[d], dtype=object)[(cells >> (self._bits * i)) & ((1 << self._bits) - 1)] for i, d in enumerate(by)}
+        for m in measures:
+            total = rollup(self.sums[m])
+            if agg == 'mean':
+                with np.errstate(invalid='ignore', divide='ignore'):
+                    total = total / rollup(self.counts[m])
+            out[m] = total
+        out['计数'] = rollup(self.rows).astype(np.int64)
+        return pd.DataFrame(out, columns=by + measures + ['计数']).sort_values(by, kind='stable').reset_index(drop=True)
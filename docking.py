@@ -0,0 +1,161 @@
+import json
+import os
+
+import numpy as np
+import pandas as pd
+
+from cache import CACHE_DIR, evict_lru
+
+# ==========================================
+# 🧲 对接矩阵：药材 × 靶点 稠密 float32，轴整数编码，.npy 内存映射持久化
+# ==========================================
+# 结合能越低结合越强；缺失值为 NaN，排序时视作 +inf。
+# 同一 (药材, 靶点) 多条记录取均值，与原 pivot_table(aggfunc='mean') 一致。
+# 落盘目录按总字节数淘汰，最久未使用的数据集先删。
+
+DOCKING_DIR = os.path.join(CACHE_DIR, 'docking')
+MAX_DOCKING_BYTES = 2 * 1024 * 1024 * 1024
+STRONG_BINDING = -7.0
+
+
+class DockingMatrix:
+    def __init__(self, values, herbs, targets):
+        self.values = values
+        self.herbs = list(herbs)
+        self.targets = list(targets)
+        self.herb_index = {h: i for i, h in enumerate(self.herbs)}
+        self.target_index = {t: j for j, t in enumerate(self.targets)}
+
+    @classmethod
+    def from_long(cls, df, herb_col='中药', target_col='靶点', value_col='结合能'):
+        h_codes, herbs = pd.factorize(df[herb_col], sort=False)
+        t_codes, targets = pd.factorize(df[target_col], sort=False)
+        shape = (len(herbs), len(targets))
+        flat = h_codes.astype(np.int64) * shape[1] + t_codes
+        values = df[value_col].to_numpy(np.float64)
+        ok = (h_codes >= 0) & (t_codes >= 0) & np.isfinite(values)
+        total = np.bincount(flat[ok], weights=values[ok], minlength=shape[0] * shape[1])
+        count = np.bincount(flat[ok], minlength=shape[0] * shape[1])
+        with np.errstate(invalid='ignore', divide='ignore'):
+            mean = (total / count).astype(np.float32)
+        return cls(mean.reshape(shape), herbs, targets)
+
+    @property
+    def shape(self):
+        return self.values.shape
+
+    def _ranked(self):
+        return np.where(np.isnan(self.values), np.inf, self.values)
+
+    def frame(self, herbs=None, targets=None):
+        rows = [self.herb_index[h] for h in herbs] if herbs is not None else slice(None)
+        cols = [self.target_index[t] for t in targets] if targets is not None else slice(None)
+        values = np.asarray(self.values[rows][:, cols])
+        return pd.DataFrame(values, index=pd.Index(np.asarray(self.herbs, dtype=object)[rows], name='中药'),
+                            columns=pd.Index(np.asarray(self.targets, dtype=object)[cols], name='靶点'))
+
+    # 每个靶点结合最强的 k 味药：沿药材轴 argpartition，O(H·T)
+    def top_binders(self, k=5, targets=None):
+        cols = np.array([self.target_index[t] for t in targets]) if targets is not None else np.arange(self.shape[1])
+        block = self._ranked()[:, cols]
+        k = min(k, block.shape[0])
+        if k == 0:
+            return pd.DataFrame(columns=['靶点', '排名', '中药', '结合能'])
+        idx = np.argpartition(block, k - 1, axis=0)[:k]
+        order = np.argsort(np.take_along_axis(block, idx, axis=0), axis=0)
+        idx = np.take_along_axis(idx, order, axis=0)
+        energy = np.take_along_axis(block, idx, axis=0)
+        out = pd.DataFrame({
+            '靶点': np.tile(np.asarray(self.targets, dtype=object)[cols], k),
+            '排名': np.repeat(np.arange(1, k + 1), len(cols)),
+            '中药': np.asarray(self.herbs, dtype=object)[idx.ravel()],
+            '结合能': energy.ravel(),
+        })
+        return out[np.isfinite(out['结合能'])].sort_values(['靶点', '排名'], kind='stable').reset_index(drop=True)
+
+    # 每味药结合最强的 k 个靶点
+    def best_targets(self, k=3, herbs=None):
+        rows = np.array([self.herb_index[h] for h in herbs]) if herbs is not None else np.arange(self.shape[0])
+        block = self._ranked()[rows]
+        k = min(k, block.shape[1])
+        if k == 0:
+            return pd.DataFrame(columns=['中药', '排名', '靶点', '结合能'])
+        idx = np.argpartition(block, k - 1, axis=1)[:, :k]
+        order = np.argsort(np.take_along_axis(block, idx, axis=1), axis=1)
+        idx = np.take_along_axis(idx, order, axis=1)
+        energy = np.take_along_axis(block, idx, axis=1)
+        out = pd.DataFrame({
+            '中药': np.repeat(np.asarray(self.herbs, dtype=object)[rows], k),
+            '排名': np.tile(np.arange(1, k + 1), len(rows)),
+            '靶点': np.asarray(self.targets, dtype=object)[idx.ravel()],
+            '结合能': energy.ravel(),
+        })
+        return out[np.isfinite(out['结合能'])].reset_index(drop=True)
+
+    # 全局最强的 k 对 (药材, 靶点)
+    def strongest(self, k=10):
+        flat = self._ranked().ravel()
+        k = min(k, int(np.isfinite(flat).sum()))
+        if k == 0:
+            return pd.DataFrame(columns=['中药', '靶点', '结合能'])
+        idx = np.argpartition(flat, k - 1)[:k]
+        idx = idx[np.argsort(flat[idx])]
+        h, t = np.divmod(idx, self.shape[1])
+        return pd.DataFrame({
+            '中药': np.asarray(self.herbs, dtype=object)[h],
+            '靶点': np.asarray(self.targets, dtype=object)[t],
+            '结合能': flat[idx],
+        })
+
+    def threshold(self, cutoff=STRONG_BINDING):
+        h, t = np.nonzero(self._ranked() <= cutoff)
+        return pd.DataFrame({
+            '中药': np.asarray(self.herbs, dtype=object)[h],
+            '靶点': np.asarray(self.targets, dtype=object)[t],
+            '结合能': np.asarray(self.values[h, t]),
+        })
+
+    # 热图只展示结合最强的若干药材 / 靶点，避免数千基因时绘制巨型矩阵
+    def heatmap_frame(self, max_herbs=40, max_targets=40):
+        ranked = self._ranked()
+        herb_score = ranked.min(axis=1, initial=np.inf)
+        target_score = ranked.min(axis=0, initial=np.inf)
+        rows = np.sort(np.argsort(herb_score, kind='stable')[:max_herbs])
+        cols = np.sort(np.argsort(target_score, kind='stable')[:max_targets])
+        return self.frame([self.herbs[i] for i in rows], [self.targets[j] for j in cols])
+
+    # 两个文件都先写临时文件再原子替换；values.npy 最后就位，作为写入完成的标志
+    def save(self, directory):
+        os.makedirs(directory, exist_ok=True)
+        tmp_values = os.path.join(directory, f"values.{os.getpid()}.npy")
+        tmp_axes = os.path.join(directory, f"axes.{os.getpid()}.json")
+        np.save(tmp_values, np.ascontiguousarray(self.values, dtype=np.float32))
+        with open(tmp_axes, 'w', encoding='utf-8') as f:
+            json.dump({'herbs': [str(h) for h in self.herbs], 'targets': [str(t) for t in self.targets]}, f, ensure_ascii=False)
+        os.replace(tmp_axes, os.path.join(directory, 'axes.json'))
+        os.replace(tmp_values, os.path.join(directory, 'values.npy'))
+
+    @classmethod
+    def load(cls, directory, mmap=True):
+        with open(os.path.join(directory, 'axes.json'), encoding='utf-8') as f:
+            axes = json.load(f)
+        values = np.load(os.path.join(directory, 'values.npy'), mmap_mode='r' if mmap else None)
+        return cls(values, axes['herbs'], axes['targets'])
+
+
+# 按总字节数淘汰数据集目录，最久未使用 (mtime) 的先删；已映射的文件删除后仍可继续读取
+def evict(directory=DOCKING_DIR, max_bytes=MAX_DOCKING_BYTES, keep=None):
+    evict_lru(directory, max_bytes, keep=() if keep is None else (keep,))
+
+
+# 按数据集键落盘：首次从长表构建，之后直接内存映射 (并刷新 mtime)
+def load_or_build(dataset_key, df_dock, directory=None, max_bytes=MAX_DOCKING_BYTES):
+    root = directory or DOCKING_DIR
+    path = os.path.join(root, dataset_key)
+    if os.path.exists(os.path.join(path, 'values.npy')):
+        os.utime(path)
+        return DockingMatrix.load(path)
+    matrix = DockingMatrix.from_long(df_dock)
+    matrix.save(path)
+    evict(root, max_bytes, keep=path)
+    return DockingMatrix.load(path)
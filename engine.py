@@ -0,0 +1,183 @@
+import numpy as np
+import pandas as pd
+from datetime import datetime
+
+from admet import POSITIVE_THRESHOLD, annotate
+from enrichment import go_table
+from geo import CHINA_CENTER, province_coords
+from price_store import resample_ohlc, simulate_quotes
+from profiling import section
+
+# ==========================================
+# 🛠️ 核心引擎：列式向量化补全 (TCM-LMH 中文内核)
+# ==========================================
+# 所有随机列都由同一个 numpy.random.Generator 整列生成，传入相同 seed 可完整复现。
+
+# 1. 基础药材池
+HERBS_POOL = [
+    '石菖蒲', '全蝎', '蜈蚣', '天麻', '川芎', '僵蚕', '柴胡', '当归', '白芍', '茯苓',
+    '甘草', '半夏', '胆南星', '郁金', '远志', '酸枣仁', '龙骨', '牡蛎', '钩藤', '地龙'
+]
+
+# 🛡️ 智能列名映射 (兼容中英文表头)
+COL_MAP = {
+    'Medicine': '中药', 'Name': '中药', 'Herb': '中药',
+    'Frequency': '频次', 'Freq': '频次', 'Count': '频次',
+    'Origin': '产地', 'Dose': '剂量',
+    'Prescription': '处方ID', 'PrescriptionID': '处方ID', '处方': '处方ID'
+}
+
+# 补全规则：('choice', 候选值) | ('int', 下界, 上界) 闭区间 | ('float', 下界, 上界, 小数位)
+GENERATORS = {
+    '类别': ('choice', ['开窍药', '息风止痉药', '活血化瘀药', '补气药', '清热药', '化痰药', '安神药']),
+    '四气': ('choice', ['温', '平', '寒', '凉', '热']),
+    '五味': ('choice', ['辛', '苦', '甘', '酸', '咸']),
+    '归经': ('choice', ['肝经', '心经', '脾经', '肺经', '肾经']),
+    '剂量': ('int', 3, 15),
+    '巅峰朝代': ('choice', ['汉代', '唐代', '宋代', '金元', '明代', '清代']),
+    '分子量': ('int', 150, 600),
+    'LogP': ('float', 0.5, 5.5, 2),
+    'OB': ('float', 20, 90, 2),
+    '产地': ('choice', ['四川', '安徽', '甘肃', '河南', '内蒙古', '浙江', '云南', '山西', '湖北']),
+    '海拔': ('int', 500, 3000),
+    '价格': ('int', 10, 500),
+    '土壤pH': ('float', 5.5, 7.5, 1),
+    '年降雨': ('int', 400, 1200),
+    'TPSA': ('int', 40, 140),
+    'HBD': ('int', 0, 6),
+    'HBA': ('int', 1, 12),
+    'RotB': ('int', 0, 14),
+    '芳香环': ('int', 0, 4),
+    '警示结构': ('int', 0, 2)
+}
+
+TARGET_POOL = ['GABRA1', 'SCN1A', 'BDNF', 'IL6', 'TNF', 'MAPK1', 'PIK3CA']
+
+GEO_COLUMNS = ['中药', '产地', '纬度', '经度', '频次']
+DOCK_COLUMNS = ['中药', '靶点', '结合能']
+ADMET_COLUMNS = ['中药', 'Caco-2透膜', 'BBB穿透', '毒性评分']
+REFS_COLUMNS = ['中药', '类型', '期刊', '标题', '年份', '影响因子']
+TRIALS_COLUMNS = ['中药', '阶段', '样本量', '状态']
+
+
+def generate_column(spec, n, rng):
+    kind = spec[0]
+    if kind == 'choice':
+        return np.asarray(spec[1], dtype=object)[rng.integers(0, len(spec[1]), n)]
+    if kind == 'int':
+        return rng.integers(spec[1], spec[2] + 1, n)
+    return np.round(rng.uniform(spec[1], spec[2], n), spec[3])
+
+
+# 2. 初始化数据
+def prepare_base(uploaded_df, rng):
+    if uploaded_df is None:
+        return pd.DataFrame({'中药': HERBS_POOL, '频次': generate_column(('int', 50, 1200), len(HERBS_POOL), rng)})
+
+    df = uploaded_df.rename(columns=COL_MAP)
+    if '中药' not in df.columns:
+        df['中药'] = generate_column(('choice', HERBS_POOL), len(df), rng)
+    if '频次' not in df.columns:
+        df['频次'] = generate_column(('int', 50, 1000), len(df), rng)
+    return df
+
+
+# 3. 🛡️ 强制补全 30+ 维度 (整列生成，一次性拼接避免碎片化)
+# QED / 毒性评分 不再随机生成，缺失时由理化描述符批量计算 (见 admet.py)
+def fill_columns(df, rng):
+    missing = {col: generate_column(spec, len(df), rng) for col, spec in GENERATORS.items() if col not in df.columns}
+    if missing:
+        df = df.assign(**missing)
+    return annotate(df)
+
+
+# 4. 生成衍生数据表
+def derive_tables(df, rng, target_pool=TARGET_POOL):
+    n = len(df)
+    herbs = df['中药'].to_numpy()
+    freq = df['频次'].to_numpy()
+
+    # 地图：已知产地 (按省份名向量化查找) 取坐标并抖动，未知产地归入 '未知'
+    origin = df['产地']
+    lat, lon = province_coords(origin)
+    known = np.isfinite(lat)
+    jitter = rng.uniform(-0.1, 0.1, (2, n))
+    df_geo = pd.DataFrame({
+        '中药': herbs,
+        '产地': np.where(known, origin.to_numpy(dtype=object), '未知'),
+        '纬度': np.where(known, lat + jitter[0], CHINA_CENTER[0]),
+        '经度': np.where(known, lon + jitter[1], CHINA_CENTER[1]),
+        '频次': freq
+    }, columns=GEO_COLUMNS)
+
+    # 对接：药材 × 靶点 交叉连接 (药材优先顺序)
+    t = len(target_pool)
+    df_dock = pd.DataFrame({
+        '中药': np.repeat(herbs, t),
+        '靶点': np.tile(np.asarray(target_pool, dtype=object), n),
+        '结合能': np.round(rng.uniform(-11.5, -4.5, n * t), 1)
+    }, columns=DOCK_COLUMNS)
+
+    # ADMET：取打分模型的概率列，按 0.5 判定
+    df_admet = pd.DataFrame({
+        '中药': herbs,
+        'Caco-2透膜': np.where(df['Caco-2概率'].to_numpy() >= POSITIVE_THRESHOLD, '高', '中'),
+        'BBB穿透': np.where(df['BBB概率'].to_numpy() >= POSITIVE_THRESHOLD, '是', '否'),
+        '毒性评分': df['毒性评分'].to_numpy()
+    }, columns=ADMET_COLUMNS)
+
+    # 文献
+    df_refs = pd.DataFrame({
+        '中药': herbs,
+        '类型': generate_column(('choice', ['RCT', 'Meta分析', '综述']), n, rng),
+        '期刊': 'J Ethnopharmacol',
+        '标题': df['中药'].astype(str).to_numpy(dtype=object) + '的作用机制研究',
+        '年份': generate_column(('int', 2018, 2024), n, rng),
+        '影响因子': rng.uniform(1, 10, n)
+    }, columns=REFS_COLUMNS)
+
+    # 临床
+    df_trials = pd.DataFrame({
+        '中药': herbs,
+        '阶段': generate_column(('choice', ['I期', 'II期', 'III期']), n, rng),
+        '样本量': generate_column(('int', 50, 500), n, rng),
+        '状态': generate_column(('choice', ['已完成', '招募中']), n, rng)
+    }, columns=TRIALS_COLUMNS)
+
+    return df_geo, df_dock, df_admet, df_refs, df_trials
+
+
+# 模拟价格K线：取首味药的仿真报价，按日重采样为 OHLC
+def simulate_price(rng, periods=30, herb=HERBS_POOL[0]):
+    end = pd.Timestamp(datetime.today()).normalize()
+    quotes = simulate_quotes([herb], end - pd.Timedelta(days=periods - 1), end, rng)
+    return resample_ohlc(quotes['时间'].to_numpy(), quotes['价格'].to_numpy(), quotes['成交量'].to_numpy(), 'D')
+
+
+# 网络边
+def simulate_edges(herbs, rng):
+    herbs = np.asarray(herbs, dtype=object)
+    if len(herbs) <= 1:
+        return []
+    m = len(herbs) * 4
+    src = herbs[rng.integers(0, len(herbs), m)]
+    dst = herbs[rng.integers(0, len(herbs), m)]
+    w = rng.integers(10, 101, m)
+    return list(zip(src.tolist(), dst.tolist(), w.tolist()))
+
+
+def process_data(uploaded_df=None, seed=None):
+    rng = np.random.default_rng(seed)
+    with section('process_data.prepare_base', 'stage'):
+        df = prepare_base(uploaded_df, rng)
+    with section('process_data.fill_columns', 'stage'):
+        df = fill_columns(df, rng)
+    with section('process_data.derive_tables', 'stage'):
+        df_geo, df_dock, df_admet, df_refs, df_trials = derive_tables(df, rng)
+    with section('process_data.simulate_price', 'stage'):
+        df_price = simulate_price(rng)
+    with section('process_data.simulate_edges', 'stage'):
+        edges = simulate_edges(df['中药'].to_numpy(), rng)
+    with section('process_data.go_table', 'stage'):
+        df_go = go_table(df_dock)
+    return df, edges, df_geo, df_dock, df_admet, df_refs, df_trials, df_price, df_go
@@ -0,0 +1,223 @@
+import atexit
+import functools
+import multiprocessing
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import pandas as pd
+import scipy.sparse as sp
+from scipy.special import gammaln
+
+from docking import STRONG_BINDING
+
+# ==========================================
+# 🧬 通路 / GO 富集：超几何检验 + BH-FDR，全部术语一次向量化
+# ==========================================
+# 基因集为本地 GMT 文件 (data/genesets/*.gmt，文件名即来源，如 KEGG / GO_BP)；
+# 可直接放入 MSigDB 等完整 GMT 扩充。查询 × 术语 的重叠数由一次稀疏矩阵乘得到，
+# 药材数量多时按块分发到进程池；进程池首次需要时创建并随引擎复用，shutdown() 释放。
+
+GENESET_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'data', 'genesets')
+SOURCE_LABELS = {'GO_BP': '生物过程', 'GO_MF': '分子功能', 'GO_CC': '细胞组分', 'KEGG': 'KEGG通路'}
+FDR_CUTOFF = 0.05
+PARALLEL_MIN_QUERIES = 512
+
+RESULT_COLUMNS = ['术语', '分类', '计数', 'P值', 'FDR', '富集倍数', '基因集大小', '编号', '基因']
+
+
+def read_gmt(path):
+    with open(path, encoding='utf-8') as f:
+        for line in f:
+            parts = line.rstrip('\n').split('\t')
+            if len(parts) >= 3:
+                yield parts[0], parts[1] or parts[0], [g for g in parts[2:] if g]
+
+
+class GeneSetLibrary:
+    def __init__(self, sets, background=None):
+        self.ids = [s[0] for s in sets]
+        self.names = [s[1] for s in sets]
+        self.sources = [s[2] for s in sets]
+        genes = sorted({g for s in sets for g in s[3]} | set(background or ()))
+        self.genes = genes
+        self.gene_index = {g: i for i, g in enumerate(genes)}
+        rows = np.repeat(np.arange(len(sets)), [len(set(s[3])) for s in sets])
+        cols = [self.gene_index[g] for s in sets for g in dict.fromkeys(s[3])]
+        self.membership = sp.csr_matrix((np.ones(len(cols), dtype=np.int32), (rows, cols)), shape=(len(sets), len(genes)))
+        self.sizes = np.asarray(self.membership.sum(axis=1)).ravel()
+
+    @classmethod
+    def load(cls, directory=GENESET_DIR, background=None):
+        sets = []
+        for fname in sorted(os.listdir(directory)):
+            if fname.endswith('.gmt'):
+                source = SOURCE_LABELS.get(fname[:-4], fname[:-4])
+                sets += [(tid, name, source, genes) for tid, name, genes in read_gmt(os.path.join(directory, fname))]
+        return cls(sets, background)
+
+    @property
+    def n_terms(self):
+        return len(self.ids)
+
+    @property
+    def universe(self):
+        return len(self.genes)
+
+    def encode(self, queries):
+        rows, cols = [], []
+        for r, genes in enumerate(queries):
+            ids = {self.gene_index[g] for g in genes if g in self.gene_index}
+            rows += [r] * len(ids)
+            cols += ids
+        return sp.csr_matrix((np.ones(len(cols), dtype=np.int32), (rows, cols)), shape=(len(queries), self.universe))
+
+
+@functools.lru_cache(maxsize=1)
+def default_library():
+    return GeneSetLibrary.load()
+
+
+def log_comb(a, b):
+    return gammaln(a + 1) - gammaln(b + 1) - gammaln(a - b + 1)
+
+
+# P(X ≥ k)：对唯一 (k, K, n) 组合在对数空间逐项累加尾部概率，
+# 越过众数且新增项相对贡献 < e^-40 后停止，所有组合同步向量化推进
+def hypergeom_sf(k, universe, K, n):
+    k, K, n = (np.asarray(a, dtype=np.int64) for a in (k, K, n))
+    if k.size == 0:
+        return np.zeros(0)
+    key = (k * (K.max() + 1) + K) * (n.max() + 1) + n
+    _, first, inverse = np.unique(key, return_index=True, return_inverse=True)
+    k, K, n = (a[first].astype(np.float64) for a in (k, K, n))
+    top = np.minimum(K, n)
+    mode = np.floor((n + 1) * (K + 1) / (universe + 2))
+    log_total = log_comb(universe, n)
+    acc = np.full(k.shape, -np.inf)
+    i = np.maximum(k, np.maximum(n - (universe - K), 0))
+    active = i <= top
+    while active.any():
+        idx = np.flatnonzero(active)
+        ii = i[idx]
+        lp = log_comb(K[idx], ii) + log_comb(universe - K[idx], n[idx] - ii) - log_total[idx]
+        acc[idx] = np.logaddexp(acc[idx], lp)
+        i[idx] = ii + 1
+        active[idx] = (ii + 1 <= top[idx]) & ((ii < mode[idx]) | (lp > acc[idx] - 40))
+    return np.minimum(np.exp(acc), 1.0)[inverse.ravel()]
+
+
+# Benjamini-Hochberg：按查询分组，m 为检验的术语总数 (未命中术语 p=1 排在最后，不影响结果)
+def bh_fdr(pvalues, groups, m):
+    order = np.lexsort((pvalues, groups))
+    p, g = pvalues[order], groups[order]
+    starts = np.r_[0, np.flatnonzero(np.diff(g)) + 1]
+    rank = np.arange(len(p)) - np.repeat(starts, np.diff(np.r_[starts, len(p)])) + 1
+    adjusted = pd.Series(p * m / rank).iloc[::-1].groupby(g[::-1]).cummin().iloc[::-1].to_numpy()
+    out = np.empty_like(adjusted)
+    out[order] = np.minimum(adjusted, 1.0)
+    return out
+
+
+# 一块查询对全部术语做检验，只返回有重叠的 (查询, 术语) 对
+def enrich_block(query_matrix, membership, sizes, universe):
+    overlap = (query_matrix @ membership.T).tocoo()
+    q_sizes = np.asarray(query_matrix.sum(axis=1)).ravel()
+    k, K, n = overlap.data, sizes[overlap.col], q_sizes[overlap.row]
+    pvalues = hypergeom_sf(k, universe, K, n)
+    fdr = bh_fdr(pvalues, overlap.row, membership.shape[0])
+    fold = (k / n) / (K / universe)
+    return overlap.row, overlap.col, k, pvalues, fdr, fold
+
+
+class EnrichmentEngine:
+    def __init__(self, library=None, max_workers=None, parallel_min=PARALLEL_MIN_QUERIES):
+        self.library = library or default_library()
+        self.max_workers = max_workers or os.cpu_count() or 1
+        self.parallel_min = parallel_min
+        self._pool = None
+        self._lock = threading.Lock()
+
+    def _executor(self):
+        with self._lock:
+            if self._pool is None:
+                self._pool = ProcessPoolExecutor(self.max_workers, mp_context=multiprocessing.get_context('spawn'))
+            return self._pool
+
+    def shutdown(self):
+        with self._lock:
+            if self._pool is not None:
+                self._pool.shutdown(cancel_futures=True)
+                self._pool = None
+
+    def _frame(self, rows, cols, k, pvalues, fdr, fold, queries_genes=None, labels=None):
+        lib = self.library
+        out = pd.DataFrame({
+            '术语': np.asarray(lib.names, dtype=object)[cols],
+            '分类': np.asarray(lib.sources, dtype=object)[cols],
+            '计数': k.astype(np.int64),
+            'P值': pvalues,
+            'FDR': fdr,
+            '富集倍数': fold,
+            '基因集大小': lib.sizes[cols],
+            '编号': np.asarray(lib.ids, dtype=object)[cols],
+        })
+        # 重叠基因列表逐行拼接，仅单查询时生成
+        if queries_genes is not None:
+            members = lib.membership
+            out['基因'] = [
+                ",".join(sorted(set(queries_genes[r]) & {lib.genes[j] for j in members.indices[members.indptr[c]:members.indptr[c + 1]]}))
+                for r, c in zip(rows, cols)
+            ]
+        if labels is not None:
+            out.insert(0, '中药', np.asarray(labels, dtype=object)[rows])
+            return out.sort_values(['中药', 'P值'], kind='stable').reset_index(drop=True)
+        return out.sort_values('P值', kind='stable').reset_index(drop=True)
+
+    def enrich(self, genes):
+        genes = [g for g in dict.fromkeys(genes) if g in self.library.gene_index]
+        if not genes:
+            return pd.DataFrame(columns=RESULT_COLUMNS)
+        lib = self.library
+        result = enrich_block(lib.encode([genes]), lib.membership, lib.sizes, lib.universe)
+        return self._frame(*result, queries_genes=[genes])
+
+    # 多味药并行：查询矩阵按行切块，小批量直接在本进程完成
+    def enrich_many(self, queries):
+        labels = list(queries)
+        genes = [[g for g in dict.fromkeys(queries[h]) if g in self.library.gene_index] for h in labels]
+        if not labels:
+            return pd.DataFrame(columns=['中药'] + RESULT_COLUMNS[:-1])
+        lib = self.library
+        Q = lib.encode(genes)
+        if len(labels) < self.parallel_min or self.max_workers == 1:
+            parts = [(0, enrich_block(Q, lib.membership, lib.sizes, lib.universe))]
+        else:
+            bounds = np.linspace(0, len(labels), self.max_workers + 1).astype(int)
+            pool = self._executor()
+            futures = [(lo, pool.submit(enrich_block, Q[lo:hi], lib.membership, lib.sizes, lib.universe))
+                       for lo, hi in zip(bounds[:-1], bounds[1:]) if hi > lo]
+            parts = [(lo, f.result()) for lo, f in futures]
+        rows = np.concatenate([lo + r[0] for lo, r in parts])
+        rest = [np.concatenate([r[i] for _, r in parts]) for i in range(1, 6)]
+        return self._frame(rows, *rest, labels=labels)
+
+
+# 进程内共享的引擎 (默认基因集库 + 常驻进程池)，退出时关闭进程池
+@functools.lru_cache(maxsize=1)
+def shared_engine():
+    engine = EnrichmentEngine()
+    atexit.register(engine.shutdown)
+    return engine
+
+
+# 药材 → 强结合靶点集合 (结合能 ≤ 阈值)
+def target_sets(matrix, cutoff=STRONG_BINDING):
+    strong = matrix.threshold(cutoff)
+    return strong.groupby('中药', sort=False)['靶点'].agg(list).to_dict()
+
+
+def go_table(df_dock, cutoff=STRONG_BINDING, library=None):
+    genes = df_dock.loc[df_dock['结合能'] <= cutoff, '靶点'].unique().tolist()
+    return EnrichmentEngine(library).enrich(genes)
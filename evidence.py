@@ -0,0 +1,276 @@
+import argparse
+import contextlib
+import functools
+import hashlib
+import os
+import re
+import sqlite3
+import time
+
+from cache import CACHE_DIR
+
+# ==========================================
+# 📚 循证文献库：SQLite FTS5 全文索引 + 类型/年份/影响因子 分面
+# ==========================================
+# 中文按相邻二字切分 (bigram) 后写入 FTS5，英文/数字按词，查询转为短语匹配并按 bm25 排序；
+# 单个汉字无法命中二字索引，退回 LIKE 扫描。
+# 入库按 (中药, 类型, 期刊, 标题, 年份) 指纹去重，同一数据来源只索引一次，支持增量追加；
+# ref_sources 记录每篇文献来自哪些数据集，检索与统计可限定在当前数据集内。
+
+EVIDENCE_DB_PATH = os.environ.get('TCM_EVIDENCE_DB', os.path.join(CACHE_DIR, 'evidence.db'))
+
+REF_FIELDS = ['中药', '类型', '期刊', '标题', '年份', '影响因子']
+TEXT_FIELDS = ['中药', '期刊', '标题']
+TEXT_WEIGHTS = (3.0, 1.0, 2.0)
+IF_BUCKETS = [(3, '<3'), (5, '3-5'), (10, '5-10'), (None, '≥10')]
+BATCH_SIZE = 5000
+WRITE_TIMEOUT = 60.0
+FACET_CACHE_SIZE = 256
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS refs (
+    id INTEGER PRIMARY KEY,
+    "中药" TEXT, "类型" TEXT, "期刊" TEXT, "标题" TEXT, "年份" INTEGER, "影响因子" REAL,
+    fingerprint TEXT NOT NULL UNIQUE
+);
+CREATE INDEX IF NOT EXISTS idx_refs_facets ON refs("类型", "年份", "影响因子");
+CREATE INDEX IF NOT EXISTS idx_refs_year ON refs("年份", "影响因子");
+CREATE INDEX IF NOT EXISTS idx_refs_if ON refs("影响因子");
+CREATE TABLE IF NOT EXISTS sources (key TEXT PRIMARY KEY, rows INTEGER, indexed_at REAL);
+CREATE TABLE IF NOT EXISTS ref_sources (source TEXT NOT NULL, ref_id INTEGER NOT NULL, UNIQUE(source, ref_id));
+CREATE VIRTUAL TABLE IF NOT EXISTS refs_fts USING fts5("中药", "期刊", "标题", tokenize='unicode61');
+"""
+
+COLUMNS_SQL = ", ".join(f'"{f}"' for f in REF_FIELDS)
+SELECT_SQL = ", ".join(f'r."{f}"' for f in REF_FIELDS)
+FTS_COLUMNS_SQL = ", ".join(f'"{f}"' for f in TEXT_FIELDS)
+GRAMS_SQL = ", ".join(f'grams("{f}")' for f in TEXT_FIELDS)
+TOKEN_RE = re.compile(r'[\u3400-\u9fff\uf900-\ufaff]+|[0-9a-z]+')
+IF_CASE = "CASE " + " ".join(
+    f'WHEN r."影响因子" < {hi} THEN {i}' for i, (hi, _) in enumerate(IF_BUCKETS) if hi is not None
+) + f" ELSE {len(IF_BUCKETS) - 1} END"
+
+
+def grams(text):
+    out = []
+    for run in TOKEN_RE.findall(str(text or '').lower()):
+        if run[0].isascii():
+            out.append(run)
+        else:
+            out += [run] if len(run) == 1 else [run[i:i + 2] for i in range(len(run) - 1)]
+    return " ".join(out)
+
+
+# 每个空格分隔的词转为一个 FTS5 短语，多个词取交集；含单字词时返回 None (改走 LIKE)
+def match_expression(q):
+    phrases = []
+    for term in q.split():
+        runs = TOKEN_RE.findall(term.lower())
+        if any(not r[0].isascii() and len(r) == 1 for r in runs):
+            return None
+        tokens = grams(term).split()
+        if tokens:
+            phrases.append('"' + " ".join(tokens) + '"')
+    return " AND ".join(phrases) or None
+
+
+def ensure_schema(path=EVIDENCE_DB_PATH):
+    os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+    with contextlib.closing(sqlite3.connect(path)) as conn, conn:
+        conn.execute("PRAGMA journal_mode=WAL")
+        tables = {row[0] for row in conn.execute("SELECT name FROM sqlite_master WHERE type = 'table'")}
+        conn.executescript(SCHEMA)
+        # 旧库没有文献-数据集关联：清空来源登记，各数据集下次打开时重新关联 (文献按指纹去重，不会重复入库)
+        if 'sources' in tables and 'ref_sources' not in tables:
+            conn.execute("DELETE FROM sources")
+
+
+def fingerprint(record):
+    raw = "\x1f".join(str(record.get(f, '')) for f in REF_FIELDS[:5])
+    return hashlib.blake2b(raw.encode('utf-8'), digest_size=12).hexdigest()
+
+
+def like_pattern(q):
+    return "%" + q.replace('\\', '\\\\').replace('%', '\\%').replace('_', '\\_') + "%"
+
+
+def _records(df):
+    cols = [f for f in REF_FIELDS if f in df.columns]
+    frame = df[cols].astype(object).where(df[cols].notna(), None)
+    for rec in frame.to_dict('records'):
+        yield tuple(rec.get(f) for f in REF_FIELDS) + (fingerprint(rec),)
+
+
+class EvidenceStore:
+    def __init__(self, path=EVIDENCE_DB_PATH):
+        self.path = path
+        ensure_schema(path)
+        self._cube = functools.lru_cache(maxsize=FACET_CACHE_SIZE)(self._cube_query)
+        self._stats = functools.lru_cache(maxsize=64)(self._stats_query)
+
+    # 退出时提交 (异常时回滚) 并关闭连接
+    @contextlib.contextmanager
+    def _connect(self, readonly=True):
+        conn = sqlite3.connect(f"file:{self.path}?mode=ro", uri=True) if readonly else sqlite3.connect(self.path, timeout=WRITE_TIMEOUT)
+        conn.create_function('grams', 1, grams, deterministic=True)
+        try:
+            with conn:
+                yield conn
+        finally:
+            conn.close()
+
+    # ---------- 增量入库：新行写入 refs 后，仅对新增 id 追加 FTS 索引 ----------
+
+    def is_indexed(self, source):
+        with self._connect() as conn:
+            return conn.execute("SELECT 1 FROM sources WHERE key = ?", (source,)).fetchone() is not None
+
+    def add_batches(self, frames, source=None):
+        if source is not None and self.is_indexed(source):
+            return 0
+        added = rows = 0
+        with self._connect(readonly=False) as conn:
+            # 先取得写锁再读 MAX(id)：并发写入者排队，各自只为本事务新增的 id 建 FTS 索引
+            conn.execute("BEGIN IMMEDIATE")
+            if source is not None and conn.execute("SELECT 1 FROM sources WHERE key = ?", (source,)).fetchone():
+                return 0
+            start = conn.execute("SELECT COALESCE(MAX(id), 0) FROM refs").fetchone()[0]
+            for df in frames:
+                rows += len(df)
+                batch = list(_records(df))
+                for i in range(0, len(batch), BATCH_SIZE):
+                    conn.executemany(
+                        f"INSERT OR IGNORE INTO refs ({COLUMNS_SQL}, fingerprint) VALUES ({', '.join('?' * (len(REF_FIELDS) + 1))})",
+                        batch[i:i + BATCH_SIZE]
+                    )
+                    if source is not None:
+                        conn.executemany(
+                            "INSERT OR IGNORE INTO ref_sources (source, ref_id) SELECT ?, id FROM refs WHERE fingerprint = ?",
+                            [(source, rec[-1]) for rec in batch[i:i + BATCH_SIZE]]
+                        )
+            added = conn.execute(
+                f"INSERT INTO refs_fts (rowid, {FTS_COLUMNS_SQL}) SELECT id, {GRAMS_SQL} FROM refs WHERE id > ?",
+                (start,)
+            ).rowcount
+            if source is not None:
+                conn.execute("INSERT OR REPLACE INTO sources VALUES (?, ?, ?)", (source, rows, time.time()))
+        return added
+
+    def add_frame(self, df, source=None):
+        return self.add_batches([df], source)
+
+    # ---------- 查询 ----------
+
+    @staticmethod
+    def _filters(types, year_min, year_max, min_if, dataset=None):
+        clauses, params = [], []
+        if dataset is not None:
+            clauses.append("r.id IN (SELECT ref_id FROM ref_sources WHERE source = ?)")
+            params.append(dataset)
+        if types:
+            clauses.append(f'r."类型" IN ({", ".join("?" * len(types))})')
+            params += list(types)
+        if year_min is not None:
+            clauses.append('r."年份" >= ?')
+            params.append(year_min)
+        if year_max is not None:
+            clauses.append('r."年份" <= ?')
+            params.append(year_max)
+        if min_if is not None:
+            clauses.append('r."影响因子" >= ?')
+            params.append(min_if)
+        return clauses, params
+
+    # 命中集合按 (类型, 年份, 影响因子分桶) 聚合成小立方体，总数与三个分面都由它求和得到；
+    # refs 与 ref_sources 只追加不修改，两者的 MAX(rowid) 即数据版本，版本不变时直接复用
+    def _cube_query(self, version, source, where, params):
+        with self._connect() as conn:
+            return conn.execute(
+                f'SELECT r."类型", r."年份", {IF_CASE}, COUNT(*) FROM {source}{where} GROUP BY 1, 2, 3', params
+            ).fetchall()
+
+    @staticmethod
+    def _version(conn):
+        return conn.execute("SELECT (SELECT MAX(id) FROM refs), (SELECT MAX(rowid) FROM ref_sources)").fetchone()
+
+    # dataset 为数据集键时只在该数据集收录的文献中检索
+    def search(self, q=None, page=1, size=20, types=None, year_min=None, year_max=None, min_if=None, facets=True, dataset=None):
+        t0 = time.perf_counter()
+        clauses, params = self._filters(types, year_min, year_max, min_if, dataset)
+        q = (q or '').strip()
+        expr = match_expression(q) if q else None
+        if expr:
+            # CROSS JOIN 固定由全文索引驱动，再按主键回表过滤
+            source = "refs_fts CROSS JOIN refs r ON r.id = refs_fts.rowid"
+            clauses.insert(0, "refs_fts MATCH ?")
+            params.insert(0, expr)
+            score = f"bm25(refs_fts, {', '.join(map(str, TEXT_WEIGHTS))})"
+            order = 'score, r."年份" DESC'
+        else:
+            source = "refs r"
+            score = "0.0"
+            order = 'r."年份" DESC, r."影响因子" DESC'
+            if q:
+                like = like_pattern(q)
+                clauses.append("(" + " OR ".join(f'r."{f}" LIKE ? ESCAPE \'\\\'' for f in TEXT_FIELDS) + ")")
+                params += [like] * len(TEXT_FIELDS)
+        where = (" WHERE " + " AND ".join(clauses)) if clauses else ""
+        with self._connect() as conn:
+            version = self._version(conn)
+            cur = conn.execute(
+                f"SELECT {SELECT_SQL}, {score} AS score FROM {source}{where} ORDER BY {order} LIMIT ? OFFSET ?",
+                params + [size, (page - 1) * size]
+            )
+            items = [dict(zip(REF_FIELDS + ['得分'], row)) for row in cur.fetchall()]
+        cube = self._cube(version, source, where, tuple(params))
+        return {
+            'items': items, 'total': sum(row[3] for row in cube), 'page': page, 'size': size,
+            'facets': self._facets(cube) if facets else {}, 'elapsed_ms': (time.perf_counter() - t0) * 1000,
+        }
+
+    @staticmethod
+    def _facets(cube):
+        out = {'类型': {}, '年份': {}, '影响因子': {}}
+        for kind, year, bucket, count in cube:
+            for name, key in (('类型', kind), ('年份', year), ('影响因子', IF_BUCKETS[bucket][1])):
+                if key is not None:
+                    out[name][key] = out[name].get(key, 0) + count
+        out['类型'] = dict(sorted(out['类型'].items(), key=lambda kv: -kv[1]))
+        out['年份'] = dict(sorted(out['年份'].items()))
+        out['影响因子'] = {label: out['影响因子'][label] for _, label in IF_BUCKETS if label in out['影响因子']}
+        return out
+
+    def _stats_query(self, version, dataset):
+        clauses, params = self._filters(None, None, None, None, dataset)
+        where = (" WHERE " + " AND ".join(clauses)) if clauses else ""
+        with self._connect() as conn:
+            count, mean_if, first, last = conn.execute(
+                f'SELECT COUNT(*), AVG(r."影响因子"), MIN(r."年份"), MAX(r."年份") FROM refs r{where}', params
+            ).fetchone()
+        return {'文献数': count, '平均IF': mean_if, '最早年份': first, '最新年份': last}
+
+    def stats(self, dataset=None):
+        with self._connect() as conn:
+            version = self._version(conn)
+        return dict(self._stats(version, dataset))
+
+    # 连接按调用开关，关闭时只需释放记忆化的分面立方体与统计
+    def close(self):
+        self._cube.cache_clear()
+        self._stats.cache_clear()
+
+
+def main():
+    from ingest import ingest, load_frame
+
+    parser = argparse.ArgumentParser(description="导入文献数据并建立全文索引")
+    parser.add_argument('source', help="Excel/CSV/Parquet 文件 (列: 中药/类型/期刊/标题/年份/影响因子)")
+    parser.add_argument('--db', default=EVIDENCE_DB_PATH)
+    args = parser.parse_args()
+    with open(args.source, 'rb') as f:
+        df = load_frame(ingest(os.path.basename(args.source), f.read()))
+    print(f"✅ 新增索引 {EvidenceStore(args.db).add_frame(df)} 篇文献 → {args.db}")
+
+
+if __name__ == '__main__':
+    main()
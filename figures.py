@@ -0,0 +1,286 @@
+import numpy as np
+import plotly.express as px
+import plotly.graph_objects as go
+
+import docking
+from admet import LIPINSKI_RULES, POSITIVE_THRESHOLD, VEBER_RULES
+from aggregate import box_stats, category_totals, grid_sample, histogram, kde
+from cooccur import CooccurrenceGraph
+from cube import PropertyCube
+from enrichment import shared_engine, target_sets
+from geo import CHINA_BBOX, PROVINCES, GeoIndex, province_bbox
+from registry import ModuleRegistry
+
+# ==========================================
+# 📈 看板图表：纯 Plotly 计算，不依赖 Streamlit (报表/批处理可直接复用)
+# ==========================================
+# deps 为 TABLE_NAMES 中的表名，按顺序作为位置参数传入。
+
+REGISTRY = ModuleRegistry()
+register = REGISTRY.register
+
+TIGHT = dict(t=0, b=0, l=0, r=0)
+
+
+# ---------- 预聚合图元：只绘制摘要，不传逐行数据 ----------
+
+def histogram_figure(values, label, bins=30):
+    h = histogram(values, bins)
+    fig = go.Figure(go.Bar(x=(h['左'] + h['右']) / 2, y=h['计数'], width=h['右'] - h['左'], name=label))
+    return fig.update_layout(bargap=0, xaxis_title=label, yaxis_title="count")
+
+
+def box_trace(values, label):
+    stats = box_stats(values)
+    if stats is None:
+        return go.Box(y=[], name=label)
+    return go.Box(
+        q1=[stats['q1']], median=[stats['median']], q3=[stats['q3']], mean=[stats['mean']],
+        lowerfence=[stats['lowerfence']], upperfence=[stats['upperfence']], x=[label], name=label, boxpoints=False
+    )
+
+
+def box_figure(values, label):
+    stats = box_stats(values)
+    fig = go.Figure(box_trace(values, label))
+    if stats is not None and stats['outliers'].size:
+        fig.add_trace(go.Scatter(x=[label] * stats['outliers'].size, y=stats['outliers'], mode='markers', name="离群点", showlegend=False))
+    return fig.update_layout(yaxis_title=label, showlegend=False)
+
+
+def violin_figure(values, label):
+    d = kde(values)
+    width = 0.4 / max(d['密度'].max(), 1e-12)
+    x = np.concatenate([d['密度'] * width, -d['密度'][::-1] * width])
+    y = np.concatenate([d['取值'], d['取值'][::-1]])
+    fig = go.Figure(go.Scatter(x=x, y=y, fill='toself', mode='lines', name=label, hoverinfo='y'))
+    box = box_trace(values, label)
+    box.update(x=[0], width=0.08)
+    fig.add_trace(box)
+    return fig.update_layout(yaxis_title=label, xaxis_showticklabels=False, showlegend=False)
+
+
+# ---------- 共享派生数据 ----------
+
+# 药性维度预聚合立方体，Tab 1 / 4 / 5 的分组汇总都从它上卷
+@register('cube', deps=['herbs'])
+def property_cube(df):
+    return PropertyCube.from_frame(df)
+
+
+# 共现网络：有处方ID 列时按真实处方共现构图，否则使用模拟边表；重复边权重累加
+@register('cooccur_graph', deps=['herbs', 'edges'])
+def cooccur_graph(df, edges):
+    if '处方ID' in df.columns:
+        return CooccurrenceGraph.from_prescriptions(df['处方ID'], df['中药'])
+    return CooccurrenceGraph.from_edges(edges)
+
+
+# ---------- Tab 1: 全景生态 ----------
+
+# 产地坐标的 Z 序网格索引，地图按缩放级别聚合 / 按视窗裁剪
+@register('geo_index', deps=['geo'])
+def geo_index(df_geo):
+    return GeoIndex.from_frame(df_geo)
+
+
+# region 为省份名时地图缩放到该省视窗，否则显示全国；点数由聚合上限约束
+@register('geo_map', deps=['geo_index'], tab=1)
+def geo_map(index, region=None):
+    if region in PROVINCES:
+        zoom, bbox = 5.5, province_bbox(region)
+        center = {"lat": PROVINCES[region][0], "lon": PROVINCES[region][1]}
+    else:
+        zoom, bbox, center = 3.2, CHINA_BBOX, {"lat": 34.0, "lon": 108.0}
+    cells = index.clusters(zoom, bbox)
+    fig = px.scatter_mapbox(cells, lat="纬度", lon="经度", color="频次", size="频次",
+        hover_name="标签", hover_data={"点数": True, "平均频次": ':.0f', "纬度": False, "经度": False},
+        color_continuous_scale="Teal", size_max=25, zoom=zoom, center=center)
+    return fig.update_layout(mapbox_style="carto-darkmatter", margin={"r": 0, "t": 0, "l": 0, "b": 0}, height=300)
+
+
+@register('origin_bar', deps=['cube'], tab=1)
+def origin_bar(cube):
+    geo_stat = cube.query('产地', '频次').sort_values('频次', ascending=False)
+    fig = px.bar(geo_stat, x='产地', y='频次', color='频次', color_continuous_scale='Viridis')
+    return fig.update_layout(height=120, margin=TIGHT)
+
+
+@register('category_pie', deps=['cube'], tab=1)
+def category_pie(cube):
+    return px.pie(cube.query('类别', '频次'), names='类别', values='频次', hole=0.6).update_layout(height=120, margin=TIGHT, showlegend=False)
+
+
+# K 线 + 均线：bars 为 price_store.resample_ohlc 的输出 (可带 MA* 指标列)
+def kline_figure(bars, height=200):
+    fig = go.Figure(go.Candlestick(x=bars['Date'], open=bars['Open'], high=bars['High'], low=bars['Low'], close=bars['Close'], name='K线'))
+    for col in [c for c in bars.columns if c.startswith('MA')]:
+        fig.add_trace(go.Scatter(x=bars['Date'], y=bars[col], mode='lines', name=col, line=dict(width=1)))
+    return fig.update_layout(margin=TIGHT, height=height, xaxis_rangeslider_visible=False, legend=dict(orientation='h', y=1.1))
+
+
+@register('price_kline', deps=['price'], tab=1)
+def price_kline(df_price):
+    return kline_figure(df_price)
+
+
+@register('altitude_violin', deps=['herbs'], tab=1)
+def altitude_violin(df):
+    return violin_figure(df['海拔'], '海拔').update_layout(height=200, margin=TIGHT)
+
+
+@register('soil_ph_hist', deps=['herbs'], tab=1)
+def soil_ph_hist(df):
+    return histogram_figure(df['土壤pH'], '土壤pH').update_layout(height=200, margin=TIGHT)
+
+
+@register('rainfall_scatter', deps=['herbs'], tab=1)
+def rainfall_scatter(df):
+    return px.scatter(grid_sample(df, '年降雨', '频次'), x='年降雨', y='频次', hover_data=['点数']).update_layout(height=200, margin=TIGHT)
+
+
+@register('price_box', deps=['herbs'], tab=1)
+def price_box(df):
+    return box_figure(df['价格'], '价格').update_layout(height=200, margin=TIGHT)
+
+
+@register('supply_gauge', tab=1)
+def supply_gauge():
+    fig = go.Figure(go.Indicator(mode="gauge+number", value=35, title={'text': "风险指数"}))
+    return fig.update_layout(height=150, margin=TIGHT)
+
+
+# ---------- Tab 3: 深度机制 ----------
+
+@register('docking', deps=['dock'], keyed=True)
+def docking_matrix(df_dock, dataset_key):
+    return docking.load_or_build(dataset_key, df_dock)
+
+
+@register('docking_heatmap', deps=['docking'], tab=3)
+def docking_heatmap(matrix):
+    return px.imshow(matrix.heatmap_frame(), aspect="auto").update_layout(height=300, margin=TIGHT)
+
+
+@register('herb_enrichment', deps=['docking'])
+def herb_enrichment(matrix):
+    return shared_engine().enrich_many(target_sets(matrix))
+
+
+def enrichment_bubble(table, source='KEGG通路', top=15):
+    rows = table[table['分类'] == source].nsmallest(top, 'P值').iloc[::-1]
+    rows = rows.assign(**{'-log10(FDR)': -np.log10(rows['FDR'].clip(lower=1e-300))})
+    fig = px.scatter(rows, x='富集倍数', y='术语', size='计数', color='-log10(FDR)', hover_data=['P值', 'FDR'])
+    return fig.update_layout(height=300, margin=TIGHT)
+
+
+@register('kegg_bubble', deps=['go'], tab=3)
+def kegg_bubble(df_go):
+    return enrichment_bubble(df_go)
+
+
+@register('herb_kegg_bubble', deps=['herb_enrichment'], tab=3)
+def herb_kegg_bubble(table, herb):
+    return enrichment_bubble(table[table['中药'] == herb])
+
+
+@register('axis_sankey', tab=3)
+def axis_sankey():
+    fig = go.Figure(go.Sankey(node=dict(label=["中药", "肠道", "脑部"], color="blue"), link=dict(source=[0, 1], target=[1, 2], value=[10, 8])))
+    return fig.update_layout(height=150, margin=TIGHT)
+
+
+# ---------- Tab 4: 药性化学 ----------
+
+@register('nature_sunburst', deps=['cube'], tab=4)
+def nature_sunburst(cube):
+    fig = px.sunburst(cube.query(['四气', '五味', '类别'], '频次'), path=['四气', '五味', '类别'], values='频次', color='四气')
+    return fig.update_layout(height=300, margin=TIGHT)
+
+
+@register('chem_space', deps=['herbs'], tab=4)
+def chem_space(df):
+    return px.scatter(grid_sample(df, '分子量', 'LogP', by='类别'), x='分子量', y='LogP', color='类别', hover_data=['点数']).update_layout(height=300)
+
+
+# 各终点阳性率 / 规则通过率 (派生数据，供 KPI 与毒理面板使用)
+@register('admet_summary', deps=['herbs'])
+def admet_summary(df):
+    rates = {c[:-2]: float((df[c] >= POSITIVE_THRESHOLD).mean()) for c in df.columns if c.endswith('概率')}
+    for col in ('Lipinski通过', 'Veber通过'):
+        if col in df.columns:
+            rates[col] = float(df[col].mean())
+    return rates
+
+
+# 每条规则的通过率 (%)：Lipinski 四项 + Veber 两项
+@register('lipinski_radar', deps=['herbs'], tab=4)
+def lipinski_radar(df):
+    rules = {**LIPINSKI_RULES, **VEBER_RULES}
+    rules = {c: limit for c, limit in rules.items() if c in df.columns}
+    rates = [float((df[c] <= limit).mean() * 100) for c, limit in rules.items()]
+    labels = [f"{c} ≤ {limit}" for c, limit in rules.items()]
+    fig = go.Figure(go.Scatterpolar(r=rates + rates[:1], theta=labels + labels[:1], fill='toself', name='通过率'))
+    return fig.update_layout(height=250, margin=dict(t=20, b=20, l=40, r=40), polar=dict(radialaxis=dict(range=[0, 100], ticksuffix='%')))
+
+
+@register('nature_parcats', deps=['cube'], tab=4)
+def nature_parcats(cube):
+    dims = ['四气', '五味', '归经']
+    agg = cube.query(dims, '频次', agg='mean')
+    fig = go.Figure(go.Parcats(
+        dimensions=[dict(label=d, values=agg[d]) for d in dims], counts=agg['计数'],
+        line=dict(color=agg['频次'], colorscale='Plasma', showscale=True, colorbar=dict(title='频次'))
+    ))
+    return fig.update_layout(height=250, margin=dict(t=20, b=0, l=0, r=0))
+
+
+@register('tpsa_hist', deps=['herbs'], tab=4)
+def tpsa_hist(df):
+    return histogram_figure(df['TPSA'], 'TPSA').update_layout(height=150, margin=TIGHT)
+
+
+@register('qed_box', deps=['herbs'], tab=4)
+def qed_box(df):
+    return box_figure(df['QED'], 'QED').update_layout(height=150, margin=TIGHT)
+
+
+# ---------- Tab 5: 循证历史 ----------
+
+@register('dose_trend', deps=['cube'], tab=5)
+def dose_trend(cube):
+    df_dose = cube.query('巅峰朝代', '剂量', agg='mean')
+    return px.line(df_dose, x='巅峰朝代', y='剂量').update_layout(height=250)
+
+
+@register('circadian_line', tab=5)
+def circadian_line():
+    return px.line(x=range(24), y=np.sin(range(24))).update_layout(height=250)
+
+
+@register('evidence_pie', deps=['refs'], tab=5)
+def evidence_pie(df_refs):
+    return px.pie(category_totals(df_refs, '类型'), names='类型', values='计数', hole=0.5).update_layout(height=200, margin=TIGHT, showlegend=False)
+
+
+@register('trial_phase_pie', deps=['trials'], tab=5)
+def trial_phase_pie(df_trials):
+    return px.pie(category_totals(df_trials, '阶段'), names='阶段', values='计数').update_layout(height=200)
+
+
+@register('trial_status_hist', deps=['trials'], tab=5)
+def trial_status_hist(df_trials):
+    return px.bar(category_totals(df_trials, '状态'), x='状态', y='计数').update_layout(height=200)
+
+
+@register('sample_size_box', deps=['trials'], tab=5)
+def sample_size_box(df_trials):
+    return box_figure(df_trials['样本量'], '样本量').update_layout(height=150)
+
+
+# ---------- Tab 6: 临床智能 ----------
+
+@register('satisfaction_gauge', tab=6)
+def satisfaction_gauge():
+    fig = go.Figure(go.Indicator(mode="gauge+number", value=85))
+    return fig.update_layout(height=150, margin=TIGHT)
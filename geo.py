@@ -0,0 +1,162 @@
+import numpy as np
+import pandas as pd
+
+# ==========================================
+# 🗺️ 空间索引：省份坐标向量化查找 + Z 序网格 (geohash 同构) 分级聚合 + 视窗查询
+# ==========================================
+# 每个点按 (经度, 纬度) 落到 2^MAX_LEVEL × 2^MAX_LEVEL 网格，行列号按位交错得到 Z 序编码；
+# 按编码排序后，第 z 级的格子就是编码右移 2*(MAX_LEVEL - z) 位后相同的一段连续点，
+# 用 reduceat 一次求出各格的点数 / 频次和 / 质心。地图按缩放级别取对应层级，
+# 聚合点数超过上限时继续上卷，传给前端的点数始终有界。
+# bbox 统一为 (西, 南, 东, 北)。
+
+MAX_LEVEL = 16
+CLUSTER_OFFSET = 3  # 256px 瓦片 / 约 32px 一个聚合点
+MAX_MAP_POINTS = 2000
+CHINA_CENTER = (35.0, 105.0)
+CHINA_BBOX = (73.0, 18.0, 135.0, 54.0)
+
+# 省级行政区中心坐标 (纬度, 经度)
+PROVINCES = {
+    '北京': (39.9, 116.4), '天津': (39.1, 117.2), '河北': (38.0, 114.5), '山西': (36.5, 112.9),
+    '内蒙古': (42.2, 118.9), '辽宁': (41.8, 123.4), '吉林': (43.9, 125.3), '黑龙江': (45.8, 126.6),
+    '上海': (31.2, 121.5), '江苏': (32.1, 118.8), '浙江': (29.3, 119.5), '安徽': (30.8, 116.3),
+    '福建': (26.1, 119.3), '江西': (28.7, 115.9), '山东': (36.7, 117.0), '河南': (34.1, 113.4),
+    '湖北': (30.5, 114.3), '湖南': (28.2, 112.9), '广东': (23.1, 113.3), '广西': (22.8, 108.3),
+    '海南': (20.0, 110.3), '重庆': (29.6, 106.5), '四川': (31.0, 103.6), '贵州': (26.6, 106.7),
+    '云南': (27.3, 103.7), '西藏': (29.7, 91.1), '陕西': (34.3, 108.9), '甘肃': (34.5, 104.6),
+    '青海': (36.6, 101.8), '宁夏': (38.5, 106.3), '新疆': (43.8, 87.6), '台湾': (25.0, 121.5),
+    '香港': (22.3, 114.2), '澳门': (22.2, 113.5),
+}
+PROVINCE_NAMES = list(PROVINCES)
+PROVINCE_LAT = np.array([v[0] for v in PROVINCES.values()])
+PROVINCE_LON = np.array([v[1] for v in PROVINCES.values()])
+SUFFIX_RE = r'(省|市|壮族自治区|回族自治区|维吾尔自治区|自治区|特别行政区)$'
+
+
+# ---------- 省份查找 ----------
+
+# 产地名 → 省份下标 (-1 为未知)；只对唯一值做名称规整，再按编码整列映射
+def province_codes(names):
+    codes, uniques = pd.factorize(pd.Series(names, dtype=object), use_na_sentinel=True)
+    if len(uniques) == 0:
+        return np.full(len(codes), -1, dtype=np.int64)
+    cleaned = pd.Series(uniques, dtype=object).astype(str).str.strip().str.replace(SUFFIX_RE, '', regex=True)
+    mapping = pd.Index(PROVINCE_NAMES).get_indexer(cleaned)
+    return np.where(codes >= 0, mapping[codes], -1)
+
+
+def province_coords(names):
+    codes = province_codes(names)
+    known = codes >= 0
+    lat = np.where(known, PROVINCE_LAT[np.maximum(codes, 0)], np.nan)
+    lon = np.where(known, PROVINCE_LON[np.maximum(codes, 0)], np.nan)
+    return lat, lon
+
+
+# ---------- Z 序编码 ----------
+
+def _spread(v):
+    v = v.astype(np.uint64) & np.uint64(0xFFFFFFFF)
+    for shift, mask in ((16, 0x0000FFFF0000FFFF), (8, 0x00FF00FF00FF00FF), (4, 0x0F0F0F0F0F0F0F0F), (2, 0x3333333333333333), (1, 0x5555555555555555)):
+        v = (v | (v << np.uint64(shift))) & np.uint64(mask)
+    return v
+
+
+def grid_cells(lat, lon, level=MAX_LEVEL):
+    size = 1 << level
+    ix = np.clip(((np.asarray(lon, dtype=np.float64) + 180.0) / 360.0 * size).astype(np.int64), 0, size - 1)
+    iy = np.clip(((np.asarray(lat, dtype=np.float64) + 90.0) / 180.0 * size).astype(np.int64), 0, size - 1)
+    return ix, iy
+
+
+def zorder(lat, lon, level=MAX_LEVEL):
+    ix, iy = grid_cells(lat, lon, level)
+    return (_spread(ix) | (_spread(iy) << np.uint64(1))).astype(np.int64)
+
+
+def zoom_level(zoom):
+    return int(np.clip(round(zoom) + CLUSTER_OFFSET, 0, MAX_LEVEL))
+
+
+class GeoIndex:
+    def __init__(self, lat, lon, weight, labels=None):
+        lat, lon = np.asarray(lat, dtype=np.float64), np.asarray(lon, dtype=np.float64)
+        weight = np.nan_to_num(np.asarray(weight, dtype=np.float64))
+        ok = np.isfinite(lat) & np.isfinite(lon)
+        codes = zorder(lat[ok], lon[ok])
+        order = np.argsort(codes, kind='stable')
+        self.codes = codes[order]
+        self.lat = lat[ok][order]
+        self.lon = lon[ok][order]
+        self.weight = weight[ok][order]
+        self.labels = None if labels is None else np.asarray(labels, dtype=object)[ok][order]
+        # 纬度有序副本，bbox 查询先二分收窄再按经度过滤
+        self._by_lat = np.argsort(self.lat, kind='stable')
+        self._lat_sorted = self.lat[self._by_lat]
+        self._levels = {}
+
+    @classmethod
+    def from_frame(cls, df, lat='纬度', lon='经度', weight='频次', label='中药'):
+        return cls(df[lat], df[lon], df[weight], df[label] if label in df.columns else None)
+
+    def __len__(self):
+        return self.codes.size
+
+    # 某一层级的全部聚合格 (按 Z 序)，首次使用时计算并缓存
+    def level(self, level):
+        cached = self._levels.get(level)
+        if cached is not None:
+            return cached
+        if len(self) == 0:
+            cached = pd.DataFrame(columns=['格', '纬度', '经度', '点数', '频次', '平均频次', '标签'])
+        else:
+            keys = self.codes >> (2 * (MAX_LEVEL - level))
+            starts = np.flatnonzero(np.r_[True, keys[1:] != keys[:-1]])
+            count = np.diff(np.r_[starts, keys.size])
+            total = np.add.reduceat(self.weight, starts)
+            labels = np.where(count == 1, self.labels[starts] if self.labels is not None else '', count.astype(str) + ' 个点')
+            cached = pd.DataFrame({
+                '格': keys[starts],
+                '纬度': np.add.reduceat(self.lat, starts) / count,
+                '经度': np.add.reduceat(self.lon, starts) / count,
+                '点数': count,
+                '频次': total,
+                '平均频次': total / count,
+                '标签': labels,
+            })
+        self._levels[level] = cached
+        return cached
+
+    # 视窗内的原始点下标
+    def query(self, bbox):
+        west, south, east, north = bbox
+        lo = int(np.searchsorted(self._lat_sorted, south, side='left'))
+        hi = int(np.searchsorted(self._lat_sorted, north, side='right'))
+        idx = self._by_lat[lo:hi]
+        lon = self.lon[idx]
+        return np.sort(idx[(lon >= west) & (lon <= east)])
+
+    def points(self, bbox=None):
+        idx = self.query(bbox) if bbox is not None else np.arange(len(self))
+        out = pd.DataFrame({'纬度': self.lat[idx], '经度': self.lon[idx], '频次': self.weight[idx]})
+        return out.assign(中药=self.labels[idx]) if self.labels is not None else out
+
+    # 按缩放级别聚合并裁剪到视窗；聚合点超过 max_points 时逐级上卷
+    def clusters(self, zoom, bbox=None, max_points=MAX_MAP_POINTS):
+        level = zoom_level(zoom)
+        while True:
+            cells = self.level(level)
+            if bbox is not None:
+                west, south, east, north = bbox
+                inside = cells['纬度'].between(south, north).to_numpy() & cells['经度'].between(west, east).to_numpy()
+                cells = cells[inside]
+            if len(cells) <= max_points or level == 0:
+                return cells.reset_index(drop=True)
+            level -= 1
+
+
+# 省份视窗：中心 ± span 度
+def province_bbox(name, span=4.0):
+    lat, lon = PROVINCES[name]
+    return lon - span, lat - span, lon + span, lat + span
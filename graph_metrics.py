@@ -0,0 +1,302 @@
+import concurrent.futures
+import multiprocessing
+import os
+import threading
+from collections import OrderedDict
+from concurrent.futures import Future, ProcessPoolExecutor
+
+import networkx as nx
+import numpy as np
+import pandas as pd
+from scipy.sparse import csgraph
+
+# ==========================================
+# 📐 网络指标后端：稀疏矩阵 + 批量 BFS，重计算放进进程池
+# ==========================================
+# 介数/接近中心度/平均路径/直径共用同一套批量 BFS (Brandes 算法的矩阵形式)：
+# 每批若干源点作为稠密列，逐层做稀疏矩阵 × 稠密块，再逐层回传依赖值。
+# 节点数不超过 exact_nodes 时对全部源点精确计算，否则随机抽样 samples 个源点估计。
+
+BATCH_CELLS = 2 ** 21
+
+
+def _binary(matrix):
+    A = matrix.astype(np.float64, copy=True)
+    A.data[:] = 1.0
+    return A
+
+
+# 一批源点的 BFS + 依赖回传；返回可跨批次直接相加的部分结果
+def _path_batch(A, sources):
+    n, b = A.shape[0], len(sources)
+    cols = np.arange(b)
+    sigma = np.zeros((n, b))
+    sigma[sources, cols] = 1.0
+    dist = np.full((n, b), -1, dtype=np.int32)
+    dist[sources, cols] = 0
+    frontier = sigma.copy()
+    depth = 0
+    while True:
+        nxt = A @ frontier
+        nxt[dist >= 0] = 0.0
+        reached = nxt > 0
+        if not reached.any():
+            break
+        depth += 1
+        dist[reached] = depth
+        sigma[reached] = nxt[reached]
+        frontier = nxt
+
+    delta = np.zeros((n, b))
+    for d in range(depth, 0, -1):
+        at_d = dist == d
+        coef = np.divide(1.0 + delta, sigma, out=np.zeros_like(delta), where=at_d)
+        contrib = A @ coef
+        prev = dist == d - 1
+        delta[prev] += sigma[prev] * contrib[prev]
+    delta[sources, cols] = 0.0
+
+    positive = dist > 0
+    far = np.unravel_index(np.argmax(dist), dist.shape)
+    return {
+        'delta': delta.sum(axis=1),
+        'dist_sum': np.where(positive, dist, 0).sum(axis=1).astype(np.float64),
+        'dist_cnt': positive.sum(axis=1).astype(np.float64),
+        'max_dist': int(dist.max()) if dist.size else 0,
+        'far_node': int(far[0]) if dist.size else 0
+    }
+
+
+def path_chunk(matrix, sources):
+    A = _binary(matrix)
+    step = max(1, BATCH_CELLS // max(A.shape[0], 1))
+    total = None
+    for i in range(0, len(sources), step):
+        part = _path_batch(A, np.asarray(sources[i:i + step]))
+        if total is None:
+            total = part
+            continue
+        for key in ('delta', 'dist_sum', 'dist_cnt'):
+            total[key] += part[key]
+        if part['max_dist'] > total['max_dist']:
+            total['max_dist'], total['far_node'] = part['max_dist'], part['far_node']
+    return total
+
+
+def louvain(matrix, seed=42):
+    G = nx.from_scipy_sparse_array(matrix, edge_attribute='weight')
+    return [sorted(c) for c in nx.community.louvain_communities(G, weight='weight', seed=seed)]
+
+
+# ---------- 廉价指标：主进程内直接向量化计算 ----------
+
+def components(matrix):
+    n_comp, labels = csgraph.connected_components(matrix, directed=False)
+    sizes = np.bincount(labels, minlength=n_comp)
+    return n_comp, labels, sizes
+
+
+# 批量剥离：第 k 轮反复删除当前度 ≤ k 的全部节点，这些节点核数即为 k
+def core_numbers(matrix):
+    A = _binary(matrix)
+    n = A.shape[0]
+    alive = np.ones(n, dtype=bool)
+    deg = np.asarray(A.sum(axis=1)).ravel()
+    core = np.zeros(n, dtype=np.int64)
+    k = 0
+    while alive.any():
+        k = max(k, int(deg[alive].min()))
+        peel = alive & (deg <= k)
+        while peel.any():
+            core[peel] = k
+            alive[peel] = False
+            deg = A @ alive.astype(np.float64)
+            peel = alive & (deg <= k)
+    return core
+
+
+def clustering(matrix):
+    A = _binary(matrix)
+    deg = np.asarray(A.sum(axis=1)).ravel()
+    triangles = np.asarray((A @ A).multiply(A).sum(axis=1)).ravel() / 2
+    possible = deg * (deg - 1) / 2
+    return np.divide(triangles, possible, out=np.zeros_like(triangles), where=possible > 0)
+
+
+# 鲁棒性：移除度最高的 fraction 比例节点后，最大连通分量剩余比例
+def robustness(matrix, fraction=0.05):
+    n = matrix.shape[0]
+    if n < 2:
+        return 1.0
+    _, _, sizes = components(matrix)
+    removed = np.argsort(-np.diff(matrix.indptr))[:max(1, int(n * fraction))]
+    keep = np.setdiff1d(np.arange(n), removed)
+    _, _, left = components(matrix[keep][:, keep])
+    return float(left.max() / sizes.max()) if len(left) else 0.0
+
+
+def cheap_metrics(graph):
+    matrix = graph.matrix
+    n_comp, comp_labels, sizes = components(matrix)
+    core = core_numbers(matrix)
+    local_cc = clustering(matrix)
+    kmax = int(core.max()) if len(core) else 0
+    return {
+        'n_components': int(n_comp),
+        'lcc_size': int(sizes.max()) if len(sizes) else 0,
+        'component_sizes': sizes[comp_labels],
+        'core': pd.Series(core, index=graph.labels),
+        'kcore_sizes': pd.Series([int((core >= k).sum()) for k in range(kmax + 1)], index=range(kmax + 1)),
+        'clustering': pd.Series(local_cc, index=graph.labels),
+        'avg_clustering': float(local_cc.mean()) if len(local_cc) else 0.0,
+        'robustness': robustness(matrix)
+    }
+
+
+def combine_paths(graph, parts, n_sources, base):
+    n = graph.n_nodes
+    delta = sum(p['delta'] for p in parts)
+    dist_sum = sum(p['dist_sum'] for p in parts)
+    dist_cnt = sum(p['dist_cnt'] for p in parts)
+    # 与 networkx 一致的归一化；抽样时按 n / k 放大
+    scale = 1.0 / ((n - 1) * (n - 2)) if n > 2 else 1.0
+    scale *= n / max(n_sources, 1)
+    avg_d = np.divide(dist_sum, dist_cnt, out=np.zeros(n), where=dist_cnt > 0)
+    reach = base['component_sizes'] - 1
+    closeness = np.divide(reach / max(n - 1, 1), avg_d, out=np.zeros(n), where=avg_d > 0)
+    total_cnt = dist_cnt.sum()
+    diameter = max((p['max_dist'] for p in parts), default=0)
+    if n_sources < n and parts:
+        # 双向扫描：从抽样 BFS 中最远的节点再做一次 BFS，收紧直径下界
+        far = max(parts, key=lambda p: p['max_dist'])['far_node']
+        d = csgraph.shortest_path(graph.matrix, directed=False, unweighted=True, indices=far)
+        diameter = max(diameter, int(d[np.isfinite(d)].max()))
+    return {
+        'betweenness': pd.Series(delta * scale, index=graph.labels),
+        'closeness': pd.Series(closeness, index=graph.labels),
+        'avg_path': float(dist_sum.sum() / total_cnt) if total_cnt else 0.0,
+        'diameter': diameter,
+        'diameter_exact': n_sources >= n
+    }
+
+
+def communities_result(graph, comms):
+    return {'communities': [[graph.labels[i] for i in c] for c in sorted(comms, key=len, reverse=True)]}
+
+
+class NetworkMetricsService:
+    def __init__(self, max_workers=None, exact_nodes=1500, inline_nodes=1500, samples=256, max_entries=8, seed=42):
+        self.max_workers = max_workers or os.cpu_count() or 1
+        self.exact_nodes = exact_nodes
+        self.inline_nodes = inline_nodes
+        self.samples = samples
+        self.max_entries = max_entries
+        self.seed = seed
+        self._results = OrderedDict()
+        self._pending = {}
+        self._inline = {}
+        self._pool = None
+        self._lock = threading.Lock()
+
+    def _executor(self):
+        if self._pool is None:
+            self._pool = ProcessPoolExecutor(self.max_workers, mp_context=multiprocessing.get_context('spawn'))
+        return self._pool
+
+    def _sources(self, graph):
+        n = graph.n_nodes
+        if n <= self.exact_nodes:
+            return np.arange(n)
+        return np.sort(np.random.default_rng(self.seed).choice(n, self.samples, replace=False))
+
+    def _store(self, fp, result):
+        self._results[fp] = result
+        self._results.move_to_end(fp)
+        while len(self._results) > self.max_entries:
+            self._results.popitem(last=False)
+
+    # 返回指标字典；大图在后台进程池中计算，未完成时 result['pending'] 为 True。
+    # 计算都在锁外进行：小图同一指纹只由一个会话计算 (single-flight)，其他会话等待同一结果；
+    # 计算失败的条目不留在缓存里，下次调用重新计算
+    def get(self, graph, wait=False):
+        fp = graph.fingerprint()
+        while True:
+            with self._lock:
+                cached = self._results.get(fp)
+                if cached is not None and not cached['pending']:
+                    self._results.move_to_end(fp)
+                    return cached
+                if graph.n_nodes > self.inline_nodes:
+                    break
+                pending = self._inline.get(fp)
+                owner = pending is None
+                if owner:
+                    pending = self._inline[fp] = Future()
+            if not owner:
+                pending.result()
+                continue
+            try:
+                sources = self._sources(graph)
+                result = dict(cheap_metrics(graph), pending=False)
+                result.update(combine_paths(graph, [path_chunk(graph.matrix, sources)], len(sources), result))
+                result.update(communities_result(graph, louvain(graph.matrix, self.seed)))
+                with self._lock:
+                    self._store(fp, result)
+                pending.set_result(True)
+            except BaseException as e:
+                pending.set_exception(e)
+                raise
+            finally:
+                with self._lock:
+                    self._inline.pop(fp, None)
+            return result
+        return self._get_background(graph, fp, wait)
+
+    def _get_background(self, graph, fp, wait):
+        with self._lock:
+            result = self._results.get(fp)
+        if result is None:
+            fresh = dict(cheap_metrics(graph), pending=True)
+            with self._lock:
+                result = self._results.setdefault(fp, fresh)
+        with self._lock:
+            self._store(fp, result)
+            entry = self._pending.get(fp)
+            if entry is None:
+                pool = self._executor()
+                sources = self._sources(graph)
+                chunks = np.array_split(sources, self.max_workers)
+                entry = self._pending[fp] = {
+                    'paths': [pool.submit(path_chunk, graph.matrix, c) for c in chunks if len(c)],
+                    'louvain': pool.submit(louvain, graph.matrix, self.seed),
+                    'n_sources': len(sources), 'claimed': False,
+                }
+        futures = entry['paths'] + [entry['louvain']]
+        if wait:
+            concurrent.futures.wait(futures)
+        # 全部完成后由一个会话认领合并，其余会话继续看到 pending
+        with self._lock:
+            if entry['claimed'] or not all(f.done() for f in futures):
+                return result
+            entry['claimed'] = True
+        try:
+            error = next((f.exception() for f in futures if f.exception() is not None), None)
+            if error is not None:
+                raise error
+            merged = combine_paths(graph, [f.result() for f in entry['paths']], entry['n_sources'], result)
+            merged.update(communities_result(graph, entry['louvain'].result()))
+        except BaseException:
+            with self._lock:
+                self._pending.pop(fp, None)
+                self._results.pop(fp, None)
+            raise
+        with self._lock:
+            result.update(merged)
+            result['pending'] = False
+            self._pending.pop(fp, None)
+        return result
+
+    def shutdown(self):
+        if self._pool is not None:
+            self._pool.shutdown(cancel_futures=True)
+            self._pool = None
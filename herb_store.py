@@ -0,0 +1,158 @@
+import argparse
+import asyncio
+import os
+import sqlite3
+from contextlib import asynccontextmanager
+
+import aiosqlite
+
+from cache import CACHE_DIR
+
+# ==========================================
+# 🗃️ 药材库：SQLite (WAL) + aiosqlite 连接池，常用筛选列均建索引
+# ==========================================
+
+HERB_DB_PATH = os.environ.get('TCM_HERB_DB', os.path.join(CACHE_DIR, 'herbs.db'))
+
+HERB_FIELDS = ['中药', '产地', '归经', '类别', '四气', '五味', '功效', '频次', '价格']
+INDEXED_FIELDS = ['产地', '归经', '类别']
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS herbs (
+    id INTEGER PRIMARY KEY,
+    "中药" TEXT NOT NULL UNIQUE,
+    "产地" TEXT, "归经" TEXT, "类别" TEXT, "四气" TEXT, "五味" TEXT, "功效" TEXT,
+    "频次" INTEGER DEFAULT 0, "价格" REAL
+);
+""" + "".join(f'CREATE INDEX IF NOT EXISTS "idx_herbs_{f}" ON herbs("{f}", "频次" DESC);\n' for f in INDEXED_FIELDS)
+
+COLUMNS_SQL = ", ".join(f'"{f}"' for f in HERB_FIELDS)
+
+
+# ---------- 同步写入：建表 / 导入 (启动与命令行使用) ----------
+
+def ensure_schema(path=HERB_DB_PATH, seed=None):
+    os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+    with sqlite3.connect(path) as conn:
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.executescript(SCHEMA)
+        if seed and conn.execute("SELECT COUNT(*) FROM herbs").fetchone()[0] == 0:
+            upsert_records(conn, [dict(info, 中药=name) for name, info in seed.items()])
+
+
+def upsert_records(conn, records):
+    placeholders = ", ".join("?" for _ in HERB_FIELDS)
+    # 新数据缺失的字段保留库中原值
+    updates = ", ".join(f'"{f}"=COALESCE(excluded."{f}", herbs."{f}")' for f in HERB_FIELDS[1:])
+    conn.executemany(
+        f'INSERT INTO herbs ({COLUMNS_SQL}) VALUES ({placeholders}) ON CONFLICT("中药") DO UPDATE SET {updates}',
+        [tuple(r.get(f) for f in HERB_FIELDS) for r in records]
+    )
+
+
+def import_frame(df, path=HERB_DB_PATH):
+    # 同名药材只保留一行：维度取首个值，频次累加
+    agg = {f: 'first' for f in HERB_FIELDS[1:] if f in df.columns}
+    if '频次' in agg:
+        agg['频次'] = 'sum'
+    grouped = df.groupby('中药', sort=False).agg(agg).reset_index() if agg else df[['中药']].drop_duplicates()
+    records = grouped.astype(object).where(grouped.notna(), None).to_dict('records')
+    ensure_schema(path)
+    with sqlite3.connect(path) as conn:
+        upsert_records(conn, records)
+    return len(records)
+
+
+# ---------- 异步读取：连接池 ----------
+
+class ConnectionPool:
+    def __init__(self, path, size=8):
+        self.path = path
+        self.size = size
+        self._queue = asyncio.Queue()
+        self._conns = []
+
+    async def open(self):
+        for _ in range(self.size):
+            conn = await aiosqlite.connect(f"file:{self.path}?mode=ro", uri=True)
+            conn.row_factory = aiosqlite.Row
+            await conn.execute("PRAGMA query_only=1")
+            self._conns.append(conn)
+            self._queue.put_nowait(conn)
+
+    @asynccontextmanager
+    async def acquire(self):
+        conn = await self._queue.get()
+        try:
+            yield conn
+        finally:
+            self._queue.put_nowait(conn)
+
+    async def close(self):
+        for conn in self._conns:
+            await conn.close()
+        self._conns.clear()
+
+
+class HerbStore:
+    def __init__(self, path=HERB_DB_PATH, pool_size=8):
+        self.path = path
+        self.pool = ConnectionPool(path, pool_size)
+
+    async def open(self):
+        await self.pool.open()
+
+    async def close(self):
+        await self.pool.close()
+
+    @staticmethod
+    def _where(filters, q):
+        clauses, params = [], []
+        for field, value in filters.items():
+            if value:
+                clauses.append(f'"{field}" = ?')
+                params.append(value)
+        if q:
+            # 前缀范围查询，可走 中药 唯一索引
+            clauses.append('"中药" >= ? AND "中药" < ?')
+            params += [q, q + '\uffff']
+        return (" WHERE " + " AND ".join(clauses)) if clauses else "", params
+
+    async def list_herbs(self, page=1, size=20, q=None, **filters):
+        where, params = self._where({f: filters.get(f) for f in INDEXED_FIELDS}, q)
+        async with self.pool.acquire() as conn:
+            async with conn.execute(f"SELECT COUNT(*) FROM herbs{where}", params) as cur:
+                total = (await cur.fetchone())[0]
+            async with conn.execute(
+                f'SELECT {COLUMNS_SQL} FROM herbs{where} ORDER BY "频次" DESC, "中药" LIMIT ? OFFSET ?',
+                params + [size, (page - 1) * size]
+            ) as cur:
+                items = [dict(row) for row in await cur.fetchall()]
+        return {'items': items, 'total': total}
+
+    async def get_herb(self, name):
+        async with self.pool.acquire() as conn:
+            async with conn.execute(f'SELECT {COLUMNS_SQL} FROM herbs WHERE "中药" = ?', (name,)) as cur:
+                row = await cur.fetchone()
+        return dict(row) if row else None
+
+    async def facets(self, field):
+        async with self.pool.acquire() as conn:
+            async with conn.execute(f'SELECT "{field}", COUNT(*) FROM herbs GROUP BY "{field}" ORDER BY 2 DESC') as cur:
+                return {k: v for k, v in await cur.fetchall()}
+
+
+def main():
+    from ingest import ingest, load_frame
+
+    parser = argparse.ArgumentParser(description="导入药材数据到本地 SQLite 药材库")
+    parser.add_argument('source', help="Excel/CSV/Parquet 文件")
+    parser.add_argument('--db', default=HERB_DB_PATH)
+    args = parser.parse_args()
+    with open(args.source, 'rb') as f:
+        df = load_frame(ingest(os.path.basename(args.source), f.read()))
+    print(f"✅ 已导入 {import_frame(df, args.db)} 味药材 → {args.db}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,122 @@
+import numpy as np
+import scipy.sparse as sp
+
+# ==========================================
+# 🧠 辨证推理引擎：症状 → 证候 → 方剂 倒排索引 + 向量化打分
+# ==========================================
+# 症状-证候权重矩阵按列 L2 归一化，患者症状向量同样归一化，
+# 证候得分即余弦相似度；方剂得分 = 证候得分 @ 证候-方剂权重矩阵。
+
+# 证候 → {症状: 权重}
+SYNDROME_SYMPTOMS = {
+    '风痰闭阻': {'突然昏仆': 1.0, '四肢抽搐': 0.8, '喉间痰鸣': 1.0, '口吐涎沫': 1.0, '神志不清': 0.8, '舌苔白腻': 0.7, '脉弦滑': 0.7, '眩晕': 0.4},
+    '痰火扰神': {'喉间痰鸣': 0.6, '急躁易怒': 1.0, '口苦咽干': 0.8, '便秘溲黄': 0.7, '心烦失眠': 0.8, '舌红苔黄腻': 1.0, '脉弦滑数': 0.8, '神志不清': 0.4},
+    '肝风内动': {'四肢抽搐': 1.0, '两目上视': 1.0, '颈项强直': 0.9, '头晕目眩': 0.7, '面红目赤': 0.6, '脉弦': 0.6, '急躁易怒': 0.4},
+    '瘀阻脑络': {'头部外伤史': 1.0, '头痛固定': 1.0, '单侧肢体抽搐': 0.8, '舌质紫暗': 1.0, '脉涩': 0.8, '面色晦暗': 0.5},
+    '脾虚痰盛': {'神疲乏力': 1.0, '食少便溏': 1.0, '面色萎黄': 0.7, '痰多': 0.8, '舌淡苔白': 0.8, '脉濡滑': 0.6, '眩晕': 0.3},
+    '心肾亏虚': {'健忘': 1.0, '腰膝酸软': 1.0, '头晕耳鸣': 0.8, '失眠多梦': 0.8, '神疲乏力': 0.4, '舌淡红少苔': 0.7, '脉沉细': 0.7},
+}
+
+# 雷达图使用的证候简称
+SYNDROME_SHORT = {'风痰闭阻': '风痰', '痰火扰神': '痰热', '肝风内动': '肝风', '瘀阻脑络': '瘀血', '脾虚痰盛': '脾虚', '心肾亏虚': '心肾'}
+
+FORMULAS = {
+    '定痫丸加减': ['天麻', '胆南星', '半夏', '石菖蒲', '全蝎', '僵蚕', '茯苓', '远志'],
+    '涤痰汤': ['半夏', '胆南星', '茯苓', '石菖蒲', '竹茹', '枳实', '甘草'],
+    '龙胆泻肝汤合涤痰汤': ['龙胆草', '黄芩', '栀子', '胆南星', '半夏', '石菖蒲', '竹茹'],
+    '天麻钩藤饮': ['天麻', '钩藤', '石决明', '栀子', '黄芩', '杜仲', '茯神'],
+    '通窍活血汤': ['赤芍', '川芎', '桃仁', '红花', '当归', '地龙'],
+    '六君子汤': ['人参', '白术', '茯苓', '甘草', '陈皮', '半夏'],
+    '左归丸合天王补心丹': ['熟地黄', '山茱萸', '枸杞子', '酸枣仁', '远志', '当归', '茯苓'],
+}
+
+# 证候 → {方剂: 权重}；主方 1.0，备选方较低
+SYNDROME_FORMULAS = {
+    '风痰闭阻': {'定痫丸加减': 1.0, '涤痰汤': 0.6},
+    '痰火扰神': {'龙胆泻肝汤合涤痰汤': 1.0, '涤痰汤': 0.5},
+    '肝风内动': {'天麻钩藤饮': 1.0, '定痫丸加减': 0.4},
+    '瘀阻脑络': {'通窍活血汤': 1.0},
+    '脾虚痰盛': {'六君子汤': 1.0, '涤痰汤': 0.4},
+    '心肾亏虚': {'左归丸合天王补心丹': 1.0},
+}
+
+FALLBACK = {"formula": "通用基础方", "composition": ["甘草", "茯苓"], "confidence": 0.0}
+
+
+class DiagnosisEngine:
+    def __init__(self, syndrome_symptoms=SYNDROME_SYMPTOMS, syndrome_formulas=SYNDROME_FORMULAS, formulas=FORMULAS):
+        self.syndromes = list(syndrome_symptoms)
+        self.symptoms = sorted({s for weights in syndrome_symptoms.values() for s in weights})
+        self.formulas = list(formulas)
+        self.compositions = formulas
+        self.symptom_index = {s: i for i, s in enumerate(self.symptoms)}
+        formula_index = {f: i for i, f in enumerate(self.formulas)}
+
+        # 倒排索引：症状行 × 证候列，稠密 float32 (知识库规模小，行切片即倒排表)
+        W = np.zeros((len(self.symptoms), len(self.syndromes)), dtype=np.float32)
+        for j, syndrome in enumerate(self.syndromes):
+            for symptom, w in syndrome_symptoms[syndrome].items():
+                W[self.symptom_index[symptom], j] = w
+        self.W = W / np.maximum(np.linalg.norm(W, axis=0), 1e-12)
+
+        F = np.zeros((len(self.syndromes), len(self.formulas)), dtype=np.float32)
+        for j, syndrome in enumerate(self.syndromes):
+            for formula, w in syndrome_formulas.get(syndrome, {}).items():
+                F[j, formula_index[formula]] = w
+        self.F = F
+
+    def encode(self, patients):
+        rows, cols = [], []
+        for r, symptoms in enumerate(patients):
+            ids = {self.symptom_index[s.strip()] for s in symptoms if s.strip() in self.symptom_index}
+            rows += [r] * len(ids)
+            cols += ids
+        X = sp.csr_matrix((np.ones(len(rows), dtype=np.float32), (rows, cols)), shape=(len(patients), len(self.symptoms)))
+        # 行归一化：证候得分为余弦相似度
+        norms = np.sqrt(np.asarray(X.sum(axis=1)).ravel())
+        return sp.diags(np.divide(1.0, norms, out=np.zeros_like(norms), where=norms > 0)) @ X
+
+    def score(self, X):
+        syndrome_scores = np.asarray(X @ self.W)
+        return syndrome_scores, syndrome_scores @ self.F
+
+    @staticmethod
+    def top_k(scores, k):
+        k = min(k, scores.shape[1])
+        idx = np.argpartition(-scores, k - 1, axis=1)[:, :k]
+        order = np.argsort(-np.take_along_axis(scores, idx, axis=1), axis=1)
+        return np.take_along_axis(idx, order, axis=1)
+
+    def _format(self, symptoms, syndrome_row, formula_row, syndrome_top, formula_top):
+        unknown = [s for s in symptoms if s.strip() not in self.symptom_index]
+        syndromes = [{"证候": self.syndromes[j], "得分": round(float(syndrome_row[j]), 4)} for j in syndrome_top if syndrome_row[j] > 0]
+        if not syndromes:
+            return dict(FALLBACK, syndromes=[], alternatives=[], unknown=unknown)
+        best = self.formulas[formula_top[0]]
+        return {
+            "formula": best,
+            "composition": self.compositions[best],
+            "confidence": round(float(syndrome_row[syndrome_top[0]]), 4),
+            "syndromes": syndromes,
+            "alternatives": [self.formulas[f] for f in formula_top[1:] if formula_row[f] > 0],
+            "unknown": unknown,
+        }
+
+    def diagnose_batch(self, patients, top_k=3):
+        syndrome_scores, formula_scores = self.score(self.encode(patients))
+        syndrome_top = self.top_k(syndrome_scores, top_k)
+        formula_top = self.top_k(formula_scores, top_k)
+        return [self._format(p, syndrome_scores[i], formula_scores[i], syndrome_top[i], formula_top[i]) for i, p in enumerate(patients)]
+
+    # 单例快速通道：直接对倒排行求和，不经过稀疏矩阵构造
+    def diagnose(self, symptoms, top_k=3):
+        ids = sorted({self.symptom_index[s.strip()] for s in symptoms if s.strip() in self.symptom_index})
+        syndrome_row = self.W[ids].sum(axis=0) / np.sqrt(len(ids)) if ids else np.zeros(len(self.syndromes), dtype=np.float32)
+        formula_row = syndrome_row @ self.F
+        syndrome_top = self.top_k(syndrome_row[None, :], top_k)[0]
+        formula_top = self.top_k(formula_row[None, :], top_k)[0]
+        return self._format(symptoms, syndrome_row, formula_row, syndrome_top, formula_top)
+
+    def radar(self, result):
+        scores = {d["证候"]: d["得分"] for d in result.get("syndromes", [])}
+        return [SYNDROME_SHORT.get(s, s) for s in self.syndromes], [scores.get(s, 0.0) for s in self.syndromes]
@@ -0,0 +1,85 @@
+import io
+import os
+
+import pandas as pd
+import pyarrow as pa
+import pyarrow.csv as pacsv
+import pyarrow.ipc as ipc
+import pyarrow.parquet as pq
+
+from cache import CACHE_DIR, content_hash, evict_lru
+from engine import COL_MAP
+
+# ==========================================
+# 📥 列式导入：上传文件 → 带类型的 Arrow 文件 → 内存映射零拷贝加载
+# ==========================================
+# 首次上传时解析一次 (Excel/CSV/Parquet)，落盘为未压缩的 Arrow IPC 文件；
+# 之后同一内容的文件直接 memory_map 读取，不再经过 openpyxl。
+# 导入目录按总字节数淘汰，最久未使用的文件先删；已映射的文件删除后仍可继续读取。
+
+INGEST_DIR = os.path.join(CACHE_DIR, 'ingest')
+MAX_INGEST_BYTES = 2 * 1024 * 1024 * 1024
+SUPPORTED_TYPES = ['xlsx', 'xls', 'csv', 'parquet']
+CATEGORICAL_COLUMNS = ['产地', '类别', '四气', '五味', '归经']
+
+try:
+    import python_calamine  # noqa: F401  Rust 实现的 Excel 解析器，比 openpyxl 快一个数量级
+    EXCEL_ENGINE = 'calamine'
+except ImportError:
+    EXCEL_ENGINE = None
+
+
+def _suffix(name):
+    return os.path.splitext(name)[1].lower().lstrip('.')
+
+
+def read_source(name, data):
+    suffix = _suffix(name)
+    if suffix == 'csv':
+        return pacsv.read_csv(io.BytesIO(data))
+    if suffix == 'parquet':
+        return pq.read_table(io.BytesIO(data))
+    if suffix in ('xlsx', 'xls'):
+        df = pd.read_excel(io.BytesIO(data), engine=EXCEL_ENGINE)
+        return pa.Table.from_pandas(df, preserve_index=False)
+    raise ValueError(f"不支持的文件类型: {name}")
+
+
+def normalize_table(table):
+    # 统一中英文表头，并把低基数维度列字典编码 (读回 pandas 即为 category)
+    table = table.rename_columns([COL_MAP.get(c, c) for c in table.column_names])
+    for i, name in enumerate(table.column_names):
+        col = table.column(i)
+        if name in CATEGORICAL_COLUMNS and (pa.types.is_string(col.type) or pa.types.is_large_string(col.type)):
+            table = table.set_column(i, name, col.dictionary_encode())
+    return table
+
+
+def ingest_path(file_hash, directory=None):
+    return os.path.join(directory or CACHE_DIR, 'ingest', f"{file_hash}.arrow")
+
+
+# 命中时刷新 mtime；新写入后按 max_bytes 淘汰其余文件
+def ingest(name, data, file_hash=None, directory=None, max_bytes=MAX_INGEST_BYTES):
+    path = ingest_path(file_hash or content_hash(data), directory)
+    if os.path.exists(path):
+        os.utime(path)
+        return path
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    table = normalize_table(read_source(name, data))
+    tmp = f"{path}.{os.getpid()}.tmp"
+    # 不压缩，保证后续可以直接 memory_map 零拷贝
+    with pa.OSFile(tmp, 'wb') as sink, ipc.new_file(sink, table.schema) as writer:
+        writer.write_table(table)
+    os.replace(tmp, path)
+    evict_lru(os.path.dirname(path), max_bytes, keep=(path,))
+    return path
+
+
+def load_table(path):
+    return ipc.open_file(pa.memory_map(path, 'r')).read_all()
+
+
+def load_frame(path):
+    # split_blocks 让无空值的数值列直接引用映射内存，不做整块合并拷贝
+    return load_table(path).to_pandas(split_blocks=True)
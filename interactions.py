@@ -0,0 +1,140 @@
+import numpy as np
+import pandas as pd
+import scipy.sparse as sp
+
+# ==========================================
+# ⚠️ 配伍审查：十八反 / 十九畏 / 妊娠禁忌 / 中西药相互作用
+# ==========================================
+# 规则编译为词表 + 位集：单张处方用整数位掩码做 O(N) 次按位与；
+# 批量审查把处方编码成稀疏 0/1 矩阵，对所有规则对一次性做列乘积。
+
+# (级别, 类型, 甲组, 乙组, 说明)；组内任一药与另一组任一药同用即命中
+PAIR_RULES = [
+    ('禁忌', '十八反', ['甘草'], ['甘遂', '京大戟', '大戟', '海藻', '芫花'], "甘草反甘遂、大戟、海藻、芫花"),
+    ('禁忌', '十八反', ['乌头', '川乌', '草乌', '附子'], ['半夏', '瓜蒌', '瓜蒌皮', '瓜蒌子', '天花粉', '贝母', '川贝母', '浙贝母', '白蔹', '白及'], "乌头反半夏、瓜蒌、贝母、白蔹、白及"),
+    ('禁忌', '十八反', ['藜芦'], ['人参', '沙参', '南沙参', '北沙参', '丹参', '玄参', '苦参', '细辛', '芍药', '白芍', '赤芍'], "藜芦反诸参、细辛、芍药"),
+    ('慎用', '十九畏', ['硫黄'], ['朴硝', '芒硝'], "硫黄畏朴硝"),
+    ('慎用', '十九畏', ['水银'], ['砒霜'], "水银畏砒霜"),
+    ('慎用', '十九畏', ['狼毒'], ['密陀僧'], "狼毒畏密陀僧"),
+    ('慎用', '十九畏', ['巴豆'], ['牵牛子'], "巴豆畏牵牛"),
+    ('慎用', '十九畏', ['丁香'], ['郁金'], "丁香畏郁金"),
+    ('慎用', '十九畏', ['川乌', '草乌'], ['犀角'], "川乌、草乌畏犀角"),
+    ('慎用', '十九畏', ['牙硝', '芒硝'], ['三棱'], "牙硝畏三棱"),
+    ('慎用', '十九畏', ['官桂', '肉桂'], ['赤石脂'], "官桂畏赤石脂"),
+    ('慎用', '十九畏', ['人参'], ['五灵脂'], "人参畏五灵脂"),
+    ('注意', '中西药', ['石菖蒲'], ['苯巴比妥'], "石菖蒲与苯巴比妥合用可能增加镇静作用"),
+    ('注意', '中西药', ['酸枣仁', '远志'], ['苯巴比妥', '地西泮'], "与镇静催眠药合用可能加重中枢抑制"),
+    ('慎用', '中西药', ['甘草'], ['地高辛'], "甘草致低血钾，可增加地高辛毒性"),
+    ('注意', '中西药', ['甘草'], ['氢氯噻嗪', '呋塞米'], "与排钾利尿药合用加重低血钾"),
+    ('注意', '中西药', ['甘草'], ['泼尼松'], "甘草增强糖皮质激素作用"),
+    ('慎用', '中西药', ['当归', '丹参', '川芎', '红花', '桃仁', '银杏叶'], ['华法林', '阿司匹林'], "活血药与抗凝/抗血小板药合用增加出血风险"),
+    ('注意', '中西药', ['人参'], ['华法林'], "人参可能降低华法林抗凝效果"),
+    ('注意', '中西药', ['钩藤', '天麻'], ['硝苯地平'], "与降压药合用可能致血压过低"),
+]
+
+# 妊娠禁用 / 慎用
+PREGNANCY_RULES = {
+    '禁忌': ['全蝎', '蜈蚣', '水蛭', '虻虫', '斑蝥', '麝香', '巴豆', '牵牛子', '甘遂', '京大戟', '大戟', '芫花', '商陆', '三棱', '莪术', '马钱子', '朱砂', '雄黄', '轻粉'],
+    '慎用': ['桃仁', '红花', '牛膝', '川芎', '附子', '枳实', '大黄', '天南星', '胆南星', '僵蚕', '地龙'],
+}
+
+WESTERN_DRUGS = sorted({d for level, kind, a, b, _ in PAIR_RULES if kind == '中西药' for d in b})
+
+LEVEL_ORDER = {'禁忌': 0, '慎用': 1, '注意': 2}
+
+
+class InteractionChecker:
+    def __init__(self, pair_rules=PAIR_RULES, pregnancy_rules=PREGNANCY_RULES):
+        names = set()
+        for _, _, a, b, _ in pair_rules:
+            names.update(a)
+            names.update(b)
+        for members in pregnancy_rules.values():
+            names.update(members)
+        self.names = sorted(names)
+        self.index = {n: i for i, n in enumerate(self.names)}
+
+        # 展开为两两规则：端点 id 数组 + 规则元信息
+        pairs = {}
+        for level, kind, group_a, group_b, note in pair_rules:
+            for a in group_a:
+                for b in group_b:
+                    if a == b:
+                        continue
+                    key = tuple(sorted((self.index[a], self.index[b])))
+                    if key not in pairs or LEVEL_ORDER[level] < LEVEL_ORDER[pairs[key][0]]:
+                        pairs[key] = (level, kind, note)
+        keys = sorted(pairs)
+        self.pair_a = np.array([k[0] for k in keys], dtype=np.int64)
+        self.pair_b = np.array([k[1] for k in keys], dtype=np.int64)
+        self.pair_meta = [pairs[k] for k in keys]
+        self.pair_id = {k: r for r, k in enumerate(keys)}
+
+        # 位集：conflicts[i] 的第 j 位表示 i 与 j 存在配伍规则
+        self.conflicts = [0] * len(self.names)
+        for a, b in keys:
+            self.conflicts[a] |= 1 << b
+            self.conflicts[b] |= 1 << a
+        self.pregnancy_level = {}
+        for level in sorted(pregnancy_rules, key=LEVEL_ORDER.get, reverse=True):
+            for name in pregnancy_rules[level]:
+                self.pregnancy_level[self.index[name]] = level
+        self.pregnancy_mask = sum(1 << i for i in self.pregnancy_level)
+
+    def _finding(self, r):
+        level, kind, note = self.pair_meta[r]
+        return {'级别': level, '类型': kind, '药物A': self.names[self.pair_a[r]], '药物B': self.names[self.pair_b[r]], '说明': note}
+
+    def _pregnancy_finding(self, i):
+        level = self.pregnancy_level[i]
+        return {'级别': level, '类型': '妊娠禁忌', '药物A': self.names[i], '药物B': None, '说明': f"孕妇{'禁用' if level == '禁忌' else '慎用'}{self.names[i]}"}
+
+    @staticmethod
+    def _sorted(findings):
+        return sorted(findings, key=lambda f: (LEVEL_ORDER[f['级别']], f['类型']))
+
+    # 单张处方：N 次整数按位与，命中位再查规则
+    def check(self, items, pregnant=False):
+        ids = sorted({self.index[x] for x in items if x in self.index})
+        mask = 0
+        for i in ids:
+            mask |= 1 << i
+        findings = []
+        for i in ids:
+            hits = self.conflicts[i] & mask & ~((1 << (i + 1)) - 1)
+            while hits:
+                j = (hits & -hits).bit_length() - 1
+                findings.append(self._finding(self.pair_id[(i, j)]))
+                hits &= hits - 1
+        if pregnant:
+            findings += [self._pregnancy_finding(i) for i in ids if self.pregnancy_mask >> i & 1]
+        return self._sorted(findings)
+
+    # 批量审查：处方 × 词表 稀疏矩阵，所有规则对的两列逐元素相乘即得命中
+    def check_batch(self, prescriptions, pregnant=None):
+        rows, cols = [], []
+        for r, items in enumerate(prescriptions):
+            ids = {self.index[x] for x in items if x in self.index}
+            rows += [r] * len(ids)
+            cols += ids
+        P = len(prescriptions)
+        X = sp.csc_matrix((np.ones(len(rows), dtype=np.int8), (rows, cols)), shape=(P, len(self.names)))
+        hits = X[:, self.pair_a].multiply(X[:, self.pair_b]).tocoo()
+        results = [[] for _ in range(P)]
+        for p, r in zip(hits.row, hits.col):
+            results[p].append(self._finding(r))
+
+        if pregnant is not None and self.pregnancy_level:
+            flags = np.asarray(pregnant if np.ndim(pregnant) else [pregnant] * P, dtype=bool)
+            preg_ids = np.array(sorted(self.pregnancy_level))
+            preg_hits = X[:, preg_ids].tocoo()
+            for p, c in zip(preg_hits.row, preg_hits.col):
+                if flags[p]:
+                    results[p].append(self._pregnancy_finding(preg_ids[c]))
+        return [self._sorted(f) for f in results]
+
+    def summary(self, results):
+        flat = [f for findings in results for f in findings]
+        if not flat:
+            return pd.DataFrame(columns=['级别', '类型', '命中次数'])
+        return pd.DataFrame(flat).groupby(['级别', '类型']).size().rename('命中次数').reset_index()
@@ -0,0 +1,177 @@
+import hashlib
+import threading
+from collections import OrderedDict
+
+import networkx as nx
+import numpy as np
+import plotly.graph_objects as go
+
+# ==========================================
+# 🧭 布局服务：按图指纹缓存坐标、增量热启动、分级细节 (LOD) 渲染
+# ==========================================
+# 坐标以 (n, 2) 数组存储，与 CooccurrenceGraph.labels 顺序一致；
+# 新图与上一次布局共享的节点沿用旧坐标，只做少量迭代微调。
+
+MAX_EDGES = 3000
+MAX_NODES = 5000
+MAX_LAYOUT_NODES = 3000
+WEBGL_NODES = 1000
+BLOCK_CELLS = 2 ** 22
+
+
+# Fruchterman-Reingold (与 networkx 同一受力公式)：斥力按行分块计算，
+# 避免 n×n×2 的三维临时数组；引力只沿稀疏边计算
+def force_layout(matrix, init=None, iterations=50, temperature=0.1, seed=42, threshold=1e-4):
+    n = matrix.shape[0]
+    if n == 0:
+        return np.zeros((0, 2))
+    rng = np.random.default_rng(seed)
+    pos = rng.uniform(0, 1, (n, 2)) if init is None else np.asarray(init, dtype=np.float64).copy()
+    if n == 1:
+        return np.zeros((1, 2))
+    coo = matrix.tocoo()
+    rows, cols, weight = coo.row, coo.col, coo.data.astype(np.float64)
+    k = np.sqrt(1.0 / n)
+    t = temperature * max(np.ptp(pos[:, 0]), np.ptp(pos[:, 1]), 1e-3)
+    dt = t / (iterations + 1)
+    step = max(1, BLOCK_CELLS // n)
+    for _ in range(iterations):
+        disp = np.zeros((n, 2))
+        pos32 = pos.astype(np.float32)
+        x, y = pos32[:, 0], pos32[:, 1]
+        for start in range(0, n, step):
+            blk = slice(start, min(start + step, n))
+            dx = x[blk, None] - x[None, :]
+            dy = y[blk, None] - y[None, :]
+            # 原地运算：inv = k² / max(dx² + dy², 1e-4)，只保留三个 float32 块
+            inv = dx * dx
+            inv += dy * dy
+            np.maximum(inv, 1e-4, out=inv)
+            np.divide(k * k, inv, out=inv)
+            disp[blk, 0] = np.einsum('ij,ij->i', dx, inv)
+            disp[blk, 1] = np.einsum('ij,ij->i', dy, inv)
+        delta = pos[rows] - pos[cols]
+        dist = np.maximum(np.sqrt((delta * delta).sum(axis=1)), 0.01)
+        pull = weight * dist / k
+        disp[:, 0] -= np.bincount(rows, pull * delta[:, 0], minlength=n)
+        disp[:, 1] -= np.bincount(rows, pull * delta[:, 1], minlength=n)
+        length = np.maximum(np.sqrt((disp * disp).sum(axis=1)), 0.01)
+        delta_pos = disp * (t / length)[:, None]
+        pos += delta_pos
+        t -= dt
+        if np.linalg.norm(delta_pos) / n < threshold:
+            break
+    return nx.rescale_layout(pos)
+
+
+def node_key(labels):
+    return hashlib.sha256('\x1f'.join(map(str, labels)).encode('utf-8')).hexdigest()[:16]
+
+
+class LayoutService:
+    def __init__(self, max_entries=16, iterations=50, warm_iterations=15, max_layout_nodes=MAX_LAYOUT_NODES, seed=42):
+        self.max_entries = max_entries
+        self.max_layout_nodes = max_layout_nodes
+        self.iterations = iterations
+        self.warm_iterations = warm_iterations
+        self.seed = seed
+        self._layouts = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    # scope 为数据集键：热启动只沿用同一数据集或同一节点集合的旧布局，不同数据集之间互不影响
+    def positions(self, graph, scope=None):
+        fp = graph.fingerprint()
+        nodes = node_key(graph.labels)
+        with self._lock:
+            if fp in self._layouts:
+                self._layouts.move_to_end(fp)
+                self.hits += 1
+                return self._layouts[fp][3]
+            self.misses += 1
+            previous = next(((labels, pos) for s, key, labels, pos in reversed(self._layouts.values())
+                             if key == nodes or (scope is not None and s == scope)), None)
+
+        init = self._warm_start(graph, previous)
+        if graph.n_nodes > self.max_layout_nodes:
+            # 超大图：只对度最高的骨干节点做力导向，其余节点挂到邻居质心附近 (热启动时沿用旧坐标)
+            core = np.zeros(graph.n_nodes, dtype=bool)
+            core[np.argpartition(-graph.degree(), self.max_layout_nodes)[:self.max_layout_nodes]] = True
+            sub = graph.matrix[core][:, core]
+            if init is None:
+                pos = np.random.default_rng(self.seed).uniform(-1, 1, (graph.n_nodes, 2))
+                pos[core] = force_layout(sub, iterations=self.iterations, seed=self.seed)
+                pos = self._attach(graph, pos, core)
+            else:
+                pos = init
+                pos[core] = force_layout(sub, init[core], iterations=self.warm_iterations, temperature=0.02, seed=self.seed)
+        elif init is None:
+            pos = force_layout(graph.matrix, iterations=self.iterations, seed=self.seed)
+        else:
+            # 热启动：降低初始温度，只做少量迭代，已有节点基本保持原位
+            pos = force_layout(graph.matrix, init, iterations=self.warm_iterations, temperature=0.02, seed=self.seed)
+
+        with self._lock:
+            self._layouts[fp] = (scope, nodes, graph.labels, pos)
+            while len(self._layouts) > self.max_entries:
+                self._layouts.popitem(last=False)
+        return pos
+
+    # 旧节点沿用旧坐标；新节点放在已布局邻居的质心附近，没有邻居则随机撒点
+    def _warm_start(self, graph, previous):
+        if previous is None or graph.n_nodes == 0:
+            return None
+        old_labels, old_pos = previous
+        index = {label: i for i, label in enumerate(old_labels)}
+        old_idx = np.array([index.get(label, -1) for label in graph.labels])
+        known = old_idx >= 0
+        if not known.any():
+            return None
+        pos = np.random.default_rng(self.seed).uniform(-1, 1, (graph.n_nodes, 2))
+        pos[known] = old_pos[old_idx[known]]
+        return self._attach(graph, pos, known)
+
+    def _attach(self, graph, pos, placed):
+        if placed.all():
+            return pos
+        A = graph.matrix[~placed][:, placed]
+        counts = np.asarray(A.sum(axis=1)).ravel()[:, None]
+        centroid = np.divide(A @ pos[placed], counts, out=np.zeros(((~placed).sum(), 2)), where=counts > 0)
+        jitter = np.random.default_rng(self.seed).normal(0, 0.05, centroid.shape)
+        pos[~placed] = np.where(counts > 0, centroid + jitter, pos[~placed])
+        return pos
+
+
+# 边坐标：每条边 [x0, x1, NaN]，一次性展平，NaN 让 Plotly 断开线段
+def edge_coordinates(pos, rows, cols):
+    xs = np.empty((len(rows), 3))
+    ys = np.empty((len(rows), 3))
+    xs[:, 0], xs[:, 1], xs[:, 2] = pos[rows, 0], pos[cols, 0], np.nan
+    ys[:, 0], ys[:, 1], ys[:, 2] = pos[rows, 1], pos[cols, 1], np.nan
+    return xs.ravel(), ys.ravel()
+
+
+def network_figure(graph, pos, max_edges=MAX_EDGES, max_nodes=MAX_NODES, webgl_nodes=WEBGL_NODES, height=400):
+    nodes = np.arange(graph.n_nodes)
+    if graph.n_nodes > max_nodes:
+        nodes = np.sort(np.argpartition(-graph.degree(), max_nodes)[:max_nodes])
+    keep = np.zeros(graph.n_nodes, dtype=bool)
+    keep[nodes] = True
+
+    rows, cols, weight = graph.edge_arrays()
+    mask = keep[rows] & keep[cols]
+    rows, cols, weight = rows[mask], cols[mask], weight[mask]
+    if len(weight) > max_edges:
+        top = np.argpartition(-weight, max_edges)[:max_edges]
+        rows, cols = rows[top], cols[top]
+
+    scatter = go.Scattergl if len(nodes) > webgl_nodes else go.Scatter
+    # 坐标保留 3 位小数，显著缩小 JSON 体积
+    coords = np.round(pos, 3)
+    edge_x, edge_y = edge_coordinates(coords, rows, cols)
+    fig = go.Figure(scatter(x=edge_x, y=edge_y, mode='lines', line=dict(width=0.3, color='#888'), hoverinfo='skip'))
+    fig.add_trace(scatter(x=coords[nodes, 0], y=coords[nodes, 1], mode='markers', marker=dict(size=5, color='cyan'),
+                          text=graph.labels[nodes], hoverinfo='text'))
+    fig.update_layout(showlegend=False, margin=dict(t=0, b=0, l=0, r=0), height=height, paper_bgcolor='rgba(0,0,0,0)')
+    return fig
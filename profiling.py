@@ -0,0 +1,144 @@
+import contextlib
+import json
+import os
+import threading
+import time
+import tracemalloc
+
+try:
+    import psutil
+except ImportError:
+    psutil = None
+
+# ==========================================
+# 🩺 性能剖析：模块 / 处理阶段的耗时、tracemalloc 峰值内存、Plotly 序列化体积
+# ==========================================
+# TCM_PROFILE=1 开启 (含 tracemalloc 内存追踪，重跑会慢数倍)；TCM_PROFILE=time 只计耗时；未设置时 section()
+# 直接返回共享的空上下文，payload() 立即返回，几乎没有开销。
+# 结果可导出为 JSON 或 Prometheus 文本格式。
+
+PROFILE_MODE = os.environ.get('TCM_PROFILE', '').strip().lower()
+ENABLED = PROFILE_MODE not in ('', '0', 'false', 'off')
+TRACE_MEMORY = ENABLED and PROFILE_MODE != 'time'
+METRIC_PREFIX = 'tcm'
+
+_NULL = contextlib.nullcontext()
+_PROCESS = psutil.Process() if psutil is not None else None
+
+
+# 进程级 CPU (自上次调用以来的占用率) / 常驻内存；没有 psutil 时返回 None
+def process_stats():
+    if _PROCESS is None:
+        return {'CPU': None, 'RSS': None, '线程数': threading.active_count()}
+    with _PROCESS.oneshot():
+        return {'CPU': _PROCESS.cpu_percent(interval=None), 'RSS': _PROCESS.memory_info().rss, '线程数': _PROCESS.num_threads()}
+
+
+class Profiler:
+    def __init__(self, enabled=ENABLED, trace_memory=TRACE_MEMORY):
+        self.enabled = enabled
+        self.trace_memory = trace_memory
+        self.records = {}
+        self._payload_ids = {}
+        self._lock = threading.Lock()
+        self._local = threading.local()
+
+    def _record(self, name, kind):
+        rec = self.records.get(name)
+        if rec is None:
+            rec = self.records[name] = {'类型': kind, '次数': 0, '总耗时': 0.0, '最近耗时': 0.0, '最大耗时': 0.0, '峰值内存': 0, '图表体积': 0}
+        return rec
+
+    def section(self, name, kind='module'):
+        return self._section(name, kind) if self.enabled else _NULL
+
+    # 嵌套区段共用 tracemalloc 的峰值计数：进入子区段前先把父区段已观察到的峰值记下，退出时再回传
+    @contextlib.contextmanager
+    def _section(self, name, kind):
+        stack = getattr(self._local, 'stack', None)
+        if stack is None:
+            stack = self._local.stack = []
+        if self.trace_memory:
+            if not tracemalloc.is_tracing():
+                tracemalloc.start()
+            current, peak = tracemalloc.get_traced_memory()
+            if stack:
+                stack[-1][1] = max(stack[-1][1], peak)
+            tracemalloc.reset_peak()
+            frame = [current, current]
+        else:
+            frame = [0, 0]
+        stack.append(frame)
+        t0 = time.perf_counter()
+        try:
+            yield
+        finally:
+            elapsed = time.perf_counter() - t0
+            stack.pop()
+            peak = 0
+            if self.trace_memory:
+                peak = max(frame[1], tracemalloc.get_traced_memory()[1])
+                if stack:
+                    stack[-1][1] = max(stack[-1][1], peak)
+            self.record(name, kind, elapsed, peak - frame[0])
+
+    # 外部自行计时的区段 (如整页渲染) 直接登记
+    def record(self, name, kind, elapsed, peak_memory=0):
+        if not self.enabled:
+            return
+        with self._lock:
+            rec = self._record(name, kind)
+            rec['次数'] += 1
+            rec['总耗时'] += elapsed
+            rec['最近耗时'] = elapsed
+            rec['最大耗时'] = max(rec['最大耗时'], elapsed)
+            rec['峰值内存'] = max(rec['峰值内存'], peak_memory)
+
+    # 记录图表序列化后的字节数；记忆化返回的同一 Figure 不重复序列化
+    def payload(self, name, fig):
+        if not self.enabled or self._payload_ids.get(name) == id(fig):
+            return
+        size = len(fig.to_json().encode('utf-8'))
+        with self._lock:
+            self._payload_ids[name] = id(fig)
+            self._record(name, 'module')['图表体积'] = size
+
+    def reset(self):
+        with self._lock:
+            self.records.clear()
+            self._payload_ids.clear()
+
+    def rows(self):
+        with self._lock:
+            rows = [{'名称': name, **rec} for name, rec in self.records.items()]
+        return sorted(rows, key=lambda r: -r['总耗时'])
+
+    def to_json(self):
+        return json.dumps({'process': process_stats(), 'sections': self.rows()}, ensure_ascii=False, indent=2)
+
+    def to_prometheus(self):
+        metrics = [
+            ('section_seconds_total', 'counter', '总耗时', "累计耗时 (秒)"),
+            ('section_calls_total', 'counter', '次数', "调用次数"),
+            ('section_last_seconds', 'gauge', '最近耗时', "最近一次耗时 (秒)"),
+            ('section_peak_memory_bytes', 'gauge', '峰值内存', "tracemalloc 峰值内存增量 (字节)"),
+            ('figure_payload_bytes', 'gauge', '图表体积', "Plotly 图表 JSON 体积 (字节)"),
+        ]
+        rows = self.rows()
+        lines = []
+        for metric, kind, field, help_text in metrics:
+            lines += [f"# HELP {METRIC_PREFIX}_{metric} {help_text}", f"# TYPE {METRIC_PREFIX}_{metric} {kind}"]
+            for r in rows:
+                if field == '图表体积' and not r[field]:
+                    continue
+                name = r['名称'].replace('\\', '\\\\').replace('"', '\\"')
+                lines.append(f'{METRIC_PREFIX}_{metric}{{section="{name}",kind="{r["类型"]}"}} {r[field]}')
+        stats = process_stats()
+        if stats['CPU'] is not None:
+            lines += [f"# TYPE {METRIC_PREFIX}_process_cpu_percent gauge", f"{METRIC_PREFIX}_process_cpu_percent {stats['CPU']}",
+                      f"# TYPE {METRIC_PREFIX}_process_resident_memory_bytes gauge", f"{METRIC_PREFIX}_process_resident_memory_bytes {stats['RSS']}"]
+        return "\n".join(lines) + "\n"
+
+
+PROFILER = Profiler()
+section = PROFILER.section
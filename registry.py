@@ -0,0 +1,90 @@
+import threading
+import time
+from collections import OrderedDict
+
+from profiling import section
+from streaming import TABLE_NAMES
+
+# ==========================================
+# 🧩 模块注册表：按需计算 + 按数据集哈希记忆化
+# ==========================================
+# 每个看板模块登记 compute 函数与其依赖的数据表；只有被渲染的模块才会计算，
+# 同一数据集 (content hash + seed) 下重复渲染直接返回同一个 Figure 对象。
+# deps 既可以是数据表名，也可以是另一个已注册模块 (派生数据，如对接矩阵)；
+# keyed=True 的模块额外收到 dataset_key，用于按数据集落盘。
+# 带参数的模块 (地图视窗、单药富集) 每个参数组合一格，按模块 LRU 限额，避免逐个下拉项累积。
+
+
+def as_tables(tables):
+    return tables if isinstance(tables, dict) else dict(zip(TABLE_NAMES, tables))
+
+
+class ModuleRegistry:
+    def __init__(self, max_datasets=4, max_variants=8):
+        self.modules = {}
+        self.max_datasets = max_datasets
+        self.max_variants = max_variants
+        self._memo = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.timings = {}
+
+    def register(self, name, deps=(), tab=None, keyed=False):
+        def decorator(fn):
+            self.modules[name] = {'compute': fn, 'deps': tuple(deps), 'tab': tab, 'keyed': keyed}
+            return fn
+        return decorator
+
+    def names(self, tab=None):
+        return [n for n, m in self.modules.items() if tab is None or m['tab'] == tab]
+
+    def _slot(self, dataset_key):
+        slot = self._memo.get(dataset_key)
+        if slot is None:
+            slot = self._memo[dataset_key] = {}
+            while len(self._memo) > self.max_datasets:
+                self._memo.popitem(last=False)
+        self._memo.move_to_end(dataset_key)
+        return slot
+
+    def _store(self, dataset_key, name, memo_key, value):
+        variants = self._slot(dataset_key).setdefault(name, OrderedDict())
+        variants[memo_key] = value
+        variants.move_to_end(memo_key)
+        while len(variants) > self.max_variants:
+            variants.popitem(last=False)
+
+    def compute(self, name, tables, dataset_key, **params):
+        module = self.modules[name]
+        memo_key = tuple(sorted(params.items()))
+        with self._lock:
+            variants = self._slot(dataset_key).get(name)
+            if variants is not None and memo_key in variants:
+                variants.move_to_end(memo_key)
+                self.hits += 1
+                return variants[memo_key]
+        tables = as_tables(tables)
+        args = [self.compute(d, tables, dataset_key) if d in self.modules else tables[d] for d in module['deps']]
+        if module['keyed']:
+            params['dataset_key'] = dataset_key
+        t0 = time.perf_counter()
+        with section(name, 'module'):
+            value = module['compute'](*args, **params)
+        with self._lock:
+            self.misses += 1
+            self.timings[name] = time.perf_counter() - t0
+            self._store(dataset_key, name, memo_key, value)
+        return value
+
+    # 直接登记已算好的值 (如流式处理全程累加的立方体)，优先于按样本表重新计算
+    def provide(self, name, dataset_key, value, **params):
+        with self._lock:
+            self._store(dataset_key, name, tuple(sorted(params.items())), value)
+
+    def invalidate(self, dataset_key=None):
+        with self._lock:
+            if dataset_key is None:
+                self._memo.clear()
+            else:
+                self._memo.pop(dataset_key, None)
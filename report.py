@@ -0,0 +1,353 @@
+import argparse
+import base64
+import functools
+import html
+import inspect
+import io
+import json
+import multiprocessing
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+import plotly.io as pio
+
+from cache import CACHE_DIR, content_hash, make_key
+from engine import process_data
+from enrichment import FDR_CUTOFF
+from figures import REGISTRY
+from ingest import ingest, load_frame
+from streaming import TABLE_NAMES, RunningKPIs, evict_streams, process_stream, should_stream, stream_dir
+
+try:
+    import kaleido  # noqa: F401  静态图导出 (PDF / 图片版 HTML) 依赖
+    HAS_KALEIDO = True
+except ImportError:
+    HAS_KALEIDO = False
+
+# ==========================================
+# 📑 批量报表：无 Streamlit 跑完 process_data + 全部看板模块，导出 JSON / HTML / PDF
+# ==========================================
+# 模块经 figures.REGISTRY 计算，立方体 / 对接矩阵 / 富集表等派生数据在同一数据集内只算一次；
+# 多个数据集按进程池并行 (每个进程独立完成一个数据集)，吞吐随核数线性增长；
+# 单个数据集时改为把静态图渲染分发到进程池。各格式边生成边写文件，不在内存中拼整份报告。
+# 用法：python report.py a.xlsx b.csv demo --out reports --format json html pdf --workers 8
+
+REPORT_DIR = os.path.join(CACHE_DIR, 'reports')
+FORMATS = ['json', 'html', 'pdf']
+TAB_TITLES = {1: "全景生态", 2: "网络挖掘", 3: "深度机制", 4: "药性化学", 5: "循证历史", 6: "临床智能"}
+IMAGE_WIDTH = 900
+IMAGE_HEIGHT = 420
+PAGE_WIDTH = 595.0
+
+
+# ---------- 数据集 → 模块 ----------
+
+# 读取并处理一个数据集，与看板侧边栏一致：超大表走流式，只取样本绘图，KPI 与立方体来自全量累加
+def load_dataset(source, seed=None):
+    if source == 'demo':
+        dataset_key = make_key('demo', seed)
+        tables = process_data(None, seed)
+        return dataset_key, tables, RunningKPIs.from_frame(tables[0]).as_dict()
+    with open(source, 'rb') as f:
+        data = f.read()
+    file_hash = content_hash(data)
+    key = make_key(file_hash, seed)
+    if should_stream(source):
+        dataset_key = f"{key}-stream"
+        stream = process_stream(source, stream_dir(key), seed=seed)
+        evict_streams(keep=stream.out_dir)
+        REGISTRY.provide('cube', dataset_key, stream.cube)
+        return dataset_key, stream.sample_tables(), stream.kpis
+    tables = process_data(load_frame(ingest(os.path.basename(source), data, file_hash)), seed)
+    return key, tables, RunningKPIs.from_frame(tables[0]).as_dict()
+
+
+# 看板分区里的模块 (按分区排序)；需要交互参数的模块 (如按选中药材筛选) 不进报表
+def report_modules():
+    names = []
+    for name, module in REGISTRY.modules.items():
+        if module['tab'] is None:
+            continue
+        params = list(inspect.signature(module['compute']).parameters.values())[len(module['deps']):]
+        if any(p.default is p.empty and not (module['keyed'] and p.name == 'dataset_key') for p in params):
+            continue
+        names.append(name)
+    return sorted(names, key=lambda n: REGISTRY.modules[n]['tab'])
+
+
+def compute_figures(tables, dataset_key, names=None):
+    return {name: REGISTRY.compute(name, tables, dataset_key) for name in (names or report_modules())}
+
+
+# 派生数据摘要：ADMET 阳性率 + 显著富集条目
+def summary(tables, dataset_key, kpis):
+    enriched = REGISTRY.compute('herb_enrichment', tables, dataset_key)
+    enriched = enriched[enriched['FDR'] < FDR_CUTOFF].nsmallest(50, 'P值')
+    return {
+        'KPI': kpis,
+        'ADMET': REGISTRY.compute('admet_summary', tables, dataset_key),
+        '显著富集': json.loads(enriched.to_json(orient='records', force_ascii=False)),
+        '表行数': {name: len(t) for name, t in zip(TABLE_NAMES, tables)},
+    }
+
+
+# ---------- 静态图渲染 ----------
+
+def _render(item):
+    name, fig_json, fmt = item
+    fig = pio.from_json(fig_json)
+    fig.update_layout(title=name, margin=dict(t=40, b=30, l=40, r=20), template='plotly_white')
+    return name, fig.to_image(format=fmt, width=IMAGE_WIDTH, height=IMAGE_HEIGHT)
+
+
+# 能导入不代表能渲染 (kaleido 1.x 需要 plotly ≥ 6.1 与本机 Chrome)：首次调用时实际渲染一张小图探测
+@functools.cache
+def can_render():
+    if not HAS_KALEIDO:
+        return False
+    try:
+        pio.from_json('{"data": [], "layout": {}}').to_image(format='jpeg', width=16, height=16)
+    except Exception:
+        return False
+    return True
+
+
+# workers > 1 时在 spawn 进程池中渲染，按模块顺序返回
+def render_images(figures, fmt='jpeg', workers=1):
+    if not can_render():
+        raise RuntimeError("kaleido 未安装或无法渲染，无法导出静态图")
+    items = [(name, fig.to_json(), fmt) for name, fig in figures.items()]
+    if workers <= 1 or len(items) < 2:
+        return dict(map(_render, items))
+    with ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context('spawn')) as pool:
+        return dict(pool.map(_render, items))
+
+
+# ---------- 输出格式 ----------
+
+def write_json(fh, meta, figures):
+    fh.write('{"meta": ' + json.dumps(meta, ensure_ascii=False, default=str) + ', "modules": {')
+    for i, (name, fig) in enumerate(figures.items()):
+        fh.write((', ' if i else '') + json.dumps(name, ensure_ascii=False) + ': ' + fig.to_json())
+    fh.write('}}')
+
+
+def write_html(fh, meta, figures, images=None):
+    title = html.escape(f"TCM-LMH 报告 · {meta['数据集']}")
+    fh.write(f'<!DOCTYPE html><html><head><meta charset="utf-8"><title>{title}</title></head><body><h1>{title}</h1>')
+    fh.write('<table border="1" cellspacing="0" cellpadding="4">')
+    for k, v in meta['KPI'].items():
+        fh.write(f"<tr><th>{html.escape(str(k))}</th><td>{html.escape(f'{v:,.2f}' if isinstance(v, float) else str(v))}</td></tr>")
+    fh.write('</table>')
+    tab = None
+    for i, (name, fig) in enumerate(figures.items()):
+        if REGISTRY.modules[name]['tab'] != tab:
+            tab = REGISTRY.modules[name]['tab']
+            fh.write(f"<h2>{tab}. {TAB_TITLES.get(tab, '')}</h2>")
+        fh.write(f"<h3>{html.escape(name)}</h3>")
+        if images:
+            fh.write(f'<img src="data:image/jpeg;base64,{base64.b64encode(images[name]).decode()}" style="max-width:100%">')
+        else:
+            # plotly.js 只内嵌一次，离线可打开
+            fh.write(fig.to_html(full_html=False, include_plotlyjs=(i == 0)))
+    fh.write('</body></html>')
+
+
+def jpeg_info(data):
+    i = 2
+    while i + 9 < len(data):
+        marker = data[i + 1]
+        length = int.from_bytes(data[i + 2:i + 4], 'big')
+        if 0xC0 <= marker <= 0xCF and marker not in (0xC4, 0xC8, 0xCC):
+            height = int.from_bytes(data[i + 5:i + 7], 'big')
+            width = int.from_bytes(data[i + 7:i + 9], 'big')
+            return width, height, data[i + 9]
+        i += 2 + length
+    raise ValueError("无效的 JPEG 数据")
+
+
+# 最小 PDF 写入器：每页一张 JPEG (DCTDecode 原样嵌入)，页宽固定为 A4 宽，高度按图片比例
+class PdfWriter:
+    def __init__(self, fh):
+        self.fh = fh
+        self.offsets = {}
+        self.pages = []
+        self.pos = 0
+        self._next = 3  # 1 = Catalog, 2 = Pages
+        self._write(b"%PDF-1.4\n%\xe2\xe3\xcf\xd3\n")
+
+    def _write(self, data):
+        self.fh.write(data)
+        self.pos += len(data)
+
+    def _object(self, num, body, stream=None):
+        self.offsets[num] = self.pos
+        self._write(f"{num} 0 obj\n".encode() + body)
+        if stream is not None:
+            self._write(b"\nstream\n" + stream + b"\nendstream")
+        self._write(b"\nendobj\n")
+
+    def _alloc(self):
+        num, self._next = self._next, self._next + 1
+        return num
+
+    def add_jpeg(self, data):
+        width, height, components = jpeg_info(data)
+        page_w, page_h = PAGE_WIDTH, PAGE_WIDTH * height / width
+        image, content, page = self._alloc(), self._alloc(), self._alloc()
+        space = '/DeviceGray' if components == 1 else '/DeviceCMYK' if components == 4 else '/DeviceRGB'
+        self._object(image, (
+            f"<< /Type /XObject /Subtype /Image /Width {width} /Height {height} /ColorSpace {space} "
+            f"/BitsPerComponent 8 /Filter /DCTDecode /Length {len(data)} >>"
+        ).encode(), data)
+        ops = f"q {page_w:.2f} 0 0 {page_h:.2f} 0 0 cm /Im0 Do Q".encode()
+        self._object(content, f"<< /Length {len(ops)} >>".encode(), ops)
+        self._object(page, (
+            f"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 {page_w:.2f} {page_h:.2f}] "
+            f"/Resources << /XObject << /Im0 {image} 0 R >> >> /Contents {content} 0 R >>"
+        ).encode())
+        self.pages.append(page)
+
+    def close(self):
+        kids = " ".join(f"{p} 0 R" for p in self.pages)
+        self._object(2, f"<< /Type /Pages /Kids [{kids}] /Count {len(self.pages)} >>".encode())
+        self._object(1, b"<< /Type /Catalog /Pages 2 0 R >>")
+        xref = self.pos
+        size = self._next
+        rows = [b"0000000000 65535 f \n"] + [f"{self.offsets.get(n, 0):010d} 00000 n \n".encode() for n in range(1, size)]
+        self._write(f"xref\n0 {size}\n".encode() + b"".join(rows))
+        self._write(f"trailer\n<< /Size {size} /Root 1 0 R >>\nstartxref\n{xref}\n%%EOF\n".encode())
+
+
+def write_pdf(fh, images):
+    writer = PdfWriter(fh)
+    for data in images.values():
+        writer.add_jpeg(data)
+    writer.close()
+
+
+# ---------- 单个数据集 ----------
+
+def export(tables, dataset_key, kpis, out_dir, stem, formats=('json', 'html'), render_workers=1, name=None, extra=None):
+    formats = [f for f in FORMATS if f in formats]
+    if 'pdf' in formats and not can_render():
+        raise RuntimeError("导出 PDF 需要可用的 kaleido")
+    os.makedirs(out_dir, exist_ok=True)
+    figures = compute_figures(tables, dataset_key)
+    meta = {'数据集': name or stem, 'dataset_key': dataset_key, '生成时间': time.strftime('%Y-%m-%d %H:%M:%S'),
+            **summary(tables, dataset_key, kpis), **(extra or {})}
+    # 有 kaleido 时只渲染一次 JPEG，PDF 与 HTML 共用
+    images = render_images(figures, 'jpeg', render_workers) if can_render() and {'html', 'pdf'} & set(formats) else None
+    paths = []
+    for fmt in formats:
+        path = os.path.join(out_dir, f"{stem}.{fmt}")
+        if fmt == 'pdf':
+            with open(path, 'wb') as fh:
+                write_pdf(fh, images)
+        else:
+            with open(path, 'w', encoding='utf-8') as fh:
+                (write_json(fh, meta, figures) if fmt == 'json' else write_html(fh, meta, figures, images))
+        paths.append(path)
+    return paths
+
+
+# 看板下载用：单个数据集的 JSON 报告
+def json_bundle(tables, dataset_key, kpis, name=None, extra=None):
+    meta = {'数据集': name or dataset_key, 'dataset_key': dataset_key, **summary(tables, dataset_key, kpis), **(extra or {})}
+    buf = io.StringIO()
+    write_json(buf, meta, compute_figures(tables, dataset_key))
+    return buf.getvalue()
+
+
+def html_bundle(tables, dataset_key, kpis, name=None, images=False):
+    meta = {'数据集': name or dataset_key, 'dataset_key': dataset_key, **summary(tables, dataset_key, kpis)}
+    figures = compute_figures(tables, dataset_key)
+    buf = io.StringIO()
+    write_html(buf, meta, figures, render_images(figures) if images else None)
+    return buf.getvalue()
+
+
+def pdf_bundle(tables, dataset_key):
+    buf = io.BytesIO()
+    write_pdf(buf, render_images(compute_figures(tables, dataset_key)))
+    return buf.getvalue()
+
+
+def run(source, out_dir=REPORT_DIR, formats=('json', 'html'), seed=None, render_workers=1, stem=None):
+    t0 = time.perf_counter()
+    dataset_key, tables, kpis = load_dataset(source, seed)
+    stem = stem or f"{os.path.splitext(os.path.basename(source))[0]}-{seed}"
+    try:
+        paths = export(tables, dataset_key, kpis, out_dir, stem, formats, render_workers, name=source)
+    finally:
+        # 批处理中每个数据集只用一次，及时释放记忆化的模块结果
+        REGISTRY.invalidate(dataset_key)
+    return {'source': source, 'paths': paths, 'modules': len(report_modules()), 'seconds': time.perf_counter() - t0}
+
+
+# 输出文件名：文件名-种子；不同目录的同名文件 (或重复的 demo) 依次追加序号，避免并发覆盖
+def unique_stems(sources, seed=None):
+    stems, seen = [], {}
+    for source in sources:
+        stem = f"{os.path.splitext(os.path.basename(source))[0]}-{seed}"
+        seen[stem] = seen.get(stem, 0) + 1
+        stems.append(stem if seen[stem] == 1 else f"{stem}-{seen[stem]}")
+    return stems
+
+
+def _failed(source, error):
+    return {'source': source, 'paths': [], 'modules': 0, 'seconds': None, 'error': f"{type(error).__name__}: {error}"}
+
+
+# 多个数据集：每个进程独立完成一个数据集；只有一个数据集时把图像渲染交给进程池。
+# 单个数据集失败只记录错误并继续，结果带 error 字段
+def run_batch(sources, out_dir=REPORT_DIR, formats=('json', 'html'), seed=None, max_workers=None):
+    workers = max_workers or os.cpu_count() or 1
+    stems = unique_stems(sources, seed)
+    if len(sources) == 1 or workers == 1:
+        for source, stem in zip(sources, stems):
+            try:
+                yield run(source, out_dir, formats, seed, render_workers=workers, stem=stem)
+            except Exception as e:
+                yield _failed(source, e)
+        return
+    with ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context('spawn')) as pool:
+        futures = {pool.submit(run, source, out_dir, formats, seed, stem=stem): source for source, stem in zip(sources, stems)}
+        for future in as_completed(futures):
+            try:
+                yield future.result()
+            except Exception as e:
+                yield _failed(futures[future], e)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="批量生成看板报表 (无需 Streamlit)")
+    parser.add_argument('sources', nargs='*', default=['demo'], help="数据文件 (Excel/CSV/Parquet)，demo 表示仿真数据")
+    parser.add_argument('--out', default=REPORT_DIR)
+    parser.add_argument('--format', nargs='+', choices=FORMATS, default=['json', 'html'])
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--workers', type=int, default=None)
+    args = parser.parse_args()
+
+    formats = args.format
+    if 'pdf' in formats and not can_render():
+        print("⚠️ kaleido 未安装或无法渲染，跳过 PDF (HTML 改用交互图)")
+        formats = [f for f in formats if f != 'pdf']
+    t0 = time.perf_counter()
+    failed = 0
+    for result in run_batch(args.sources, args.out, formats, args.seed, args.workers):
+        if result.get('error'):
+            failed += 1
+            print(f"❌ {result['source']}: {result['error']}")
+        else:
+            print(f"✅ {result['source']}: {result['modules']} 个模块, {result['seconds']:.1f}s → {', '.join(result['paths'])}")
+    elapsed = time.perf_counter() - t0
+    print(f"✅ 共 {len(args.sources)} 个数据集 (失败 {failed}), 用时 {elapsed:.1f}s ({len(args.sources) / elapsed * 3600:.0f} 个/小时)")
+    if failed:
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -1,6 +1,10 @@
 import pandas as pd
 import random
 
+# 固定种子，每次生成的示例文件完全一致 (更大规模的合成数据见 benchmarks/datagen.py)
+SEED = 42
+random.seed(SEED)
+
 # 1. 定义模拟数据
 herbs = [
     '石菖蒲', '全蝎', '蜈蚣', '天麻', '川芎', '僵蚕', '柴胡', '当归', '白芍', '茯苓',
@@ -0,0 +1,175 @@
+import os
+import shutil
+import threading
+import time
+import uuid
+import weakref
+from concurrent.futures import Future
+
+import pandas as pd
+import pyarrow as pa
+import pyarrow.ipc as ipc
+
+from cache import CACHE_DIR, dir_bytes, evict_lru
+from streaming import TABLE_NAMES
+
+# ==========================================
+# 🤝 会话共享数据集：按内容哈希登记，Arrow IPC 内存映射，引用计数 + 空闲淘汰
+# ==========================================
+# 同一 dataset_key (content hash + seed + SCHEMA_VERSION) 只计算一次：并发会话等待同一次计算 (single-flight)，
+# 结果逐表写成未压缩 Arrow 文件后 memory_map 读回，数值列与字符串列都直接引用映射页，
+# 多个会话 / 多个进程共享操作系统页缓存中的同一份数据，不随用户数线性增长。
+# 映射缓冲区只读，取到的表一律视为不可变 (需要新列时用 assign 生成新表)。
+# 会话通过 DatasetLease 持有引用，lease 被回收 (会话结束 / 切换数据集) 时自动归还；
+# 引用数为 0 且空闲超过 idle_seconds 的数据集解除映射，磁盘文件按总字节数淘汰。
+
+SHARED_DIR = os.environ.get('TCM_SHARED_DIR', os.path.join(CACHE_DIR, 'shared'))
+IDLE_SECONDS = 600
+MAX_DISK_BYTES = 4 * 1024 * 1024 * 1024
+EDGE_COLUMNS = ['源', '目标', '权重']
+
+
+def _as_table(value):
+    if isinstance(value, pd.DataFrame):
+        return pa.Table.from_pandas(value, preserve_index=False)
+    # 网络边 [(源, 目标, 权重), ...] 存成三列表，读回为 DataFrame
+    return pa.Table.from_pandas(pd.DataFrame(list(value), columns=EDGE_COLUMNS), preserve_index=False)
+
+
+# 先写到临时目录再整体改名，并发写同一数据集时只有一个生效
+def write_tables(directory, tables):
+    tmp = f"{directory}.{uuid.uuid4().hex}.tmp"
+    os.makedirs(tmp)
+    for name, value in zip(TABLE_NAMES, tables):
+        table = _as_table(value)
+        with pa.OSFile(os.path.join(tmp, f"{name}.arrow"), 'wb') as sink, ipc.new_file(sink, table.schema) as writer:
+            writer.write_table(table)
+    try:
+        os.rename(tmp, directory)
+    except OSError:
+        shutil.rmtree(tmp, ignore_errors=True)
+        if not os.path.isdir(directory):
+            raise
+
+
+def map_tables(directory):
+    frames = [ipc.open_file(pa.memory_map(os.path.join(directory, f"{name}.arrow"), 'r')).read_all().to_pandas(split_blocks=True)
+              for name in TABLE_NAMES]
+    return tuple(frames)
+
+
+class DatasetLease:
+    def __init__(self, store, key, tables):
+        self.key = key
+        self.tables = tables
+        self._finalizer = weakref.finalize(self, store.release, key)
+
+    def release(self):
+        self._finalizer()
+
+
+class SharedDatasetStore:
+    def __init__(self, root=SHARED_DIR, idle_seconds=IDLE_SECONDS, max_disk_bytes=MAX_DISK_BYTES):
+        self.root = root
+        self.idle_seconds = idle_seconds
+        self.max_disk_bytes = max_disk_bytes
+        self._entries = {}
+        self._inflight = {}
+        # lease 的回收可能发生在任意线程 (包括持锁期间触发的 GC)，用可重入锁
+        self._lock = threading.RLock()
+        self.hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+        os.makedirs(root, exist_ok=True)
+
+    def _path(self, key):
+        return os.path.join(self.root, key)
+
+    # 取得数据集引用；未登记时由第一个请求者计算，其余并发请求等待同一结果
+    def acquire(self, key, compute):
+        while True:
+            with self._lock:
+                entry = self._entries.get(key)
+                if entry is not None:
+                    entry['refs'] += 1
+                    self.hits += 1
+                    return DatasetLease(self, key, entry['tables'])
+                pending = self._inflight.get(key)
+                owner = pending is None
+                if owner:
+                    pending = self._inflight[key] = Future()
+            if not owner:
+                pending.result()
+                continue
+            self.evict_idle()
+            try:
+                tables = self._load(key, compute)
+                pending.set_result(True)
+            except BaseException as e:
+                pending.set_exception(e)
+                raise
+            finally:
+                with self._lock:
+                    self._inflight.pop(key, None)
+            return DatasetLease(self, key, tables)
+
+    # 登记时即计入调用方的一个引用，避免刚载入就被空闲淘汰
+    def _load(self, key, compute):
+        path = self._path(key)
+        if os.path.isdir(path):
+            os.utime(path)
+            disk = True
+        else:
+            write_tables(path, compute())
+            disk = False
+        tables = map_tables(path)
+        with self._lock:
+            self._entries[key] = {'tables': tables, 'refs': 1, 'idle_since': time.monotonic(), 'bytes': dir_bytes(path)}
+            if disk:
+                self.disk_hits += 1
+            else:
+                self.misses += 1
+        if not disk:
+            self._evict_disk()
+        return tables
+
+    def release(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return
+            entry['refs'] = max(entry['refs'] - 1, 0)
+            if entry['refs'] == 0:
+                entry['idle_since'] = time.monotonic()
+        # 归还时顺带清理其他已空闲超时的数据集，不必等到下一次载入
+        self.evict_idle()
+
+    # 解除无人引用且空闲超时的映射 (已取得表的调用方仍可继续使用，映射随最后一个引用释放)
+    def evict_idle(self, now=None):
+        now = time.monotonic() if now is None else now
+        with self._lock:
+            idle = [k for k, e in self._entries.items() if e['refs'] == 0 and now - e['idle_since'] >= self.idle_seconds]
+            for key in idle:
+                del self._entries[key]
+        return idle
+
+    # 磁盘按总字节数淘汰，最久未访问的先删；正在映射中的数据集不删
+    def _evict_disk(self):
+        with self._lock:
+            active = set(self._entries)
+        evict_lru(self.root, self.max_disk_bytes, keep=active)
+
+    def refs(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            return entry['refs'] if entry else 0
+
+    def stats(self):
+        with self._lock:
+            entries = list(self._entries.values())
+        total = self.hits + self.disk_hits + self.misses
+        return {
+            '数据集': len(entries), '引用': sum(e['refs'] for e in entries), '映射字节': sum(e['bytes'] for e in entries),
+            '共享命中': self.hits, '磁盘载入': self.disk_hits, '计算': self.misses,
+            '命中率': (self.hits + self.disk_hits) / total if total else 0.0,
+        }
@@ -0,0 +1,234 @@
+import argparse
+import io
+import json
+import os
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.csv as pacsv
+import pyarrow.parquet as pq
+
+from cache import CACHE_DIR, evict_lru
+from cube import PropertyCube
+from docking import STRONG_BINDING
+from engine import prepare_base, fill_columns, derive_tables, simulate_price, simulate_edges
+from enrichment import EnrichmentEngine
+from ingest import load_table
+
+# ==========================================
+# 🌊 流式引擎：分块读取 → 逐块补全/衍生 → 增量写入 Parquet
+# ==========================================
+# 峰值内存只与 chunksize 相关：任何时刻只有一个分块及其衍生表在内存里，
+# Tab 1 的 KPI 以累加器方式跨分块汇总。
+# 输入可以是文件路径，也可以是上传的原始字节 (配合 name 判断格式)：超大上传直接从源格式分块读取，
+# 不经过整表解析的 ingest。输出目录按总字节数淘汰。
+
+DEFAULT_CHUNKSIZE = 100_000
+STREAM_THRESHOLD_ROWS = 500_000
+SAMPLE_ROWS = 5_000
+STREAM_DIR = os.path.join(CACHE_DIR, 'stream')
+MAX_STREAM_BYTES = 8 * 1024 * 1024 * 1024
+
+# openpyxl 只能读 .xlsx (OOXML)；旧版 .xls 只能整表经 pd.read_excel 导入
+STREAM_SUFFIXES = ('.csv', '.parquet', '.arrow', '.xlsx')
+
+TABLE_NAMES = ['herbs', 'edges', 'geo', 'dock', 'admet', 'refs', 'trials', 'price', 'go']
+
+
+def _open(source, name=None):
+    suffix = os.path.splitext(name or source)[1].lower()
+    return (io.BytesIO(source) if isinstance(source, (bytes, bytearray)) else source), suffix
+
+
+# 只读元数据或逐批计数，不把整表读进内存；不支持分块读取的格式 (如旧版 .xls) 返回 None
+def count_source_rows(source, name=None):
+    source, suffix = _open(source, name)
+    if suffix not in STREAM_SUFFIXES:
+        return None
+    if suffix == '.csv':
+        return sum(batch.num_rows for batch in pacsv.open_csv(source))
+    if suffix == '.parquet':
+        return pq.ParquetFile(source).metadata.num_rows
+    if suffix == '.arrow':
+        return load_table(source).num_rows
+    if suffix == '.xlsx':
+        from openpyxl import load_workbook
+        wb = load_workbook(source, read_only=True, data_only=True)
+        ws = wb.active
+        # 工作表没有写 dimension 时 max_row 为 None，退回逐行计数
+        rows = ws.max_row if ws.max_row is not None else sum(1 for _ in ws.iter_rows(values_only=True))
+        wb.close()
+        return max(rows - 1, 0)
+
+
+# 行数超过阈值且格式可分块读取时走流式，其余 (含 .xls) 走 ingest 整表导入
+def should_stream(source, name=None, threshold=STREAM_THRESHOLD_ROWS):
+    rows = count_source_rows(source, name)
+    return rows is not None and rows > threshold
+
+
+def iter_chunks(source, chunksize=DEFAULT_CHUNKSIZE, name=None):
+    source, suffix = _open(source, name)
+    if suffix == '.csv':
+        yield from pd.read_csv(source, chunksize=chunksize)
+    elif suffix == '.parquet':
+        for batch in pq.ParquetFile(source).iter_batches(batch_size=chunksize):
+            yield batch.to_pandas()
+    elif suffix == '.arrow':
+        # ingest.py 产出的 Arrow 文件：内存映射后按行切片，切片本身不拷贝
+        table = load_table(source)
+        for offset in range(0, table.num_rows, chunksize):
+            yield table.slice(offset, chunksize).to_pandas()
+    elif suffix == '.xlsx':
+        from openpyxl import load_workbook
+        wb = load_workbook(source, read_only=True, data_only=True)
+        rows = wb.active.iter_rows(values_only=True)
+        header = next(rows, None)
+        buf = []
+        for row in rows:
+            buf.append(row)
+            if len(buf) >= chunksize:
+                yield pd.DataFrame(buf, columns=header)
+                buf = []
+        if buf:
+            yield pd.DataFrame(buf, columns=header)
+        wb.close()
+    else:
+        raise ValueError(f"不支持分块读取的文件类型: {name or source}")
+
+
+# Tab 1 KPI 累加器 (总频次 / 平均单价 / 覆盖省份)
+class RunningKPIs:
+    def __init__(self):
+        self.rows = 0
+        self.freq_sum = 0
+        self.price_sum = 0.0
+        self.price_count = 0
+        self.provinces = set()
+
+    def update(self, df):
+        self.rows += len(df)
+        self.freq_sum += int(pd.to_numeric(df['频次'], errors='coerce').sum())
+        price = pd.to_numeric(df['价格'], errors='coerce')
+        self.price_sum += float(price.sum())
+        self.price_count += int(price.count())
+        self.provinces.update(df['产地'].dropna().unique().tolist())
+        return self
+
+    @classmethod
+    def from_frame(cls, df):
+        return cls().update(df)
+
+    def as_dict(self):
+        return {
+            '收录药物': self.rows, '覆盖省份': len(self.provinces),
+            '平均单价': self.price_sum / self.price_count if self.price_count else 0.0, '总频次': self.freq_sum
+        }
+
+
+class ParquetSink:
+    def __init__(self, out_dir):
+        self.out_dir = out_dir
+        self._writers = {}
+        os.makedirs(out_dir, exist_ok=True)
+
+    def path(self, name):
+        return os.path.join(self.out_dir, f"{name}.parquet")
+
+    def write(self, name, df):
+        table = pa.Table.from_pandas(df, preserve_index=False)
+        # 各分块的字典编码不同，统一解码成普通列以保持 schema 一致
+        for i, field in enumerate(table.schema):
+            if pa.types.is_dictionary(field.type):
+                table = table.set_column(i, field.name, table.column(i).cast(field.type.value_type))
+        writer = self._writers.get(name)
+        if writer is None:
+            writer = self._writers[name] = pq.ParquetWriter(self.path(name), table.schema)
+        else:
+            table = table.cast(writer.schema)
+        writer.write_table(table)
+
+    def close(self):
+        for writer in self._writers.values():
+            writer.close()
+        self._writers.clear()
+
+
+class StreamResult:
+    def __init__(self, out_dir, kpis, cube=None):
+        self.out_dir = out_dir
+        self.kpis = kpis
+        self.cube = cube
+
+    def path(self, name):
+        return os.path.join(self.out_dir, f"{name}.parquet")
+
+    # 输出目录可能已被淘汰；仍在时刷新 mtime，淘汰按最近使用排序
+    def available(self):
+        if not all(os.path.exists(self.path(name)) for name in TABLE_NAMES):
+            return False
+        os.utime(self.out_dir)
+        return True
+
+    def read_head(self, name, rows=SAMPLE_ROWS):
+        batch = next(pq.ParquetFile(self.path(name)).iter_batches(batch_size=rows), None)
+        return batch.to_pandas() if batch is not None else pd.DataFrame()
+
+    def iter_frames(self, name, batch_size=DEFAULT_CHUNKSIZE):
+        for batch in pq.ParquetFile(self.path(name)).iter_batches(batch_size=batch_size):
+            yield batch.to_pandas()
+
+    # 供看板绘图的前 N 行样本，顺序与 process_data 返回值一致
+    def sample_tables(self, rows=SAMPLE_ROWS):
+        heads = {name: self.read_head(name, rows) for name in TABLE_NAMES}
+        edges = list(heads['edges'].itertuples(index=False, name=None))
+        return (heads['herbs'], edges, heads['geo'], heads['dock'], heads['admet'],
+                heads['refs'], heads['trials'], heads['price'], heads['go'])
+
+
+def stream_dir(key):
+    return os.path.join(STREAM_DIR, key)
+
+
+# 流式输出目录按总字节数淘汰，最久未使用 (mtime) 的先删；keep 为当前正在使用的目录
+def evict_streams(keep=None, root=STREAM_DIR, max_bytes=MAX_STREAM_BYTES):
+    evict_lru(root, max_bytes, keep=() if keep is None else (keep,))
+
+
+def process_stream(source, out_dir, chunksize=DEFAULT_CHUNKSIZE, seed=None, name=None):
+    rng = np.random.default_rng(seed)
+    sink = ParquetSink(out_dir)
+    kpis = RunningKPIs()
+    cube = PropertyCube()
+    strong_targets = set()
+    try:
+        for chunk in iter_chunks(source, chunksize, name):
+            df = fill_columns(prepare_base(chunk, rng), rng)
+            kpis.update(df)
+            cube.update(df)
+            df_geo, df_dock, df_admet, df_refs, df_trials = derive_tables(df, rng)
+            strong_targets.update(df_dock.loc[df_dock['结合能'] <= STRONG_BINDING, '靶点'].unique())
+            edges = pd.DataFrame(simulate_edges(df['中药'].to_numpy(), rng), columns=['源', '目标', '权重'])
+            for table_name, table in zip(TABLE_NAMES, [df, edges, df_geo, df_dock, df_admet, df_refs, df_trials]):
+                sink.write(table_name, table)
+        sink.write('price', simulate_price(rng))
+        sink.write('go', EnrichmentEngine().enrich(sorted(strong_targets)))
+    finally:
+        sink.close()
+    return StreamResult(out_dir, kpis.as_dict(), cube)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="分块流式处理超大数据表")
+    parser.add_argument('source', help="输入文件 (csv/parquet/arrow/xlsx)")
+    parser.add_argument('--out', required=True, help="衍生表输出目录")
+    parser.add_argument('--chunksize', type=int, default=DEFAULT_CHUNKSIZE)
+    parser.add_argument('--seed', type=int, default=None)
+    args = parser.parse_args()
+    result = process_stream(args.source, args.out, args.chunksize, args.seed)
+    print(json.dumps(result.kpis, ensure_ascii=False, indent=2))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,224 @@
+import argparse
+import contextlib
+import functools
+import glob
+import os
+import sqlite3
+import urllib.request
+import zlib
+
+import pandas as pd
+
+from cache import CACHE_DIR
+
+# ==========================================
+# 🧪 本地化合物结构库：SQLite 按 CID 存 MOL 块 (zlib 压缩) + 进程内 LRU
+# ==========================================
+# 3D 查看器只读本地库，不再逐次请求 PubChem (离线节点可用)。
+# 入库：python structures.py load 目录或 *.sdf [--herb 石菖蒲]
+# 联网机器上预取后拷贝数据库：python structures.py fetch 636822 115027
+
+STRUCTURE_DB_PATH = os.environ.get('TCM_STRUCTURE_DB', os.path.join(CACHE_DIR, 'structures.db'))
+PUBCHEM_SDF_URL = "https://pubchem.ncbi.nlm.nih.gov/rest/pug/compound/cid/{cid}/record/SDF?record_type=3d"
+LRU_SIZE = 256
+BATCH_SIZE = 1000
+
+# 默认预取清单：CID → (药材, 化合物)
+DEFAULT_COMPOUNDS = {
+    636822: ('石菖蒲', 'α-细辛醚'),
+    115027: ('天麻', '天麻素'),
+}
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS structures (
+    cid INTEGER PRIMARY KEY,
+    name TEXT,
+    herb TEXT,
+    atoms INTEGER,
+    molblock BLOB NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_structures_herb ON structures(herb, name);
+"""
+
+CID_FIELDS = ('PUBCHEM_COMPOUND_CID', 'CID', 'cid')
+NAME_FIELDS = ('NAME', 'name', '名称', 'PUBCHEM_IUPAC_NAME')
+HERB_FIELDS = ('HERB', 'herb', '中药')
+
+
+def ensure_schema(path=STRUCTURE_DB_PATH):
+    os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+    with contextlib.closing(sqlite3.connect(path)) as conn, conn:
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.executescript(SCHEMA)
+
+
+# ---------- SDF 解析：逐条产出 (MOL 块, 标题, 属性) ----------
+
+def parse_sdf(text):
+    for i, record in enumerate(text.split('$$$$')):
+        # 只去掉上一条 $$$$ 之后的换行；MOL 标题行可能为空，头部三行必须原样保留
+        if i and record.startswith('\r\n'):
+            record = record[2:]
+        elif i and record.startswith('\n'):
+            record = record[1:]
+        if 'M  END' not in record:
+            continue
+        molblock, _, tail = record.partition('M  END')
+        props, key = {}, None
+        for line in tail.splitlines():
+            if line.startswith('>') and '<' in line:
+                key = line[line.index('<') + 1:line.rindex('>')]
+            elif key is not None and line.strip():
+                props.setdefault(key, line.strip())
+        title = molblock.splitlines()[0].strip()
+        yield molblock + 'M  END\n', title, props
+
+
+def atom_count(molblock):
+    counts = molblock.splitlines()[3]
+    return int(counts[:3]) if counts[:3].strip().isdigit() else None
+
+
+def _first(props, fields):
+    return next((props[f] for f in fields if props.get(f)), None)
+
+
+def sdf_records(path, herb=None):
+    with open(path, encoding='utf-8', errors='replace') as f:
+        text = f.read()
+    stem = os.path.splitext(os.path.basename(path))[0]
+    for molblock, title, props in parse_sdf(text):
+        cid = _first(props, CID_FIELDS) or (title if title.isdigit() else stem)
+        if not str(cid).isdigit():
+            continue
+        cid = int(cid)
+        default_herb, default_name = DEFAULT_COMPOUNDS.get(cid, (None, None))
+        name = _first(props, NAME_FIELDS) or default_name or (title if title and not title.isdigit() else str(cid))
+        yield cid, name, herb or _first(props, HERB_FIELDS) or default_herb, atom_count(molblock), zlib.compress(molblock.encode('utf-8'))
+
+
+# 批量入库：所有文件在同一事务内分批 executemany，同 CID 覆盖
+def load_paths(paths, path=STRUCTURE_DB_PATH, herb=None):
+    files = []
+    for p in paths:
+        files += sorted(glob.glob(os.path.join(p, '**', '*.sdf'), recursive=True) + glob.glob(os.path.join(p, '**', '*.mol'), recursive=True)) if os.path.isdir(p) else [p]
+    ensure_schema(path)
+    total = 0
+    with contextlib.closing(sqlite3.connect(path)) as conn, conn:
+        batch = []
+        for fname in files:
+            for record in sdf_records(fname, herb):
+                batch.append(record)
+                if len(batch) >= BATCH_SIZE:
+                    total += _insert(conn, batch)
+                    batch = []
+        total += _insert(conn, batch)
+    return total
+
+
+def _insert(conn, batch):
+    conn.executemany("INSERT OR REPLACE INTO structures (cid, name, herb, atoms, molblock) VALUES (?, ?, ?, ?, ?)", batch)
+    return len(batch)
+
+
+def fetch_pubchem(cids, out_dir, timeout=30):
+    os.makedirs(out_dir, exist_ok=True)
+    written = []
+    for cid in cids:
+        target = os.path.join(out_dir, f"{cid}.sdf")
+        with urllib.request.urlopen(PUBCHEM_SDF_URL.format(cid=cid), timeout=timeout) as resp, open(target, 'wb') as f:
+            f.write(resp.read())
+        written.append(target)
+    return written
+
+
+# ---------- 读取：目录一次查询，结构按 CID 走 LRU ----------
+
+class StructureStore:
+    def __init__(self, path=STRUCTURE_DB_PATH, lru_size=LRU_SIZE):
+        self.path = path
+        ensure_schema(path)
+        self._cached_molblock = functools.lru_cache(maxsize=lru_size)(self._molblock)
+        self._cached_catalog = functools.lru_cache(maxsize=64)(self._catalog)
+        self._version = self._db_version()
+
+    @contextlib.contextmanager
+    def _connect(self):
+        conn = sqlite3.connect(f"file:{self.path}?mode=ro", uri=True)
+        try:
+            yield conn
+        finally:
+            conn.close()
+
+    # 库文件 (含 WAL) 的修改时间与大小；外部进程 (python structures.py load) 导入后随之变化
+    def _db_version(self):
+        version = []
+        for p in (self.path, self.path + '-wal'):
+            try:
+                stat = os.stat(p)
+            except FileNotFoundError:
+                continue
+            version.append((stat.st_mtime_ns, stat.st_size))
+        return tuple(version)
+
+    def _refresh(self):
+        version = self._db_version()
+        if version != self._version:
+            self._version = version
+            self.clear_cache()
+
+    def catalog(self, herb=None):
+        self._refresh()
+        return self._cached_catalog(herb)
+
+    def molblock(self, cid):
+        self._refresh()
+        return self._cached_molblock(cid)
+
+    def _catalog(self, herb=None):
+        sql = "SELECT cid, name, herb, atoms FROM structures" + (" WHERE herb = ?" if herb else "") + " ORDER BY herb, name"
+        with self._connect() as conn:
+            rows = conn.execute(sql, (herb,) if herb else ()).fetchall()
+        return pd.DataFrame(rows, columns=['CID', '化合物', '中药', '原子数'])
+
+    def _molblock(self, cid):
+        with self._connect() as conn:
+            row = conn.execute("SELECT molblock FROM structures WHERE cid = ?", (int(cid),)).fetchone()
+        return zlib.decompress(row[0]).decode('utf-8') if row else None
+
+    def __len__(self):
+        with self._connect() as conn:
+            return conn.execute("SELECT COUNT(*) FROM structures").fetchone()[0]
+
+    # 库文件变化时由 _refresh 自动调用
+    def clear_cache(self):
+        self._cached_molblock.cache_clear()
+        self._cached_catalog.cache_clear()
+
+    # 连接按调用开关，关闭时只需释放 LRU 中的结构与目录
+    def close(self):
+        self.clear_cache()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="本地化合物结构库 (SDF → SQLite)")
+    parser.add_argument('--db', default=STRUCTURE_DB_PATH)
+    sub = parser.add_subparsers(dest='command', required=True)
+    load = sub.add_parser('load', help="导入 SDF/MOL 文件或目录")
+    load.add_argument('paths', nargs='+')
+    load.add_argument('--herb', help="为本批结构统一标注药材")
+    fetch = sub.add_parser('fetch', help="从 PubChem 下载 3D SDF 并入库 (需联网)")
+    fetch.add_argument('cids', nargs='*', type=int, help="默认下载内置清单")
+    fetch.add_argument('--out', default=os.path.join(CACHE_DIR, 'sdf'), help="SDF 保存目录，可拷贝到离线节点再 load")
+    args = parser.parse_args()
+
+    if args.command == 'fetch':
+        paths = fetch_pubchem(args.cids or list(DEFAULT_COMPOUNDS), args.out)
+        print(f"⬇️ 已下载 {len(paths)} 个结构 → {args.out}")
+        print(f"✅ 已导入 {load_paths(paths, args.db)} 个结构 → {args.db}")
+    else:
+        print(f"✅ 已导入 {load_paths(args.paths, args.db, args.herb)} 个结构 → {args.db}")
+
+
+if __name__ == '__main__':
+    main()
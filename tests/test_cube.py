@@ -0,0 +1,53 @@
+import numpy as np
+import pandas as pd
+
+from cube import MISSING, OTHER, PropertyCube
+
+
+def _frame(n, seed=0):
+    rng = np.random.default_rng(seed)
+    return pd.DataFrame({
+        '产地': rng.choice(['四川', '云南', '安徽', None], n),
+        '类别': rng.choice(['补虚', '解表', '清热'], n),
+        '四气': rng.choice(['寒', '温', '平'], n),
+        '频次': rng.integers(1, 100, n).astype(float),
+        '土壤pH': np.where(rng.random(n) < 0.2, np.nan, rng.uniform(5, 8, n)),
+    })
+
+
+def test_chunked_update_equals_single_update():
+    df = _frame(1000)
+    whole = PropertyCube.from_frame(df)
+    chunked = PropertyCube()
+    for start in range(0, len(df), 137):
+        chunked.update(df.iloc[start:start + 137])
+    a = whole.query(['产地', '类别'], ['频次', '土壤pH'])
+    b = chunked.query(['产地', '类别'], ['频次', '土壤pH'])
+    pd.testing.assert_frame_equal(a, b)
+    assert chunked.n_rows == len(df)
+
+
+def test_query_matches_groupby():
+    df = _frame(500, seed=3)
+    cube = PropertyCube.from_frame(df)
+    got = cube.query('产地', ['频次', '土壤pH'], agg='mean').set_index('产地')
+    expected = df.fillna({'产地': MISSING}).groupby('产地').agg(频次=('频次', 'mean'), 土壤pH=('土壤pH', 'mean'), 计数=('频次', 'size'))
+    np.testing.assert_allclose(got.loc[expected.index, ['频次', '土壤pH']], expected[['频次', '土壤pH']])
+    assert (got.loc[expected.index, '计数'] == expected['计数']).all()
+
+    sliced = cube.query('类别', '频次', where={'四气': '寒'}).set_index('类别')['频次']
+    ref = df[df['四气'] == '寒'].groupby('类别')['频次'].sum()
+    np.testing.assert_allclose(sliced.loc[ref.index], ref)
+
+
+def test_key_packing_round_trip():
+    cube = PropertyCube(max_categories=4)
+    cube.update(pd.DataFrame({'产地': ['甲', '乙', '丙', '丁', '戊'], '类别': ['x'] * 5}))
+    assert cube._bits == 2
+    for dim in cube.dimensions:
+        codes = cube._codes(dim, cube.keys)
+        assert codes.max() < len(cube.vocab[dim])
+    # 超出 max_categories 的取值并入 '其他'
+    assert cube.vocab['产地'] == ['甲', '乙', '丙', OTHER]
+    counts = cube.query('产地').set_index('产地')['计数']
+    assert counts[OTHER] == 2 and counts.sum() == 5
@@ -0,0 +1,41 @@
+import numpy as np
+from scipy.stats import hypergeom
+
+from enrichment import bh_fdr, hypergeom_sf
+
+
+def test_hypergeom_sf_matches_scipy():
+    rng = np.random.default_rng(0)
+    universe = 2000
+    K = rng.integers(1, 300, 500)
+    n = rng.integers(1, 300, 500)
+    k = np.array([rng.integers(max(1, a + b - universe), min(a, b) + 1) for a, b in zip(K, n)])
+    expected = hypergeom.sf(k - 1, universe, K, n)
+    np.testing.assert_allclose(hypergeom_sf(k, universe, K, n), expected, rtol=1e-8, atol=1e-300)
+
+
+def test_hypergeom_sf_repeated_and_empty():
+    k, K, n = np.array([3, 3, 1]), np.array([50, 50, 10]), np.array([20, 20, 5])
+    out = hypergeom_sf(k, 500, K, n)
+    assert out[0] == out[1]
+    np.testing.assert_allclose(out, hypergeom.sf(k - 1, 500, K, n), rtol=1e-8)
+    assert hypergeom_sf(np.array([], dtype=np.int64), 500, np.array([]), np.array([])).size == 0
+
+
+def _bh_reference(p, m):
+    order = np.argsort(p)
+    adjusted = np.minimum.accumulate((p[order] * m / np.arange(1, len(p) + 1))[::-1])[::-1]
+    out = np.empty_like(adjusted)
+    out[order] = np.minimum(adjusted, 1.0)
+    return out
+
+
+def test_bh_fdr_per_group():
+    rng = np.random.default_rng(1)
+    p = rng.random(40) ** 3
+    groups = np.repeat([0, 1, 2], [10, 25, 5])
+    out = bh_fdr(p, groups, 30)
+    for g in np.unique(groups):
+        mask = groups == g
+        np.testing.assert_allclose(out[mask], _bh_reference(p[mask], 30))
+    assert (out <= 1.0).all()
@@ -0,0 +1,58 @@
+import threading
+
+import pandas as pd
+
+from evidence import EvidenceStore
+
+
+def _refs(start, n, herb='人参'):
+    return pd.DataFrame({
+        '中药': [herb] * n, '类型': ['RCT'] * n, '期刊': ['中华中医药杂志'] * n,
+        '标题': [f"{herb}皂苷干预研究 {i}" for i in range(start, start + n)],
+        '年份': [2000 + i % 20 for i in range(start, start + n)], '影响因子': [1.5] * n,
+    })
+
+
+def test_incremental_index_and_dataset_scope(tmp_path):
+    store = EvidenceStore(str(tmp_path / 'ev.db'))
+    assert store.add_frame(_refs(0, 10), source='a') == 10
+    assert store.add_frame(_refs(0, 10), source='a') == 0
+    # 与 a 重叠 5 篇，只为新增的 5 篇建索引
+    assert store.add_frame(_refs(5, 10), source='b') == 5
+    assert store.search('皂苷')['total'] == 15
+    assert store.search('皂苷', dataset='a')['total'] == 10
+    assert store.search('皂苷', dataset='b')['total'] == 10
+    assert store.stats(dataset='a')['文献数'] == 10
+    assert store.search('参')['total'] == 15
+    store.close()
+
+
+def test_like_fallback_escapes_wildcards(tmp_path):
+    store = EvidenceStore(str(tmp_path / 'ev.db'))
+    store.add_frame(_refs(0, 3))
+    assert store.search('%')['total'] == 0
+    assert store.search('_')['total'] == 0
+
+
+def test_concurrent_add_batches(tmp_path):
+    path = str(tmp_path / 'ev.db')
+    errors = []
+
+    def add(i):
+        try:
+            EvidenceStore(path).add_frame(_refs(i * 20, 40, herb=['人参', '黄芪'][i % 2]), source=f"s{i}")
+        except Exception as e:
+            errors.append(e)
+
+    threads = [threading.Thread(target=add, args=(i,)) for i in range(2)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    assert errors == []
+    store = EvidenceStore(path)
+    with store._connect() as conn:
+        refs = conn.execute("SELECT COUNT(*) FROM refs").fetchone()[0]
+        indexed = conn.execute("SELECT COUNT(*) FROM refs_fts").fetchone()[0]
+    assert refs == indexed == 80
+    assert store.search('黄芪')['total'] == 40
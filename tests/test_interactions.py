@@ -0,0 +1,23 @@
+from interactions import InteractionChecker
+
+
+def test_bitsets_are_symmetric():
+    checker = InteractionChecker()
+    for i, mask in enumerate(checker.conflicts):
+        j = mask
+        while j:
+            b = (j & -j).bit_length() - 1
+            assert checker.conflicts[b] >> i & 1
+            j &= j - 1
+    assert checker.pregnancy_mask >> checker.index['麝香'] & 1
+
+
+def test_check_and_batch_agree():
+    checker = InteractionChecker()
+    prescriptions = [['甘草', '海藻', '人参'], ['人参', '五灵脂', '华法林'], ['黄芪'], ['桃仁', '阿司匹林']]
+    single = [checker.check(p, pregnant=True) for p in prescriptions]
+    assert single == checker.check_batch(prescriptions, pregnant=True)
+    assert [(f['类型'], {f['药物A'], f['药物B']}) for f in single[0]] == [('十八反', {'甘草', '海藻'})]
+    assert {f['类型'] for f in single[1]} == {'十九畏', '中西药'}
+    assert single[2] == []
+    assert [f['类型'] for f in single[3]] == ['中西药', '妊娠禁忌']
@@ -0,0 +1,31 @@
+import numpy as np
+import pandas as pd
+
+from price_store import PriceStore, resample_ohlc
+
+
+def _quotes():
+    times = pd.date_range('2024-01-30', periods=12, freq='12h')
+    return pd.DataFrame({'中药': '当归', '时间': times, '价格': np.arange(12, dtype=float) + 10, '成交量': 1.0})
+
+
+def test_append_read_round_trip(tmp_path):
+    store = PriceStore(str(tmp_path))
+    quotes = _quotes()
+    assert store.append(quotes.iloc[:6]) == 6
+    assert store.append(quotes.iloc[6:]) == 6
+    assert store.herbs() == ['当归']
+    assert store.months('当归') == ['2024-01', '2024-02']
+    table = store.read('当归').to_pandas()
+    np.testing.assert_array_equal(table['价格'], quotes['价格'])
+    # 只给日期时包含当天全部报价
+    assert store.read('当归', '2024-02-01', '2024-02-01').num_rows == 2
+    assert not store.has('黄芪')
+
+
+def test_ohlc_daily():
+    quotes = _quotes()
+    bars = resample_ohlc(quotes['时间'].to_numpy(), quotes['价格'].to_numpy(), quotes['成交量'].to_numpy(), 'D')
+    assert len(bars) == 6
+    first = bars.iloc[0]
+    assert (first['Open'], first['High'], first['Low'], first['Close'], first['Volume']) == (10, 11, 10, 11, 2)
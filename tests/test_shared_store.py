@@ -0,0 +1,47 @@
+import threading
+
+import pandas as pd
+
+from shared_store import SharedDatasetStore
+from streaming import TABLE_NAMES
+
+
+def _tables():
+    frame = pd.DataFrame({'中药': ['人参', '黄芪'], '频次': [3, 5]})
+    return tuple([('人参', '黄芪', 1.0)] if name == 'edges' else frame for name in TABLE_NAMES)
+
+
+def test_release_then_idle_eviction(tmp_path):
+    store = SharedDatasetStore(root=str(tmp_path), idle_seconds=0)
+    lease = store.acquire('k', _tables)
+    assert store.refs('k') == 1
+    assert store.evict_idle() == []
+    lease.release()
+    assert store.refs('k') == 0
+    assert store.stats()['数据集'] == 0
+    # 映射已解除，磁盘文件仍在：再次取得走磁盘载入而不是重新计算
+    again = store.acquire('k', lambda: (_ for _ in ()).throw(AssertionError("不应重新计算")))
+    assert store.stats()['磁盘载入'] == 1
+    again.release()
+
+
+def test_single_flight(tmp_path):
+    store = SharedDatasetStore(root=str(tmp_path))
+    calls = []
+    gate = threading.Event()
+
+    def compute():
+        calls.append(1)
+        gate.wait(5)
+        return _tables()
+
+    leases = []
+    threads = [threading.Thread(target=lambda: leases.append(store.acquire('k', compute))) for _ in range(4)]
+    for t in threads:
+        t.start()
+    gate.set()
+    for t in threads:
+        t.join()
+    assert len(calls) == 1
+    assert store.refs('k') == 4
+    assert all(lease.tables[0]['频次'].tolist() == [3, 5] for lease in leases)